@@ -0,0 +1,54 @@
+from neorl.tune import HBTUNE
+from neorl import ES
+
+#**********************************************************
+# Part I: Original Problem Settings
+#**********************************************************
+
+#Define the fitness function (for original optimisation)
+def sphere(individual):
+    y=sum(x**2 for x in individual)
+    return y
+
+#*************************************************************
+# Part II: Define fitness function for hyperparameter tuning
+#*************************************************************
+def tune_fit(cxpb, mu, alpha, cxmode, budget):
+
+    #--setup the parameter space
+    nx=5
+    BOUNDS={}
+    for i in range(1,nx+1):
+        BOUNDS['x'+str(i)]=['float', -100, 100]
+
+    #--setup the ES algorithm
+    es=ES(mode='min', bounds=BOUNDS, fit=sphere, lambda_=80, mu=mu, mutpb=0.1, alpha=alpha,
+         cxmode=cxmode, cxpb=cxpb, ncores=1, seed=1)
+
+    #--Evolute the ES object and obtains y_best
+    #--the budget given by the tuner is the number of generations
+    x_best, y_best, es_hist=es.evolute(ngen=budget, verbose=0)
+
+    return y_best #returns the best score
+
+#*************************************************************
+# Part III: Tuning
+#*************************************************************
+#Setup the parameter space
+#VERY IMPORTANT: The order of these parameters MUST be similar to their order in tune_fit
+#see tune_fit
+param_grid={
+#def tune_fit(cxpb, mu, alpha, cxmode, budget):
+
+'cxpb': ['float', 0.1, 0.9],             #cxpb is first (low=0.1, high=0.8, type=float/continuous)
+'mu':   ['int', 30, 60],                 #mu is second (low=30, high=60, type=int/discrete)
+'alpha':['grid', (0.1, 0.2, 0.3, 0.4)],    #alpha is third (grid with fixed values, type=grid/categorical)
+'cxmode':['grid', ('blend', 'cx2point')]}  #cxmode is fourth (grid with fixed values, type=grid/categorical)
+
+#setup a successive-halving tune object: 27 cases start with 4 generations, 
+#the best third is promoted to 12 generations, and the best ninth to 36 generations
+hbtune=HBTUNE(param_grid=param_grid, fit=tune_fit, max_budget=36, min_budget=4, eta=3, ncases=27, seed=1)
+#tune the parameters with method .tune
+hbres=hbtune.tune(ncores=1, csvname='tune.csv')
+#the final scores are those evaluated with the full budget
+print(hbres[hbres['budget'] == 36].sort_values(['score'], axis='index', ascending=True))
@@ -15,15 +15,11 @@
 # Copyright (c) 2021, NEORL authors.
 # Licensed under the MIT license
 import warnings, os
+import importlib
+import multiprocessing
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.filterwarnings("ignore", message=r"Passing", category=FutureWarning)
-
-import tensorflow as tf
-from tensorflow.python.util import deprecation
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
-if type(tf.contrib) != type(tf): tf.contrib._warning = None
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-deprecation._PRINT_DEPRECATION_WARNINGS = False
 
 logo="""
 
@@ -41,48 +37,88 @@ Copyright © 2021 Exelon Corporation (https://www.exeloncorp.com/) in collaborat
                        \n"""
                        
 
-try:                    
-    print(logo)
-except:
-    print(logo.encode('utf-8'))
-    #print(logo.encode('ascii', 'ignore').decode('ascii'))
-import os
 
-from neorl.rl.baselines.a2c import A2C
-from neorl.rl.baselines.acer import ACER
-from neorl.rl.baselines.deepq import DQN
-from neorl.rl.baselines.ppo2 import PPO2
-from neorl.rl.baselines.acktr import ACKTR
-from neorl.evolu.pso import PSO
-from neorl.evolu.sa import SA
-from neorl.evolu.bat import BAT
-from neorl.evolu.de import DE
-from neorl.evolu.xnes import XNES
-from neorl.evolu.es import ES
-from neorl.evolu.gwo import GWO
-from neorl.evolu.ssa import SSA
-from neorl.evolu.woa import WOA
-from neorl.evolu.jaya import JAYA
-from neorl.evolu.mfo import MFO
-from neorl.evolu.hho import HHO
-from neorl.hybrid.pesa import PESA
-from neorl.hybrid.pesa2 import PESA2
-from neorl.rl.baselines.shared.policies import MlpPolicy
-from neorl.rl.baselines.deepq.policies import MlpPolicy as DQNPolicy
-from neorl.utils.neorlcalls import RLLogger
-from neorl.rl.make_env import CreateEnvironment
-from neorl.hybrid.rneat import RNEAT
-from neorl.hybrid.fneat import FNEAT
-from neorl.hybrid.ppoes import PPOES
-from neorl.hybrid.ackde import ACKDE
-from neorl.evolu.aco import ACO
-from neorl.evolu.cs import CS
-from neorl.hybrid.nga import NGA
-from neorl.hybrid.nhho import NHHO
-from neorl.evolu.ts import TS
-from neorl.hybrid.aeo import AEO
-from neorl.evolu.hclpso import HCLPSO
-from neorl.hybrid.edev import EDEV
-from neorl.hybrid.epso import EPSO
-from neorl.multi.nsgaII import NSGAII
-from neorl.multi.nsgaIII import NSGAIII
\ No newline at end of file
+#the logo is only printed by the main process, not by the parallel workers
+if multiprocessing.parent_process() is None:
+    try:                    
+        print(logo)
+    except:
+        print(logo.encode('utf-8'))
+        #print(logo.encode('ascii', 'ignore').decode('ascii'))
+
+# The algorithms are imported on their first access (PEP 562), so that
+# ``from neorl import DE`` does not import TensorFlow and the RL baselines.
+# name: (module, attribute)
+_lazy_imports = {
+    'A2C': ('neorl.rl.baselines.a2c', 'A2C'),
+    'ACER': ('neorl.rl.baselines.acer', 'ACER'),
+    'DQN': ('neorl.rl.baselines.deepq', 'DQN'),
+    'PPO2': ('neorl.rl.baselines.ppo2', 'PPO2'),
+    'ACKTR': ('neorl.rl.baselines.acktr', 'ACKTR'),
+    'PSO': ('neorl.evolu.pso', 'PSO'),
+    'SA': ('neorl.evolu.sa', 'SA'),
+    'BAT': ('neorl.evolu.bat', 'BAT'),
+    'DE': ('neorl.evolu.de', 'DE'),
+    'XNES': ('neorl.evolu.xnes', 'XNES'),
+    'ES': ('neorl.evolu.es', 'ES'),
+    'GWO': ('neorl.evolu.gwo', 'GWO'),
+    'SSA': ('neorl.evolu.ssa', 'SSA'),
+    'WOA': ('neorl.evolu.woa', 'WOA'),
+    'JAYA': ('neorl.evolu.jaya', 'JAYA'),
+    'MFO': ('neorl.evolu.mfo', 'MFO'),
+    'HHO': ('neorl.evolu.hho', 'HHO'),
+    'PESA': ('neorl.hybrid.pesa', 'PESA'),
+    'PESA2': ('neorl.hybrid.pesa2', 'PESA2'),
+    'MlpPolicy': ('neorl.rl.baselines.shared.policies', 'MlpPolicy'),
+    'DQNPolicy': ('neorl.rl.baselines.deepq.policies', 'MlpPolicy'),
+    'RLLogger': ('neorl.utils.neorlcalls', 'RLLogger'),
+    'CreateEnvironment': ('neorl.rl.make_env', 'CreateEnvironment'),
+    'RNEAT': ('neorl.hybrid.rneat', 'RNEAT'),
+    'FNEAT': ('neorl.hybrid.fneat', 'FNEAT'),
+    'PPOES': ('neorl.hybrid.ppoes', 'PPOES'),
+    'ACKDE': ('neorl.hybrid.ackde', 'ACKDE'),
+    'ACO': ('neorl.evolu.aco', 'ACO'),
+    'CS': ('neorl.evolu.cs', 'CS'),
+    'NGA': ('neorl.hybrid.nga', 'NGA'),
+    'NHHO': ('neorl.hybrid.nhho', 'NHHO'),
+    'TS': ('neorl.evolu.ts', 'TS'),
+    'AEO': ('neorl.hybrid.aeo', 'AEO'),
+    'HCLPSO': ('neorl.evolu.hclpso', 'HCLPSO'),
+    'EDEV': ('neorl.hybrid.edev', 'EDEV'),
+    'EPSO': ('neorl.hybrid.epso', 'EPSO'),
+    'NSGAII': ('neorl.multi.nsgaII', 'NSGAII'),
+    'NSGAIII': ('neorl.multi.nsgaIII', 'NSGAIII')
+}
+
+__all__ = list(_lazy_imports)
+
+# algorithms which depend on TensorFlow (through the RL baselines or keras)
+_tf_imports = {'A2C', 'ACER', 'DQN', 'PPO2', 'ACKTR', 'MlpPolicy', 'DQNPolicy', 'RLLogger',
+               'CreateEnvironment', 'RNEAT', 'FNEAT', 'PPOES', 'ACKDE', 'NHHO'}
+
+_tf_quiet = False
+
+def _quiet_tensorflow():
+    #import TensorFlow once and silence its logs and deprecation warnings
+    global _tf_quiet
+    if _tf_quiet:
+        return
+    import tensorflow as tf
+    from tensorflow.python.util import deprecation
+    tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
+    if type(tf.contrib) != type(tf): tf.contrib._warning = None
+    deprecation._PRINT_DEPRECATION_WARNINGS = False
+    _tf_quiet = True
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        module, attr = _lazy_imports[name]
+        if name in _tf_imports:
+            _quiet_tensorflow()
+        value = getattr(importlib.import_module(module), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1000,3 +1000,193 @@ all_functions = [
     f29,
     f30
 ]
+
+#-------------------------------------------------------------------------------
+# Batch evaluation
+#-------------------------------------------------------------------------------
+
+# basic functions of f1-f10 (f7 and f8 take the shift and rotation themselves)
+_simple_funcs = {
+    1: basic.bent_cigar,
+    2: basic.sum_diff_pow,
+    3: basic.zakharov,
+    4: basic.rosenbrock,
+    5: basic.rastrigin,
+    6: basic.schaffers_f7,
+    7: basic.lunacek_bi_rastrigin,
+    8: basic.non_cont_rastrigin,
+    9: basic.levy,
+    10: basic.modified_schwefel
+}
+
+# basic functions and partitions of the hybrid functions f11-f20
+_hybrid_funcs = {
+    11: ([basic.zakharov, basic.rosenbrock, basic.rastrigin], [0.2, 0.4, 0.4]),
+    12: ([basic.high_conditioned_elliptic, basic.modified_schwefel, basic.bent_cigar], [0.3, 0.3, 0.4]),
+    13: ([basic.bent_cigar, basic.rosenbrock, basic.lunacek_bi_rastrigin], [0.3, 0.3, 0.4]),
+    14: ([basic.high_conditioned_elliptic, basic.ackley, basic.schaffers_f7, basic.rastrigin], [0.2, 0.2, 0.2, 0.4]),
+    15: ([basic.bent_cigar, basic.h_g_bat, basic.rastrigin, basic.rosenbrock], [0.2, 0.2, 0.3, 0.3]),
+    16: ([basic.expanded_schaffers_f6, basic.h_g_bat, basic.rosenbrock, basic.modified_schwefel], [0.2, 0.2, 0.3, 0.3]),
+    17: ([basic.katsuura, basic.ackley, basic.expanded_griewanks_plus_rosenbrock, basic.modified_schwefel,
+          basic.rastrigin], [0.1, 0.2, 0.2, 0.2, 0.3]),
+    18: ([basic.high_conditioned_elliptic, basic.ackley, basic.rastrigin, basic.h_g_bat, basic.discus],
+         [0.2, 0.2, 0.2, 0.2, 0.2]),
+    19: ([basic.bent_cigar, basic.rastrigin, basic.expanded_griewanks_plus_rosenbrock, basic.weierstrass,
+          basic.expanded_schaffers_f6], [0.2, 0.2, 0.2, 0.2, 0.2]),
+    20: ([basic.happy_cat, basic.katsuura, basic.ackley, basic.rastrigin, basic.modified_schwefel,
+          basic.schaffers_f7], [0.1, 0.1, 0.2, 0.2, 0.2, 0.2])
+}
+
+# components, sigmas, lambdas, and biases of the composition functions f21-f30
+# (the components of f29 and f30 are hybrid functions)
+_composition_funcs = {
+    21: ([basic.rosenbrock, basic.high_conditioned_elliptic, basic.rastrigin],
+         [10.0, 20.0, 30.0], [1.0, 1.0e-6, 1.0], [0.0, 100.0, 200.0]),
+    22: ([basic.rastrigin, basic.griewank, basic.modified_schwefel],
+         [10.0, 20.0, 30.0], [1.0, 10.0, 1.0], [0.0, 100.0, 200.0]),
+    23: ([basic.rosenbrock, basic.ackley, basic.modified_schwefel, basic.rastrigin],
+         [10.0, 20.0, 30.0, 40.0], [1.0, 10.0, 1.0, 1.0], [0.0, 100.0, 200.0, 300.0]),
+    24: ([basic.ackley, basic.high_conditioned_elliptic, basic.griewank, basic.rastrigin],
+         [10.0, 20.0, 30.0, 40.0], [1.0, 1.0e-6, 10.0, 1.0], [0.0, 100.0, 200.0, 300.0]),
+    25: ([basic.rastrigin, basic.happy_cat, basic.ackley, basic.discus, basic.rosenbrock],
+         [10.0, 20.0, 30.0, 40.0, 50.0], [10.0, 1.0, 10.0, 1.0e-6, 1.0], [0.0, 100.0, 200.0, 300.0, 400.0]),
+    26: ([basic.expanded_schaffers_f6, basic.modified_schwefel, basic.griewank, basic.rosenbrock, basic.rastrigin],
+         [10.0, 20.0, 20.0, 30.0, 40.0], [5.0e-4, 1.0, 10.0, 1.0, 10.0], [0.0, 100.0, 200.0, 300.0, 400.0]),
+    27: ([basic.h_g_bat, basic.rastrigin, basic.modified_schwefel, basic.bent_cigar,
+          basic.high_conditioned_elliptic, basic.expanded_schaffers_f6],
+         [10.0, 20.0, 30.0, 40.0, 50.0, 60.0], [10.0, 10.0, 2.5, 1.0e-26, 1.0e-6, 5.0e-4],
+         [0.0, 100.0, 200.0, 300.0, 400.0, 500.0]),
+    28: ([basic.ackley, basic.griewank, basic.discus, basic.rosenbrock, basic.happy_cat,
+          basic.expanded_schaffers_f6],
+         [10.0, 20.0, 30.0, 40.0, 50.0, 60.0], [10.0, 10.0, 1.0e-6, 1.0, 1.0, 5.0e-4],
+         [0.0, 100.0, 200.0, 300.0, 400.0, 500.0]),
+    29: ([15, 16, 17], [10.0, 30.0, 50.0], [1.0, 1.0, 1.0], [0.0, 100.0, 200.0]),
+    30: ([15, 18, 19], [10.0, 30.0, 50.0], [1.0, 1.0, 1.0], [0.0, 100.0, 200.0])
+}
+
+def _partition_slices(nx, partitions):
+    # the same partition boundaries as in _shuffle_and_partition
+    slices = []
+    start, end = 0, 0
+    for p in partitions[:-1]:
+        end = start + int(np.ceil(p * nx))
+        slices.append(slice(start, end))
+        start = end
+    slices.append(slice(end, nx))
+    return slices
+
+class CEC17Suite:
+    """
+    Batch evaluator of one CEC2017 function in a fixed dimension. The rotation
+    matrices, shift vectors, and shuffles of the function are sliced once when the
+    object is created (the shuffle of the hybrid functions is folded into the columns
+    of the rotation matrix), so that a whole population is evaluated with one matrix
+    product and the vectorized basic functions of ``basic``. The object can be passed
+    as ``fit`` to any optimizer: a single vector returns a float and a population
+    matrix (one individual per row) returns an array of fitness values.
+
+    :param function: (int, str, or function) the CEC2017 function to evaluate, e.g. ``5``, ``'f5'``, or ``f5``
+    :param dim: (int) dimension of the function: 2, 10, 20, 30, 50 or 100 (f11-f20, f29, and f30 are only defined for 10, 30, 50, and 100)
+    """
+    def __init__(self, function, dim):
+        if callable(function):
+            function=function.__name__
+        if isinstance(function, str):
+            function=int(function.strip('f'))
+        if function not in range(1, 31):
+            raise ValueError('--error: the CEC2017 function must be between f1 and f30, got {}'.format(function))
+        if dim not in transforms.rotations:
+            raise ValueError('--error: the dimension of the CEC2017 functions must be 2, 10, 20, 30, 50 or 100, got {}'.format(dim))
+        if (11 <= function <= 20 or function >= 29) and dim not in transforms.shuffles:
+            raise ValueError('--error: f11-f20, f29, and f30 are only defined for dimensions 10, 30, 50, and 100, got {}'.format(dim))
+
+        self.fid=function
+        self.dim=dim
+        self.__name__='f{}'.format(function)
+
+        if function <= 20:
+            self.bias=100.0*function
+            rotation=transforms.rotations[dim][function-1]
+            self.shift=transforms.shifts[function-1][:dim]
+            if function <= 10:
+                self.rotation=np.ascontiguousarray(rotation)
+                self.func=basic.batch_functions[_simple_funcs[function]]
+            else:
+                self.components=[self._hybrid(function, rotation, transforms.shuffles[dim][function-11])]
+        else:
+            self.bias=100.0*function
+            funcs, sigmas, lambdas, biases=_composition_funcs[function]
+            n=len(funcs)
+            rotations=transforms.rotations_cf[dim][function-21][:n]
+            self.shifts=transforms.shifts_cf[function-21][:n, :dim]
+            self.sigmas=np.array(sigmas)
+            self.lambdas=np.array(lambdas)
+            self.biases=np.array(biases)
+            if function <= 28:
+                #(n, dim, dim) stack of transposed rotations
+                self.rotations=np.ascontiguousarray(np.transpose(rotations, (0,2,1)))
+                self.funcs=[basic.batch_functions[f] for f in funcs]
+            else:
+                shuffles=transforms.shuffles_cf[dim][function-29]
+                self.components=[self._hybrid(funcs[i], rotations[i], shuffles[i]) for i in range(n)]
+                self.rotations=np.stack([c[0] for c in self.components])
+
+    def _hybrid(self, fid, rotation, shuffle):
+        #"""
+        #Prepare a hybrid function: the transposed rotation with its columns
+        #permuted by the shuffle, and the vectorized functions of each partition
+        #"""
+        funcs, partitions=_hybrid_funcs[fid]
+        rotation_t=np.ascontiguousarray(rotation.T[:, shuffle])
+        slices=_partition_slices(self.dim, partitions)
+        return rotation_t, [(basic.batch_functions[f], s) for f, s in zip(funcs, slices)]
+
+    @staticmethod
+    def _eval_hybrid(z, parts):
+        #evaluate a hybrid function on the rotated and shuffled population z
+        y=0.0
+        for func, s in parts:
+            y=y+func(z[:, s])
+        return y
+
+    def _calc_w(self, d):
+        #vectorized _calc_w on the shifted populations d of shape (n, npop, dim)
+        w=np.sum(d*d, axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w=np.where(w != 0, ((1.0/w)**0.5) * np.exp(-w / (2.0*self.dim*self.sigmas[:,None]**2)), np.inf)
+            w_sm=np.sum(w, axis=0)
+            return np.where(w_sm != 0.0, w/w_sm, 1/w.shape[0])
+
+    def evaluate(self, x):
+        """
+        This function evaluates a population of individuals.
+
+        :param x: (array) population of shape (npop, dim), one individual per row
+        :return: (array) the npop function values
+        """
+        x=np.asarray(x, dtype=float)
+        if x.ndim != 2 or x.shape[1] != self.dim:
+            raise ValueError('--error: the population must have the shape (npop, {}), got {}'.format(self.dim, x.shape))
+
+        if self.fid in [7, 8]:
+            return self.func(x, self.shift, self.rotation) + self.bias
+        if self.fid <= 10:
+            return self.func(np.matmul(x - self.shift, self.rotation.T)) + self.bias
+        if self.fid <= 20:
+            rotation_t, parts=self.components[0]
+            return self._eval_hybrid(np.matmul(x - self.shift, rotation_t), parts) + self.bias
+
+        d=x[None,:,:] - self.shifts[:,None,:]   #(n, npop, dim)
+        z=np.matmul(d, self.rotations)           #one batched product for all components
+        if self.fid <= 28:
+            vals=np.stack([self.funcs[i](z[i]) for i in range(len(self.funcs))])
+        else:
+            vals=np.stack([self._eval_hybrid(z[i], parts) for i, (_, parts) in enumerate(self.components)])
+        w=self._calc_w(d)
+        return np.sum(w * (self.lambdas[:,None]*vals + self.biases[:,None]), axis=0) + self.bias
+
+    def __call__(self, x):
+        x=np.asarray(x, dtype=float)
+        if x.ndim == 1:
+            return float(self.evaluate(x[None,:])[0])
+        return self.evaluate(x)
@@ -1,7 +1,6 @@
 import numpy as np
 from pathlib import Path
 import pandas as pd
-from tensorflow.keras.models import load_model
 import sys
 import inspect
 
@@ -21,6 +20,8 @@ class QPowerModel:
     Set up as init, then separately use method call to minimize reading times.
     """
     def __init__(self):
+        #tensorflow is only imported when the model is needed
+        from tensorflow.keras.models import load_model
         #Find and load file
         model_file = cpath / Path("tools/microreactor_power_model.h5")
         self.raw_model = load_model(model_file)
@@ -1,5 +1,4 @@
 import pandas as pd
-from scipy.interpolate import interp1d
 import sys
 import inspect
 from pathlib import Path
@@ -126,6 +125,50 @@ def integrate_sq(x, y, lbnd, ubnd):
 
     return full_blocks_integral + lower_block_integral + upper_block_integral
 
+class CumulativeIntegrals:
+    """
+    Precomputed cumulative integrals of the piecewise linear function given by x & y
+    and of its square, so that integrate/integrate_sq between any bounds are the
+    difference of two lookups. Bounds can be scalars or numpy arrays.
+    """
+    def __init__(self, x, y):
+        self.x, self.y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        dx = np.diff(self.x)
+        y0, y1 = self.y[:-1], self.y[1:]
+        self.cum = np.concatenate([[0.0], np.cumsum(dx*(y0 + y1)/2)])
+        self.cum_sq = np.concatenate([[0.0], np.cumsum(dx*(y0*y0 + y0*y1 + y1*y1)/3)])
+        self.slopes = np.diff(self.y)/dx
+
+    def _locate(self, bnd):
+        """find the block of each bound, its distance to the block start and the interpolated y"""
+        bnd = np.asarray(bnd, dtype=float)
+        idx = np.clip(np.searchsorted(self.x, bnd, side="right") - 1, 0, self.x.size - 2)
+        t = bnd - self.x[idx]
+        return idx, t, self.y[idx] + t*self.slopes[idx]
+
+    def antiderivative(self, bnd):
+        """integral of y from x[0] to bnd"""
+        idx, t, yb = self._locate(bnd)
+        return self.cum[idx] + t*(self.y[idx] + yb)/2
+
+    def antiderivative_sq(self, bnd):
+        """integral of y^2 from x[0] to bnd"""
+        idx, t, yb = self._locate(bnd)
+        yi = self.y[idx]
+        return self.cum_sq[idx] + t*(yi*yi + yi*yb + yb*yb)/3
+
+    def integrate(self, lbnd, ubnd):
+        """Integrate j- function across the bounds."""
+        return self.antiderivative(ubnd) - self.antiderivative(lbnd)
+
+    def integrate_sq(self, lbnd, ubnd):
+        """Integrate j-^2 function across the bounds."""
+        return self.antiderivative_sq(ubnd) - self.antiderivative_sq(lbnd)
+
+    def __call__(self, x):
+        """linear interpolation of y, as interp1d"""
+        return np.interp(x, self.x, self.y)
+
 def int_bounds(theta, cangle):
     """get bounds on j-^2 integrals given rotation angle, theta and coating angle cangle
     returns (thetaA&thetaA0'), (thetaA'&thetaA0)"""
@@ -138,6 +181,20 @@ def int_bounds(theta, cangle):
     else:
         return ([theta - cangle/2, theta + cangle/2], [-cangle/2, cangle/2])
 
+def int_bounds_many(thetas, cangles):
+    """vectorized int_bounds for arrays of angles thetas and coating angles cangles
+    returns the lower and upper bounds of (thetaA&thetaA0') and of (thetaA'&thetaA0)"""
+    assert np.all((thetas < np.pi + 1e-5) & (thetas > -np.pi - 1e-5))
+    thetas, cangles = np.broadcast_arrays(thetas, cangles)
+    half = cangles/2
+    pos = (0 < thetas) & (thetas < cangles)
+    neg = (-cangles < thetas) & (thetas < 0)
+    l1 = np.where(pos, half, thetas - half)
+    u1 = np.where(neg, -half, thetas + half)
+    l2 = np.where(pos, -half, np.where(neg, thetas + half, -half))
+    u2 = np.where(pos, thetas - half, half)
+    return l1, u1, l2, u2
+
 def calc_zetatildes(theta, cangles, alphas, jminusA, jminusB):
     """
     calculate zetatilde functions for all drums
@@ -196,15 +253,58 @@ class ReactivityModel:
     Used to evaluate reactivity insertion from control drum perturbation.
     Set up as init->method call to minimize file reading times
     """
+    configAids = [0, 3, 4, 7] #drum indices with configuration A
+
     def __init__(self, typ = "wtd"): #abs, wtd or refl
         """initialize to perform all file I/O"""
         self.jmA, self.jmB = get_jminus(typ)
         self.alphas = get_alphas(typ)
         self.cangles = np.array([130, 145, 145, 130,
                                  130, 145, 145, 130])/180*np.pi
-        fA = interp1d(self.jmA["centers"].values, self.jmA["hist"].values)
-        fB = interp1d(self.jmB["centers"].values, self.jmB["hist"].values)
+        #cumulative integrals of j- (also used as interpolating functions of j-)
+        fA = CumulativeIntegrals(self.jmA["centers"].values, self.jmA["hist"].values)
+        fB = CumulativeIntegrals(self.jmB["centers"].values, self.jmB["hist"].values)
         self.jmfs = [fA, fB, fB, fA, fA, fB, fB, fA]
+        self._alphas = self.alphas.values
+        self._configA = np.isin(np.arange(8), self.configAids)
+
+    def _by_config(self, method, *bnds):
+        #"""
+        #apply an integral method of the A and B j- functions to (npop, 8) bounds,
+        #using the j- function of each drum
+        #"""
+        fA, fB = self.jmfs[0], self.jmfs[1]
+        return np.where(self._configA, getattr(fA, method)(*bnds), getattr(fB, method)(*bnds))
+
+    def _terms(self, perts):
+        #"""
+        #zetatildes and differences of j-^2 integrals of a population of drum angles
+        #"""
+        lbnd = perts - self.cangles/2
+        ubnd = perts + self.cangles/2
+        gammastar = np.ones((perts.shape[0], 9))
+        gammastar[:, 1:] = 1 - self._by_config("integrate", lbnd, ubnd)
+        zetatildes = gammastar@self._alphas.T
+
+        l1, u1, l2, u2 = int_bounds_many(perts, self.cangles)
+        dints = self._by_config("integrate_sq", l1, u1) - self._by_config("integrate_sq", l2, u2)
+        return zetatildes, dints
+
+    def eval_many(self, perts, nom = None):
+        """
+        Evaluate reactivity worth of a population of drum perturbations in one pass.
+        Perts is numpy array of shape (npop, 8) of drum angles in radians with 
+        coordinate systems described in the README.md.
+        Nom is an optional starting state given same as a single pert
+        Returns numpy array of npop reactivities
+        """
+        #bring drum angles into [-np.pi, np.pi]
+        perts = adj_coords(np.array(perts, dtype=float, ndmin=2))
+        zetatildes, dints = self._terms(perts)
+        reactivities = (zetatildes*dints).sum(axis=1)
+        if nom is not None: #reactivites additive
+            reactivities -= self.eval(nom)
+        return reactivities
 
     def eval(self, pert, nom = None):
         """
@@ -213,78 +313,36 @@ class ReactivityModel:
         coordinate systems described in the README.md.
         Nom is an optional starting state given same as pert
         """
-        #bring drum angles into [-np.pi, np.pi]
-        pert = adj_coords(pert)
-
-        #pull in zetatildes from external function
-        zetatildes = calc_zetatildes(theta = pert,
-                                     cangles = self.cangles,
-                                     alphas = self.alphas,
-                                     jminusA = self.jmA,
-                                     jminusB = self.jmB)
-
-        #loop through drums and calculate each contribution
-        reactivities = np.zeros(8)
-        for i in range(8):
-            b1, b2 = int_bounds(pert[i], self.cangles[i])
-            if i in [0, 3, 4, 7]: #if config A
-                int1 = integrate_sq(self.jmA["centers"], self.jmA["hist"], *b1)
-                int2 = integrate_sq(self.jmA["centers"], self.jmA["hist"], *b2)
-            else: #if config A
-                int1 = integrate_sq(self.jmB["centers"], self.jmB["hist"], *b1)
-                int2 = integrate_sq(self.jmB["centers"], self.jmB["hist"], *b2)
-            reactivities[i] = zetatildes[i]*(int1 - int2)
-
-        #basically just return conditionals
-        if nom: #little trick
-            return self.eval(pert) - self.eval(nom) #assume
-                                                          #reactivites additive
-        else:
-            return reactivities.sum()
+        return self.eval_many(pert, nom)[0]
+
+    def evalg_many(self, perts):
+        """
+        Evaluate the gradient of the reactivity worth for a population of drum configs.
+        Perts is numpy array of shape (npop, 8) of drum angles in radians
+        Returns numpy array of shape (npop, 8)
+        """
+        perts = adj_coords(np.array(perts, dtype=float, ndmin=2))
+        zetatildes, dints = self._terms(perts)
+
+        #derivative of gammastar of each drum respect to its own angle
+        ubnd = perts + self.cangles/2
+        lbnd = perts - self.cangles/2
+        dgamma = -self._by_config("__call__", ubnd) + self._by_config("__call__", lbnd)
+
+        #sum over drums of dzetatildes*(int1 - int2), then extra term from eq41
+        grad = dgamma*(dints@self._alphas[:, 1:])
+        grad += zetatildes*(self._by_config("__call__", ubnd)**2 - self._by_config("__call__", lbnd)**2)
+        return grad
 
     def evald(self, pert, k, zetatildes = None):
         """
         Evaluate differential reactivity worth of drum config from single drum.
         Pert is numpy array of 8 drum angles in radians with 
         k is which drum rotation to take derivative respect to
-        zetatildes should be ignored, used for computational efficiency
+        zetatildes is kept for backward compatibility and is not used
         coordinate systems described in the README.md.
         """
-        #bring drum angles into [-np.pi, np.pi]
-        pert = adj_coords(pert)
-
-        #calculate zetatilde parameters
-        dzetatildes = calc_dzetatildes(thetas = pert,
-                                      k = k,
-                                      cangles = self.cangles,
-                                      alphas = self.alphas,
-                                      jmfs = self.jmfs)
-        if zetatildes is None:
-            zetatildes = calc_zetatildes(theta = pert,
-                                         cangles = self.cangles,
-                                         alphas = self.alphas,
-                                         jminusA = self.jmA,
-                                         jminusB = self.jmB)
-
-        #define vector to hold summation
-        drdtk = np.zeros(8)
-
-        #iterate through all drums
-        for i in range(8):
-            b1, b2 = int_bounds(pert[i], self.cangles[i])
-            if i in [0, 3, 4, 7]: #if config A
-                int1 = integrate_sq(self.jmA["centers"], self.jmA["hist"], *b1)
-                int2 = integrate_sq(self.jmA["centers"], self.jmA["hist"], *b2)
-            else: #if config B
-                int1 = integrate_sq(self.jmB["centers"], self.jmB["hist"], *b1)
-                int2 = integrate_sq(self.jmB["centers"], self.jmB["hist"], *b2)
-
-            drdtk[i] += dzetatildes[i] * (int1 - int2)
-
-        #tack on extra term from eq41
-        drdtk[k-1] += zetatildes[k-1]*calc_W(pert[k-1], self.cangles[k-1], self.jmfs[k-1])
-
-        return drdtk.sum()
+        return self.evalg_many(pert)[0, k-1]
 
     def evalg(self, pert):
         """
@@ -293,30 +351,32 @@ class ReactivityModel:
         Pert is numpy array of 8 drum angles in radians with 
         coordinate systems described in the README.md.
         """
-        zetatildes = calc_zetatildes(theta = pert,
-                                     cangles = self.cangles,
-                                     alphas = self.alphas,
-                                     jminusA = self.jmA,
-                                     jminusB = self.jmB)
-        grad = np.zeros(8)
-        for i in range(8):
-            grad[i] = self.evald(pert, i+1, zetatildes)
-        return grad
+        return self.evalg_many(pert)[0]
+
+#one model per typ, shared by the wrappers below to avoid reading the files at every call
+_models = {}
+
+def get_reactivity_model(typ = "wtd"):
+    """Return the cached ReactivityModel of typ (created on the first call)"""
+    if typ not in _models:
+        _models[typ] = ReactivityModel(typ)
+    return _models[typ]
 
 def reactivityModelEval(pert, nom = None, typ = "wtd"):
-    """Wrapper for ReactivityModel that initializes and runs"""
-    a = ReactivityModel(typ)
-    return a.eval(pert, nom)
+    """Wrapper for ReactivityModel that runs the cached model"""
+    return get_reactivity_model(typ).eval(pert, nom)
 
 def reactivityModelEvald(pert, k, typ = "wtd"):
-    """Wrapper for ReactivityModel that initializes and runs"""
-    aa = ReactivityModel(typ)
-    return aa.evald(pert, k)
+    """Wrapper for ReactivityModel that runs the cached model"""
+    return get_reactivity_model(typ).evald(pert, k)
 
 def reactivityModelEvalg(pert, typ = "wtd"):
-    """Wrapper for ReactivityModel that initializes and runs"""
-    aa = ReactivityModel(typ)
-    return aa.evalg(pert)
+    """Wrapper for ReactivityModel that runs the cached model"""
+    return get_reactivity_model(typ).evalg(pert)
+
+def reactivityModelEvalMany(perts, nom = None, typ = "wtd"):
+    """Wrapper for ReactivityModel that evaluates a population with the cached model"""
+    return get_reactivity_model(typ).eval_many(perts, nom)
 
 if __name__ == "__main__":
     a = ReactivityModel()
@@ -317,3 +317,179 @@ all_functions = [
     expanded_griewanks_plus_rosenbrock,
     schaffers_f7
 ]
+
+
+#-------------------------------------------------------------------------------
+# Vectorized versions of the basic functions above: each takes a population
+# matrix x of shape (npop, nx) and returns the npop function values
+#-------------------------------------------------------------------------------
+
+def bent_cigar_batch(x):
+    return x[:,0]*x[:,0] + 10e6*np.sum(x[:,1:]*x[:,1:], axis=1)
+
+def sum_diff_pow_batch(x):
+    return np.sum(np.abs(x)**np.arange(1, x.shape[1]+1), axis=1)
+
+def zakharov_batch(x):
+    sms = np.sum(x*x, axis=1)
+    sm = 0.5 * np.sum(np.arange(1, x.shape[1]+1)*x, axis=1)
+    sm = sm * sm
+    return sms + sm + (sm * sm)
+
+def rosenbrock_batch(x):
+    x = 0.02048 * x + 1.0
+    t1 = x[:,:-1]*x[:,:-1] - x[:,1:]
+    t2 = x[:,:-1] - 1
+    return np.sum(100*t1*t1 + t2*t2, axis=1)
+
+def rastrigin_batch(x):
+    x = 0.0512 * x
+    return np.sum(x*x - 10*np.cos(2.0*np.pi*x), axis=1) + 10*x.shape[1]
+
+def expanded_schaffers_f6_batch(x):
+    t = x[:,:-1]*x[:,:-1] + x[:,1:]*x[:,1:]
+    t1 = np.sin(np.sqrt(t))
+    t2 = 1 + 0.001*t
+    return np.sum(0.5 + (t1*t1 - 0.5)/(t2*t2), axis=1)
+
+def lunacek_bi_rastrigin_batch(x, shift=None, rotation=None):
+    nx = x.shape[1]
+    if shift is None:
+        shift = np.zeros(nx)
+
+    mu0=2.5
+    s = 1 - 1 / (2 * ((nx+20)**0.5) - 8.2)
+    mu1 = -((mu0*mu0-1)/s)**0.5
+
+    z = 0.2 * (x - shift) * np.where(shift < 0.0, -1.0, 1.0)
+    tmpx = z + mu0
+    t1 = np.sum((tmpx-mu0)**2, axis=1)
+    t2 = s*np.sum((tmpx-mu1)**2, axis=1) + nx
+
+    y = z if rotation is None else np.matmul(z, rotation.T)
+    t = np.sum(np.cos(2.0*np.pi*y), axis=1)
+    return np.minimum(t1, t2) + 10.0*(nx-t)
+
+def non_cont_rastrigin_batch(x, shift=None, rotation=None):
+    if shift is None:
+        shift = np.zeros(x.shape[1])
+
+    d = x - shift
+    d = np.where(np.abs(d) > 0.5, np.floor(2*d+0.5)/2, d)
+    z = 0.0512 * d
+    z = z if rotation is None else np.matmul(z, rotation.T)
+    return np.sum(z*z - 10.0*np.cos(2.0*np.pi*z) + 10.0, axis=1)
+
+def levy_batch(x):
+    w = 1.0 + 0.25*(x - 1.0)
+    term1 = (np.sin(np.pi*w[:,0]))**2
+    term3 = ((w[:,-1] - 1)**2) * (1 + ((np.sin(2*np.pi*w[:,-1]))**2))
+    wi = w[:,:-1]
+    sm = np.sum(((wi-1)**2) * (1 + 10*((np.sin(np.pi*wi+1))**2)), axis=1)
+    return term1 + sm + term3
+
+def modified_schwefel_batch(x):
+    nx = x.shape[1]
+    z = 10.0 * x + 420.9687462275036
+    zm_low = (np.abs(z) % 500) - 500
+    zm_high = 500 - (z % 500)
+    low = zm_low * np.sin(np.sqrt(np.abs(zm_low))) - (z + 500)**2 / (10000*nx)
+    high = zm_high * np.sin(np.sqrt(np.abs(zm_high))) - (z - 500)**2 / (10000*nx)
+    mid = z * np.sin(np.sqrt(np.abs(z)))
+    sm = np.sum(np.where(z < -500, low, np.where(z > 500, high, mid)), axis=1)
+    return 418.9829*nx - sm
+
+def high_conditioned_elliptic_batch(x):
+    factor = 6 / (x.shape[1] - 1)
+    return np.sum(x*x * 10**(np.arange(x.shape[1])*factor), axis=1)
+
+def discus_batch(x):
+    return 1e+6*x[:,0]*x[:,0] + np.sum(x[:,1:]*x[:,1:], axis=1)
+
+def ackley_batch(x):
+    inx = 1/x.shape[1]
+    smsq = np.sum(x*x, axis=1)
+    smcs = np.sum(np.cos((2*np.pi)*x), axis=1)
+    return -20*np.exp(-0.2*np.sqrt(inx*smsq)) - np.exp(inx*smcs) + 20 + np.e
+
+def weierstrass_batch(x):
+    x = 0.005 * x
+    k = np.arange(start=0, stop=21, step=1)
+    ak = 0.5**k
+    bk = np.pi * (3**k)
+    sm = np.sum(ak * np.cos(2*(x[:,:,None]+0.5)*bk), axis=(1,2))
+    return sm - x.shape[1]*np.sum(ak * np.cos(bk))
+
+def griewank_batch(x):
+    x = 6.0 * x
+    cs = np.cos(x / np.arange(start=1, stop=x.shape[1]+1))
+    return np.sum(x*x, axis=1)/4000 - np.prod(cs, axis=1) + 1
+
+def katsuura_batch(x):
+    x = 0.05 * x
+    nx = x.shape[1]
+    pw = 10/(nx**1.2)
+    tj = 2**np.arange(start=1, stop=33, step=1)
+    tjx = tj*x[:,:,None]
+    tsm = np.sum(np.abs(tjx - np.round(tjx)) / tj, axis=2)
+    prd = np.prod((1 + np.arange(1, nx+1)*tsm)**pw, axis=1)
+    df = 10/(nx*nx)
+    return df*prd - df
+
+def happy_cat_batch(x):
+    x = (0.05 * x) - 1
+    nx = x.shape[1]
+    sm = np.sum(x, axis=1)
+    smsq = np.sum(x*x, axis=1)
+    return (np.abs(smsq - nx))**0.25 + (0.5*smsq + sm)/nx + 0.5
+
+def h_g_bat_batch(x):
+    x = (0.05 * x) - 1
+    nx = x.shape[1]
+    sm = np.sum(x, axis=1)
+    smsq = np.sum(x*x, axis=1)
+    return (np.abs(smsq*smsq - sm*sm))**0.5 + (0.5*smsq + sm)/nx + 0.5
+
+def expanded_griewanks_plus_rosenbrock_batch(x):
+    x = (0.05 * x) + 1
+    tmp1 = x[:,:-1]*x[:,:-1] - x[:,1:]
+    tmp2 = x[:,:-1] - 1.0
+    temp = 100*tmp1*tmp1 + tmp2*tmp2
+    sm = np.sum((temp*temp)/4000.0 - np.cos(temp) + 1, axis=1)
+    # Note: the scalar version adds the wrap-around term (last, first) once per
+    # loop iteration, it is kept here for consistency
+    tmp1 = x[:,-1]*x[:,-1] - x[:,0]
+    tmp2 = x[:,-1] - 1
+    temp = 100.0*tmp1*tmp1 + tmp2*tmp2
+    return sm + (x.shape[1]-1)*((temp*temp)/4000.0 - np.cos(temp) + 1.0)
+
+def schaffers_f7_batch(x):
+    nx = x.shape[1]
+    si = (x[:,:-1]*x[:,:-1] + x[:,1:]*x[:,1:])**0.5
+    tmp = np.sin(50.0*(si**0.2))
+    sm = np.sum((si**0.5) * (tmp*tmp + 1), axis=1)
+    return (sm*sm) / (nx*nx - 2*nx + 1)
+
+# maps every basic function to its vectorized version
+batch_functions = {
+    bent_cigar: bent_cigar_batch,
+    sum_diff_pow: sum_diff_pow_batch,
+    zakharov: zakharov_batch,
+    rosenbrock: rosenbrock_batch,
+    rastrigin: rastrigin_batch,
+    expanded_schaffers_f6: expanded_schaffers_f6_batch,
+    lunacek_bi_rastrigin: lunacek_bi_rastrigin_batch,
+    non_cont_rastrigin: non_cont_rastrigin_batch,
+    levy: levy_batch,
+    modified_schwefel: modified_schwefel_batch,
+    high_conditioned_elliptic: high_conditioned_elliptic_batch,
+    discus: discus_batch,
+    ackley: ackley_batch,
+    weierstrass: weierstrass_batch,
+    griewank: griewank_batch,
+    katsuura: katsuura_batch,
+    happy_cat: happy_cat_batch,
+    h_g_bat: h_g_bat_batch,
+    expanded_griewanks_plus_rosenbrock: expanded_griewanks_plus_rosenbrock_batch,
+    schaffers_f7: schaffers_f7_batch
+}
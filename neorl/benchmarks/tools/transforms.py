@@ -18,55 +18,122 @@ import numpy as np
 import pickle
 import os
 
-#print(os.path.join(os.path.dirname(__file__), 'data.pkl'))
+# The CEC2017 data is loaded lazily: nothing is read when this module is imported,
+# and each table is only read for the dimensions that are actually accessed. If the
+# per-array ``.npy`` files of ``cec17/`` exist (see ``export_npy``), they are
+# memory-mapped, otherwise the arrays are taken from ``data.pkl`` (unpickled once,
+# on the first access).
 
-with open(os.path.join(os.path.dirname(__file__), 'data.pkl'), 'rb') as _pkl_file:
-    _pkl = pickle.load(_pkl_file)
+_path = os.path.dirname(__file__)
+_npy_path = os.path.join(_path, 'cec17')
+_pkl = None
+
+def _load(key):
+    #"""
+    #Load one array of the CEC2017 data
+    #:param key (str): name of the array in data.pkl (e.g. M_D10)
+    #"""
+    global _pkl
+    npy_file = os.path.join(_npy_path, key + '.npy')
+    if os.path.exists(npy_file):
+        return np.load(npy_file, mmap_mode='r')
+    if _pkl is None:
+        with open(os.path.join(_path, 'data.pkl'), 'rb') as _pkl_file:
+            _pkl = pickle.load(_pkl_file)
+    return _pkl[key]
+
+class _LazyTable(dict):
+    #"""
+    #A {dimension: array} table, the array of a dimension is loaded on its first access
+    #"""
+    def __init__(self, keys):
+        super().__init__()
+        self._keys = keys
+
+    def __missing__(self, nx):
+        value = _load(self._keys[nx])   #KeyError for undefined dimensions
+        self[nx] = value
+        return value
+
+    def __contains__(self, nx):
+        return nx in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return self._keys.keys()
 
 # Each has shape (20, N, N) containing an N-dimensional rotation matrix
 # for functions f1 to f20
-rotations = {
-    2: _pkl['M_D2'],
-    10: _pkl['M_D10'],
-    20: _pkl['M_D20'],
-    30: _pkl['M_D30'],
-    50: _pkl['M_D50'],
-    100: _pkl['M_D100']
-}
+rotations = _LazyTable({
+    2: 'M_D2',
+    10: 'M_D10',
+    20: 'M_D20',
+    30: 'M_D30',
+    50: 'M_D50',
+    100: 'M_D100'
+})
 
 # Each has shape (10, 10, N, N) containing 10 N-dimensional rotation matrices
 # for functions f21 to f30
-rotations_cf = {
-    2: _pkl['M_cf_d2'],
-    10: _pkl['M_cf_D10'],
-    20: _pkl['M_cf_D20'],
-    30: _pkl['M_cf_D30'],
-    50: _pkl['M_cf_D50'],
-    100: _pkl['M_cf_D100']
-}
-
-# Shape (20, 100)
-# Contains 100-dimension shift vectors for functions f1 to f20
-shifts = _pkl['shift']
-
-# Shape (10, 10, 100)
-# Contains 10 100-dimension shift vectors for functions f21 to f30
-shifts_cf = _pkl['shift_cf']
+rotations_cf = _LazyTable({
+    2: 'M_cf_d2',
+    10: 'M_cf_D10',
+    20: 'M_cf_D20',
+    30: 'M_cf_D30',
+    50: 'M_cf_D50',
+    100: 'M_cf_D100'
+})
 
 # Each has shape (10, N) containing N-dimensional permutations for functions f11
 # to f20 (note: the original were 1-indexed, these are 0-indexed)
-shuffles = {
-    10: _pkl['shuffle_D10'],
-    30: _pkl['shuffle_D30'],
-    50: _pkl['shuffle_D50'],
-    100: _pkl['shuffle_D100']
-}
+shuffles = _LazyTable({
+    10: 'shuffle_D10',
+    30: 'shuffle_D30',
+    50: 'shuffle_D50',
+    100: 'shuffle_D100'
+})
 
 # Each has shape (2, 10, N) containing 10 N-dimensional permutations for
 # functions f29 and f30 (note: the original were 1-indexed, these are 0-indexed)
-shuffles_cf = {
-    10: _pkl['shuffle_cf_D10'],
-    30: _pkl['shuffle_cf_D30'],
-    50: _pkl['shuffle_cf_D50'],
-    100: _pkl['shuffle_cf_D100']
-}
+shuffles_cf = _LazyTable({
+    10: 'shuffle_cf_D10',
+    30: 'shuffle_cf_D30',
+    50: 'shuffle_cf_D50',
+    100: 'shuffle_cf_D100'
+})
+
+# shifts: shape (20, 100)
+# Contains 100-dimension shift vectors for functions f1 to f20
+# shifts_cf: shape (10, 10, 100)
+# Contains 10 100-dimension shift vectors for functions f21 to f30
+_shift_keys = {'shifts': 'shift', 'shifts_cf': 'shift_cf'}
+
+def __getattr__(name):
+    #load the shift vectors on their first access
+    if name in _shift_keys:
+        value = _load(_shift_keys[name])
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def export_npy(path=None):
+    """
+    This function splits ``data.pkl`` into one ``.npy`` file per array and dimension,
+    which are then memory-mapped by this module instead of unpickling the whole data.
+
+    :param path: (str) output directory, default is the ``cec17`` folder next to ``data.pkl``
+    """
+    path = _npy_path if path is None else path
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(_path, 'data.pkl'), 'rb') as _pkl_file:
+        data = pickle.load(_pkl_file)
+    for key, value in data.items():
+        np.save(os.path.join(path, key + '.npy'), np.asarray(value))
+
+if __name__ == '__main__':
+    export_npy()
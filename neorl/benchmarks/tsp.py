@@ -28,7 +28,6 @@
 import gym
 from gym.spaces import Discrete, Box, MultiDiscrete
 import numpy as np
-import bisect
 import copy
 import matplotlib.pyplot as plt
 import random
@@ -49,25 +48,24 @@ class TSP(gym.Env):
     self.city_clost_to_each_other_for_helperfunc = {}
     self.number_of_cities = len(city_loc_list)
     self.state = - 10**6.0 * np.ones((self.number_of_cities,4), dtype = float) # initialize the state space with a single number 
+    # precompute the distance matrix once, the tour costs and insertion costs are read from it
+    self.coords = np.array([[loc[0], loc[1]] for loc in city_loc_list], dtype = float)
+    self.dist = np.sqrt(np.sum(np.power(self.coords[:,None,:] - self.coords[None,:,:],2), axis = 2))
+    self.dist_int = np.rint(self.dist).astype(np.int64) # each edge of a tour is rounded to the nearest integer
+    origin = np.sqrt(np.sum(np.power(self.coords,2), axis = 1))
+    # nearest neighbor index: the other cities of each city sorted by distance (ties: largest id first)
+    ids = np.broadcast_to(np.arange(self.number_of_cities), self.dist.shape)
+    order = np.lexsort((-ids, self.dist), axis = 1)
+    self.nearest = order[order != np.arange(self.number_of_cities)[:,None]].reshape(self.number_of_cities, -1)
+    self.nearest_dist = np.take_along_axis(self.dist, self.nearest, axis = 1)
     for i in range(len(city_loc_list)): # initialize the dictionnaries
         self.city_library["%d"%(i + 1)] = [city_loc_list[i][0],city_loc_list[i][1]]
-        loc1 = np.array([city_loc_list[i][0],city_loc_list[i][1]])
-        dist = np.sqrt(np.sum(np.power(loc1,2)))
-        self.city_dist_to_origin["%d"%(i + 1)] = dist # get the distance of each city to the origin and store it in a dictionnary
-        close_dist = []
-        i_close_dist = []
-        for index in range(0,self.number_of_cities):
-            if index != i:
-                loc2 = np.array([city_loc_list[index][0],city_loc_list[index][1]])
-                dist2 = np.sqrt(np.sum(np.power(loc1 - loc2,2)))
-                bisect.insort_left(close_dist,dist2) 
-                new_index = np.where(close_dist == dist2)[0][0]
-                i_close_dist = np.insert(i_close_dist,new_index,"%d"%(index+1))
-        self.city_clost_to_each_other["%d"%(i + 1)] = close_dist 
-        self.city_clost_to_each_other_for_helperfunc["%d"%(i + 1)] = i_close_dist #  evaluate the closest city to each city and store it in a dictionnary
+        self.city_dist_to_origin["%d"%(i + 1)] = origin[i] # get the distance of each city to the origin and store it in a dictionnary
+        self.city_clost_to_each_other["%d"%(i + 1)] = self.nearest_dist[i]
+        self.city_clost_to_each_other_for_helperfunc["%d"%(i + 1)] = self.nearest[i] + 1.0 #  evaluate the closest city to each city and store it in a dictionnary
     
     self.episode_length = episode_length # Number of tsp solved per episodes
-    self.city_id = copy.deepcopy(list(self.city_library.keys())) # list with the ids of the cities
+    self.city_id = list(self.city_library.keys()) # list with the ids of the cities
     self.city_list = [] # List representing a tour
     
     self.counter = 0 # counter to record a tour
@@ -109,32 +107,7 @@ class TSP(gym.Env):
                 action = random.randint(0,len(self.city_id) - 1)
                 new_city = self.city_id[action]
 
-            if len(np.where(self.state[:,0] != -10**6.0)[0]) != 0:
-                non_zero = np.where(self.state[:,0] != -10**6.0)[0]
-                max_cost = -10**6.0
-                for k in range(len(non_zero)): # place the city chosen in the location that reduces the partial tour
-                    temp_state_0 = copy.deepcopy(self.state[:,0])
-                    temp_state_1 = copy.deepcopy(self.state[:,1])
-                    self.state[:,0] = np.delete(np.insert(self.state[:,0],k,self.city_library[new_city][0]),-1)
-                    self.state[:,1] = np.delete(np.insert(self.state[:,1],k,self.city_library[new_city][1]),-1)
-                    temp_score = self.Compute_tour_cost()# evalaute the cost of a partial tour 
-                    if temp_score > max_cost:
-                        best_k = k
-                        max_cost = temp_score
-                    self.state[:,0] = temp_state_0
-                    self.state[:,1] = temp_state_1
-
-                # fill the state space
-                self.state[:,0] = np.delete(np.insert(self.state[:,0],best_k,self.city_library[new_city][0]),-1) 
-                self.state[:,1] = np.delete(np.insert(self.state[:,1],best_k,self.city_library[new_city][1]),-1)
-                self.state[:,2][self.counter - 1] = self.city_clost_to_each_other[new_city][0]
-                self.state[:,3][self.counter - 1] = self.city_dist_to_origin[new_city]
-
-            else: # place the first city and fill the state space
-                self.state[:,0][self.counter - 1] = self.city_library[new_city][0]
-                self.state[:,1][self.counter - 1] = self.city_library[new_city][1] 
-                self.state[:,2][self.counter - 1] = self.city_clost_to_each_other[new_city][0]
-                self.state[:,3][self.counter - 1] = self.city_dist_to_origin[new_city]
+            self._add_city(new_city) # place the city in the position that reduces the partial tour the most
 
             index1 = self.city_id.index(self.city_id[action]) # remove the city chosen by action : 'action' from the action space
             self.city_id.pop(index1)
@@ -143,13 +116,10 @@ class TSP(gym.Env):
         reward = self._get_stats()
         self.subcounter += 1 
         if self.subcounter != self.episode_length + 1: # generate the new tour
-            self.city_id = copy.deepcopy(list(self.city_library.keys()))
+            self.city_id = list(self.city_library.keys())
             individual = self.city_list
             self.city_list = []
-            self.state[:,0] = - 10**6.0 * np.ones(self.number_of_cities)
-            self.state[:,1] = - 10**6.0 * np.ones(self.number_of_cities)
-            self.state[:,2] = - 10**6.0 * np.ones(self.number_of_cities)
-            self.state[:,3] = - 10**6.0 * np.ones(self.number_of_cities)      
+            self._clear_tour()
     
     elif self.method in ['acer', 'dqn']:
         action = x
@@ -159,31 +129,7 @@ class TSP(gym.Env):
             action = random.randint(0,len(self.city_id) - 1)
             new_city = self.city_id[action]
         self.counter += 1 # --- increment the global counter
-        if len(np.where(self.state[:,0] != -10**6.0)[0]) != 0:
-            non_zero = np.where(self.state[:,0] != -10**6.0)[0]
-            max_cost = -10**6.0
-            for k in range(len(non_zero)): # place the city chosen in the location that reduces the partial tour
-                temp_state_0 = copy.deepcopy(self.state[:,0])
-                temp_state_1 = copy.deepcopy(self.state[:,1])
-                self.state[:,0] = np.delete(np.insert(self.state[:,0],k,self.city_library[new_city][0]),-1)
-                self.state[:,1] = np.delete(np.insert(self.state[:,1],k,self.city_library[new_city][1]),-1)
-                temp_score = self.Compute_tour_cost()# evalaute the cost of a partial tour 
-                if temp_score > max_cost:
-                    best_k = k
-                    max_cost = temp_score
-                self.state[:,0] = temp_state_0
-                self.state[:,1] = temp_state_1
-            # fill the state space
-            self.state[:,0] = np.delete(np.insert(self.state[:,0],best_k,self.city_library[new_city][0]),-1) 
-            self.state[:,1] = np.delete(np.insert(self.state[:,1],best_k,self.city_library[new_city][1]),-1)
-            self.state[:,2][self.counter - 1] = self.city_clost_to_each_other[new_city][0]
-            self.state[:,3][self.counter - 1] = self.city_dist_to_origin[new_city]
-        else:
-            self.state[:,0][self.counter - 1] = self.city_library[new_city][0]
-            self.state[:,1][self.counter - 1] = self.city_library[new_city][1] 
-            self.state[:,2][self.counter - 1] = self.city_clost_to_each_other[new_city][0]
-            self.state[:,3][self.counter - 1] = self.city_dist_to_origin[new_city]
-
+        self._add_city(new_city) # place the city in the position that reduces the partial tour the most
 
         index1 = self.city_id.index(self.city_id[action]) # remove the city chosen by action : 'action' from the action space
         self.city_id.pop(index1)
@@ -191,19 +137,15 @@ class TSP(gym.Env):
         reward = self._get_stats(flag = False#self.state = - 10**6.0 * np.ones((self.number_of_cities,4), dtype = float)
     ) * -10**3 # evaluate a partial tour. Increase the reward for it to be always bigger than a full tour
 
-        if len(np.where(self.state[:,0] == -10**6.0)[0]) == 0:# a tour is complete.
+        if len(self.tour) == self.number_of_cities:# a tour is complete.
             reward = self._get_stats()
             self.subcounter += 1
             self.counter = 0
             if self.subcounter != self.episode_length + 1: # generate the new tour 
-                self.city_id = copy.deepcopy(list(self.city_library.keys()))
+                self.city_id = list(self.city_library.keys())
                 individual = self.city_list
                 self.city_list = []
-                #self.state = - 10**6.0* * np.ones((self.number_of_cities,4), dtype = float)# reinitialize the state space
-                self.state[:,0] = - 10**6.0 * np.ones(self.number_of_cities)
-                self.state[:,1] = - 10**6.0 * np.ones(self.number_of_cities)
-                self.state[:,2] = - 10**6.0 * np.ones(self.number_of_cities)
-                self.state[:,3] = - 10**6.0 * np.ones(self.number_of_cities)
+                self._clear_tour() # reinitialize the state space
         else:
             individual = self.city_list # a tour is not complete. No individuals are return (for neorl callback function)
 
@@ -215,31 +157,42 @@ class TSP(gym.Env):
 
   def reset(self):
     self.done = False
-    self.city_id = copy.deepcopy(list(self.city_library.keys()))
-    self.state[:,0] = - 10**6.0 * np.ones(self.number_of_cities)
-    self.state[:,1] = - 10**6.0 * np.ones(self.number_of_cities)
-    self.state[:,2] = - 10**6.0 * np.ones(self.number_of_cities)
-    self.state[:,3] = - 10**6.0 * np.ones(self.number_of_cities)
+    self.city_id = list(self.city_library.keys())
+    self._clear_tour()
     return (self.state.flatten())
 
+  def _clear_tour(self):
+    self.tour = [] # indices of the cities of the partial tour, in the order of the state space
+    self.tour_cost = 0 # cost of the partial tour
+    self.state[:,:] = - 10**6.0
+
+  def _add_city(self, new_city):
+    c = int(new_city) - 1
+    m = len(self.tour)
+    if m > 0:
+        # inserting the city before position k replaces the edge (k-1, k) of the closed partial tour
+        tour = np.array(self.tour)
+        prev = np.roll(tour, 1)
+        delta = self.dist_int[prev,c] + self.dist_int[c,tour] - self.dist_int[prev,tour]
+        best_k = int(np.argmin(delta))
+        self.tour_cost += int(delta[best_k])
+    else: # place the first city
+        best_k = 0
+    self.tour.insert(best_k, c)
+    # fill the state space
+    self.state[best_k + 1:m + 1,:2] = self.state[best_k:m,:2]
+    self.state[best_k,:2] = self.coords[c]
+    self.state[:,2][m] = self.nearest_dist[c][0] if self.number_of_cities > 1 else 0.0
+    self.state[:,3][m] = self.city_dist_to_origin[new_city]
+
   def Compute_tour_cost(self, tour = None):
-    if tour is None:
-        tour = copy.deepcopy(self.state)
-    cost = 0
+    if tour is None: # cost of the partial tour, updated by each insertion
+        return - self.tour_cost
     limit_tour = np.where(tour[:,0] == -10**6.0)[0] # a tour ends with the traveling salesman circling back to the initial city
-    if len(limit_tour) > 0:
-        limit_tour = limit_tour[0] - 1
-    else:
-        limit_tour = self.number_of_cities - 1  
-    for increment in range(0,limit_tour): # compute euclidean distance from cities to cities
-        loc1 = np.array([tour[:,0][increment],tour[:,1][increment]])
-        loc2 = np.array([tour[:,0][increment + 1],tour[:,1][increment + 1]])
-        dist = np.sqrt(np.sum(np.power(loc1 - loc2,2)))
-        cost += int(round(dist))
-    loc1 = np.array([tour[:,0][limit_tour],tour[:,1][limit_tour]])
-    loc2 = np.array([tour[:,0][0],tour[:,1][0]])
-    dist = np.sqrt(np.sum(np.power(loc1 - loc2,2)))
-    cost += int(round(dist)) 
+    limit_tour = limit_tour[0] if len(limit_tour) > 0 else self.number_of_cities
+    loc = tour[:limit_tour,:2]
+    dist = np.sqrt(np.sum(np.power(loc - np.roll(loc, -1, axis = 0),2), axis = 1)) # compute euclidean distance from cities to cities
+    cost = int(np.sum(np.rint(dist)))
     score  =  - cost 
     return score    
 
@@ -26,9 +26,9 @@
 
 import random
 import numpy as np
-import joblib
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population
+from neorl.utils.evaluator import PoolEvaluator
 
 class ACO(object):
     """
@@ -111,21 +111,23 @@ class ACO(object):
                 vec_new.append(vec[i])
         return np.array(vec_new)
                       
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the ACO algorithm for number of generations
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial individuals of the population
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and list of fitness history)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         if x0:
             assert len(x0) == self.nants, '--error: the length of x0 ({}) (initial population) must equal to number of ants ({})'.format(len(x0), self.nants)
-            pops = Populations(self.nants, self.nvars, self.fit, self.bounds, ncores=self.ncores, x0=x0)
+            pops = Populations(self.nants, self.nvars, self.fit, self.bounds, ncores=self.ncores, x0=x0, evaluator=self.evaluator)
         else:
-            pops = Populations(self.nants, self.nvars, self.fit, self.bounds, ncores=self.ncores, x0=None)
+            pops = Populations(self.nants, self.nvars, self.fit, self.bounds, ncores=self.ncores, x0=None, evaluator=self.evaluator)
             
         fit_hist=[]
         self.history = {'local_fitness':[], 'global_fitness':[], 'last_pop':[]}
@@ -163,8 +165,7 @@ class ACO(object):
                 
             # Evaluation     
             if self.ncores > 1:
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    temp_fitness=parallel(joblib.delayed(self.fit)(indv.position) for indv in self.__new_pops)
+                temp_fitness=self.evaluator.map(self.fit, [indv.position for indv in self.__new_pops])
                 for i in range(self.nants):
                     self.__new_pops[i].cost_function = temp_fitness[i]
             else:
@@ -220,6 +221,9 @@ class ACO(object):
         self.history['last_pop'] = get_population(self.last_pop, self.last_fit)
         if self.mode=='max':
             self.history['last_pop']['fitness'] *= -1
+        
+        if evaluator is None:
+            self.evaluator.close()
             
         return self.x_best, self.y_best, self.history
     
@@ -287,13 +291,14 @@ class Populations(object):
     #"""
     #Specifies Populations of the Ant Colony i.e. the Archive Size
     #"""
-    def __init__(self, n_pop, n_vars, fit, bounds, ncores, x0=None):
+    def __init__(self, n_pop, n_vars, fit, bounds, ncores, x0=None, evaluator=None):
         #"""
         #Constructor
         #:param: n_pop: population size
         #:param: n_vars: number of variables
         #:param: cost_func_ cost function
         #:param: bounds: continious domain lower/upper bounds
+        #:param: evaluator: PoolEvaluator for parallel evaluation
         #"""
         self.fit=fit
         self.bounds = bounds
@@ -302,6 +307,7 @@ class Populations(object):
         self.pops_sorted = None
         self.x0=x0
         self.ncores=ncores
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=ncores)
         
     def __initializePopulation(self):
         #"""
@@ -324,8 +330,7 @@ class Populations(object):
                 position.append(np.array(self.x0[i]))
 
         if self.ncores > 1:
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                cost=parallel(joblib.delayed(self.fit)(indv) for indv in position)                
+            cost=self.evaluator.map(self.fit, position)
         else:
             cost=[]
             for i in range(self.npop):
@@ -22,11 +22,11 @@
 import random
 import numpy as np
 import math
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 #Main reference of the BAT algorithm:
 #Xie, J., Zhou, Y., & Chen, H. (2013). A novel bat algorithm based on 
@@ -51,10 +51,11 @@ class BAT(object):
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors (must be ``<= nbats``)
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     def __init__(self, mode, bounds, fit, nbats=50, fmin=0, 
                  fmax=1, A=0.5, r0=0.5, alpha=1.0, gamma=0.9, 
-                 levy='False', int_transform='nearest_int', ncores=1, seed=None):
+                 levy='False', int_transform='nearest_int', ncores=1, seed=None, vectorized=False):
         
         set_neorl_seed(seed)
         
@@ -107,6 +108,9 @@ class BAT(object):
         self.dim = len(bounds)
         self.lb=np.array([self.bounds[item][1] for item in self.bounds])
         self.ub=np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
 
     def init_sample(self, bounds):
         #sample initializer
@@ -130,10 +134,10 @@ class BAT(object):
         for case in range (0, position_array.shape[0]):
             core_lst.append(position_array[case, :])
     
-        if self.ncores > 1:
-
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in core_lst)
+        if self.vectorized:
+            fitness_lst=self.fit_batch(core_lst)
+        elif self.ncores > 1:
+            fitness_lst=self.evaluator.map(self.fit_worker, core_lst)
                 
         else:
             fitness_lst=[]
@@ -170,7 +174,14 @@ class BAT(object):
                 
         return vec_new
     
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
+
         #This worker is for parallel calculations
         
         # Clip the bat with position outside the lower/upper bounds and return same position
@@ -224,16 +235,18 @@ class BAT(object):
         step = np.divide(u, zz)
         return step
 
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the BAT algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) initial position of the bats (must be of same size as ``nbats``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
 		
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.history = {'local_fitness':[], 'global_fitness':[], 'A': [], 'r': []}
         self.fbest=float("inf")
         self.verbose=verbose
@@ -383,4 +396,7 @@ class BAT(object):
         else:
             self.history['last_pop'] = get_population(self.last_pop, fits=self.last_fit, grid_flag=False)
             
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.bat_correct, self.fitness_best_correct, self.history
\ No newline at end of file
@@ -24,11 +24,11 @@ import random
 import numpy as np
 import math
 import time
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 class CS(object):
     """
@@ -43,8 +43,9 @@ class CS(object):
     :param int_transform: (str) method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors (must be ``<= ncuckoos``)
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
-    def __init__(self, mode, bounds, fit, ncuckoos=15, pa=0.25, int_transform='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, ncuckoos=15, pa=0.25, int_transform='nearest_int', ncores=1, seed=None, vectorized=False):
         
         set_neorl_seed(seed)
         assert ncores <= ncuckoos, '--error: ncores ({}) must be less than or equal than ncuckoos ({})'.format(ncores, ncuckoos)
@@ -85,6 +86,9 @@ class CS(object):
         self.dim = len(bounds)
         self.lb=np.array([self.bounds[item][1] for item in self.bounds])
         self.ub=np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
 
     def init_sample(self, bounds):
         #"""
@@ -108,9 +112,10 @@ class CS(object):
         if newnest is None:
             for case in range (0, self.Positions.shape[0]):
                 core_lst.append(self.Positions[case, :])
-            if self.ncores > 1:
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    fitness_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in core_lst)
+            if self.vectorized:
+                fitness_lst=self.fit_batch(core_lst)
+            elif self.ncores > 1:
+                fitness_lst=self.evaluator.map(self.fit_worker, core_lst)
             else:
                 fitness_lst=[]
                 for item in core_lst:
@@ -118,9 +123,10 @@ class CS(object):
         else:# fitness of new cuckoo versus old cuckoo must also be compared. newnest are the new cuckoos
             for case in range (0, newnest.shape[0]):
                 core_lst.append(newnest[case, :])
-            if self.ncores > 1:
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    fitness_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in core_lst)
+            if self.vectorized:
+                fitness_lst=self.fit_batch(core_lst)
+            elif self.ncores > 1:
+                fitness_lst=self.evaluator.map(self.fit_worker, core_lst)
             else:
                 fitness_lst=[]
                 for item in core_lst:
@@ -150,7 +156,14 @@ class CS(object):
                 vec_new.append(vec[i])
         return vec_new
 
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
+
         #This worker is for parallel calculations
         # Clip the cuckoo with position outside the lower/upper bounds and return same position
         x=self.ensure_bounds(x)
@@ -210,16 +223,18 @@ class CS(object):
          
         return tempnest
         
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the CS algorithm for number of generations
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) initial position of the cuckoos (must be of same size as ``ncuckoos``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.history = {'local_fitness':[], 'global_fitness':[]}
         self.best_fitness=float("inf") 
         self.verbose=verbose
@@ -341,4 +356,7 @@ class CS(object):
             print('Best individual (x) found:', self.cuckoo_correct)
             print('--------------------------------------------------------------') 
     
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.cuckoo_correct, self.fitness_best_correct, self.history
\ No newline at end of file
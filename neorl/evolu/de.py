@@ -18,11 +18,11 @@
 
 import random
 import numpy as np
-import joblib 
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 class DE:
     """
@@ -37,9 +37,10 @@ class DE:
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     def __init__ (self, mode, bounds, fit, npop=50, F=0.5, CR=0.3, 
-                  int_transform='nearest_int', ncores=1, seed=None, **kwargs):  
+                  int_transform='nearest_int', ncores=1, seed=None, vectorized=False, **kwargs):  
 
         self.seed=seed
         set_neorl_seed(self.seed)
@@ -97,26 +98,23 @@ class DE:
         self.dim = len(bounds)
         self.lb=[self.bounds[item][1] for item in self.bounds]
         self.ub=[self.bounds[item][2] for item in self.bounds]
+        self.int_mask=(self.var_type == 'int')
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
         
     def ensure_bounds(self, vec):
-    
-        vec_new = []
-        # cycle through each variable in vector 
-        for i, (key, val) in enumerate(self.bounds.items()):
-    
-            # variable exceedes the minimum boundary
-            if vec[i] < self.bounds[key][1]:
-                vec_new.append(self.bounds[key][1])
-    
-            # variable exceedes the maximum boundary
-            if vec[i] > self.bounds[key][2]:
-                vec_new.append(self.bounds[key][2])
-    
-            # the variable is fine
-            if self.bounds[key][1] <= vec[i] <= self.bounds[key][2]:
-                vec_new.append(vec[i])
-            
-        return vec_new
+        #"""
+        #Clips an individual or a whole population (2-D array) to the lower/upper bounds
+        #"""
+        return np.clip(vec, self.lb, self.ub)
+
+    def to_individual(self, vec):
+        #"""
+        #Converts a row of the population array to a list individual, 
+        #int (and encoded grid) attributes are returned as python int
+        #"""
+        return [int(round(vec[i])) if self.int_mask[i] else float(vec[i]) for i in range(self.dim)]
 
     def GenIndv(self, bounds):
         #"""
@@ -163,10 +161,16 @@ class DE:
         
         return pop
 
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
 
-        # Clip the wolf with position outside the lower/upper bounds and return same position
-        x=self.ensure_bounds(x)
+        # Clip the individual outside the lower/upper bounds and return same position
+        x=self.to_individual(self.ensure_bounds(x))
         
         if self.grid_flag:
             #decode the individual back to the int/float/grid mixed space
@@ -208,119 +212,109 @@ class DE:
         rl_indices=random.sample(range(self.RLdata.shape[0]),self.npop_rl)
         for i, idx in  enumerate(worst_index):
             #print(pop[idx], fit_lst[idx])
-            pop[idx] = list(self.RLdata[rl_indices[i],:])
+            pop[idx] = self.RLdata[rl_indices[i],:]
+            self.fitness[idx] = np.nan   #the RL individual is evaluated in the next generation
         
         return pop
 
+    def sample_donors(self):
+        #"""
+        #Draws three distinct random indices for every individual, all different from the individual itself
+        
+        #Return:
+        #idx - integer array of shape (npop, 3)
+        #"""
+        rows=np.arange(self.npop)
+        idx=np.empty((self.npop, 3), dtype=int)
+        for k in range(3):
+            col=np.random.randint(0, self.npop, self.npop)
+            bad=(col == rows) | np.any(idx[:, :k] == col[:, None], axis=1)
+            while bad.any():   #redraw the few collisions only
+                col[bad]=np.random.randint(0, self.npop, bad.sum())
+                bad=(col == rows) | np.any(idx[:, :k] == col[:, None], axis=1)
+            idx[:, k]=col
+        
+        return idx
+
     
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the DE algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial individuals of the population
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and a list of fitness history)
         """        
         set_neorl_seed(self.seed)
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.de_hist={}
         #--- INITIALIZE the population
         
         if x0:
             assert len(x0) == self.npop, '--error: the length of x0 ({}) (initial population) must equal to number of individuals npop ({})'.format(len(x0), self.npop)
-            self.population = self.InitPopulation(x0=x0, verbose=verbose)
+            self.population = np.array(self.InitPopulation(x0=x0, verbose=verbose), dtype=float)
         else:
-            self.population = self.InitPopulation(verbose=verbose)
-                
+            self.population = np.array(self.InitPopulation(verbose=verbose), dtype=float)
+        
+        #fitness of the population members (nan = not evaluated yet), targets are never re-evaluated
+        self.fitness=np.full(self.npop, np.nan)
+        # b decreases linearly with the individual index, for discrete mutation
+        b_lst=[1 - j * ((1) / ngen) for j in range(self.npop)]
+        
         # loop through all generations
         self.best_scores=[]
         for gen in range(1,ngen+1):
             
-            #print(population)
-            gen_scores = [] # score keeping
+            #-----------------------------
+            #Mutation (rand/1)
+            #-----------------------------
+            # three random vectors for each target, all different from the target
+            idx=self.sample_donors()
+            v_donor=self.population[idx[:,0]] + self.F * (self.population[idx[:,1]] - self.population[idx[:,2]])
+            v_donor=self.ensure_bounds(v_donor)
             
-            x_t_lst=[]
-            v_trial_lst = []
+            #-----------------------------
+            #Recombination (binomial)
+            #-----------------------------
+            crossover=np.random.random((self.npop, self.dim)) <= self.CR
+            v_trial=np.where(crossover, v_donor, self.population)
             
-            # cycle through each individual in the population
-            for j in range(0, self.npop):
-                self.b= 1 - j * ((1) / ngen)  #mir: b decreases linearly between 1 to 0, for discrete mutation
-                #-----------------------------
-                #Mutation
-                #-----------------------------
-                # select three random vector index positions [0, popsize), not including current vector (j)
-                candidates = list(range(0, self.npop))
-                candidates.remove(j)
-                random_index = random.sample(candidates, 3)
-                            
-                x_1 = self.population[random_index[0]]
-                x_2 = self.population[random_index[1]]
-                x_3 = self.population[random_index[2]]
-                x_t = self.population[j]     # target individual
-    
-                # subtract x3 from x2, and create a new vector (x_diff)
-                x_diff = [x_2_i - x_3_i for x_2_i, x_3_i in zip(x_2, x_3)]
-    
-                # multiply x_diff by the mutation factor (F) and add to x_1
-                v_donor = [x_1_i + self.F * x_diff_i for x_1_i, x_diff_i in zip(x_1, x_diff)]
-                v_donor = self.ensure_bounds(v_donor) #XXX check this line
-    
-                #-----------------------------
-                #Recombination
-                #-----------------------------
-    
-                v_trial = []
-                for k in range(len(x_t)):
-                    crossover = random.random()
-                    if crossover <= self.CR:
-                        v_trial.append(v_donor[k])
-    
-                    else:
-                        v_trial.append(x_t[k])
-                
-                x_t=self.ensure_discrete(x_t)
-                v_trial=self.ensure_discrete(v_trial)
-                
-                x_t_lst.append(x_t)
-                v_trial_lst.append(v_trial)
+            if self.int_mask.any():
+                for j in range(self.npop):
+                    self.b=b_lst[j]  #mir: b decreases linearly between 1 to 0, for discrete mutation
+                    v_trial[j]=self.ensure_discrete(v_trial[j])
             
             #--------------------------------
-            #paralell evaluation
+            #Evaluation: all trials + the targets without a known fitness
             #--------------------------------
-            if self.ncores > 1:
-
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    score_trial_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in v_trial_lst)
-                    score_target_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in x_t_lst)
-                    
+            stale=np.isnan(self.fitness)
+            x_eval=np.vstack((v_trial, self.population[stale]))
+            if self.vectorized:
+                scores=self.fit_batch(x_eval)
             else:
-                score_trial_lst=[]
-                score_target_lst=[]
-                for item in v_trial_lst:
-                    score_trial_lst.append(self.fit_worker(item))  
-                for item in x_t_lst:
-                    score_target_lst.append(self.fit_worker(item))  
+                scores=self.evaluator.map(self.fit_worker, list(x_eval))
+            scores=np.array(scores, dtype=float)
+            score_trial=scores[:self.npop]
+            self.fitness[stale]=scores[self.npop:]
             
             #-----------------------------
             #Selection
             #-----------------------------
-            index=0
-            for (score_trial, score_target, v_trial) in zip(score_trial_lst, score_target_lst, v_trial_lst):
-                if score_trial > score_target:
-                    self.population[index] = v_trial
-                    gen_scores.append(score_trial)
-                else:
-                    gen_scores.append(score_target)
-                
-                index+=1
+            improved=score_trial > self.fitness
+            self.population[improved]=v_trial[improved]
+            self.fitness[improved]=score_trial[improved]
+            gen_scores=list(self.fitness)
             
             #-----------------------------
             #Fitness saving 
             #-----------------------------
-            gen_avg = sum(gen_scores) / self.npop                   # current generation avg. fitness
-            y_best = max(gen_scores)                                # fitness of best individual
-            x_best = self.population[gen_scores.index(max(gen_scores))]  # solution of best individual
+            best_index=int(np.argmax(self.fitness))
+            gen_avg = np.mean(self.fitness)                          # current generation avg. fitness
+            y_best = self.fitness[best_index]                        # fitness of best individual
+            x_best = self.to_individual(self.population[best_index]) # solution of best individual
             self.best_scores.append(y_best)
             
             if self.RLmode:
@@ -374,5 +368,8 @@ class DE:
             self.de_hist['global_fitness'] = np.maximum.accumulate(self.best_scores)
         
         self.de_hist['local_fitness'] = self.best_scores
+        
+        if evaluator is None:
+            self.evaluator.close()
             
         return x_best_correct, y_best_correct, self.de_hist
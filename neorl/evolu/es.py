@@ -23,12 +23,12 @@ import random
 import numpy as np
 from collections import defaultdict
 import copy
-import joblib
 from neorl.evolu.crossover import cxES2point, cxESBlend
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator
 
 class ES:
     """
@@ -187,8 +187,7 @@ class ES:
             for key in pop:
                 core_list.append(pop[key][0])
            
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness=parallel(joblib.delayed(self.fit_worker)(item) for item in core_list)
+            fitness=self.evaluator.map(self.fit_worker, core_list)
                     
             [pop[ind].append(fitness[ind]) for ind in range(len(pop))]
         
@@ -423,16 +422,18 @@ class ES:
             
         return pop
                         
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the ES algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial position of the swarm particles
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and a list of fitness history)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.es_hist={}
         self.es_hist['mean_strategy']=[]
         self.y_opt=-np.inf
@@ -457,8 +458,7 @@ class ES:
                 for key in offspring:
                     core_list.append(offspring[key][0])
 
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    fitness=parallel(joblib.delayed(self.fit_worker)(item) for item in core_list)
+                fitness=self.evaluator.map(self.fit_worker, core_list)
                     
                 [offspring[ind].append(fitness[ind]) for ind in range(len(offspring))]
                 
@@ -530,5 +530,8 @@ class ES:
         
         self.es_hist['local_fitness'] = self.best_scores
         
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.x_opt_correct, self.y_opt_correct, self.es_hist
     
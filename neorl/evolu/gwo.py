@@ -22,11 +22,11 @@
 
 import random
 import numpy as np
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 class GWO(object):
     """
@@ -39,8 +39,9 @@ class GWO(object):
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors (must be ``<= nwolves``)
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
-    def __init__(self, mode, bounds, fit, nwolves=5, int_transform ='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, nwolves=5, int_transform ='nearest_int', ncores=1, seed=None, vectorized=False):
         
         set_neorl_seed(seed)
         
@@ -84,6 +85,10 @@ class GWO(object):
         self.dim = len(bounds)
         self.lb=[self.bounds[item][1] for item in self.bounds]
         self.ub=[self.bounds[item][2] for item in self.bounds]
+        self.int_flag='int' in self.var_type
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
 
     def init_sample(self, bounds):
     
@@ -116,7 +121,14 @@ class GWO(object):
         
         return vec_new
     
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
+
         #This worker is for parallel calculations of the GWO
         
         # Clip the wolf with position outside the lower/upper bounds and return same position
@@ -156,19 +168,48 @@ class GWO(object):
         
         return vec
     
-    def evolute(self, ngen, x0=None, verbose=False, **kwargs):
+    def update_leaders(self, fitness, leaders_pos, leaders_score):
+        #"""
+        #Selects alpha, beta, and delta wolves as the three lowest fitness values 
+        #among the current wolves and the previous leaders
+
+        #Params:
+        #fitness - fitness of the current wolves
+        #leaders_pos - positions of the previous alpha, beta, and delta (3 x dim)
+        #leaders_score - fitness of the previous alpha, beta, and delta
+        
+        #Return:
+        #positions (3 x dim) and fitness (3) of the new alpha, beta, and delta
+        #"""
+        scores=np.concatenate((leaders_score, np.array(fitness, dtype=float)))
+        pos=np.vstack((leaders_pos, self.Positions))
+        top=np.argpartition(scores, 2)[:3]
+        top=top[np.argsort(scores[top], kind='stable')]
+        if np.any(scores[top][1:] == scores[top][:-1]):
+            #a wolf ties with a leader, keep only one wolf per fitness value (previous leaders first)
+            _, first=np.unique(scores, return_index=True)
+            top=first[:3]
+            if len(top) < 3:
+                return np.vstack((pos[top], np.zeros((3-len(top), self.dim)))), \
+                       np.concatenate((scores[top], [float("inf")]*(3-len(top))))
+        
+        return pos[top].copy(), scores[top]
+    
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None, **kwargs):
         """
         This function evolutes the GWO algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) initial position of the wolves (must be of same size as ``nwolves``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
         self.history = {'alpha_wolf':[], 'beta_wolf':[], 'delta_wolf': [], 'fitness':[]}
         self.fitness_best=float("inf") 
         self.verbose=verbose
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.Positions = np.zeros((self.nwolves, self.dim))
         if x0:
             assert len(x0) == self.nwolves, '--error: the length of x0 ({}) MUST equal the number of wolves in the group ({})'.format(len(x0), self.nwolves)
@@ -196,147 +237,101 @@ class GWO(object):
         Delta_pos = np.zeros(self.dim)
         Delta_score = float("inf") #GWO is built to minimize
            
-        with joblib.Parallel(n_jobs=self.ncores) as parallel:
-            
-            for l in range(0, ngen):
-                self.b= 1 - l * ((1) / ngen)  #mir: b decreases linearly between 1 to 0, for discrete mutation
-                #---------------------
-                # Fitness calcs
-                #---------------------
-                core_lst=[]
-                for case in range (0, self.Positions.shape[0]):
-                    core_lst.append(self.Positions[case, :])
-            
-                if self.ncores > 1:
-
-                    with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                        fitness=parallel(joblib.delayed(self.fit_worker)(item) for item in core_lst)
-                        
-                else:
-                    fitness=[]
-                    for item in core_lst:
-                        fitness.append(self.fit_worker(item))  
-                
-                self.last_pop=self.Positions.copy()  #for logging
-                self.last_fit=np.array(fitness)      #for logging
-                #----------------------
-                #  Update wolf scores
-                #----------------------
-                #Loop through the fitness list and update the score of alpha, beta, gamma, and omega!
-                for i, fits in enumerate(fitness):
-                    # Update Alpha, Beta, and Delta
-                    if fits < Alpha_score:
-                        Delta_score = Beta_score  # Update delta
-                        Delta_pos = Beta_pos.copy()
-                        Beta_score = Alpha_score  # Update beta
-                        Beta_pos = Alpha_pos.copy()
-                        Alpha_score = fits
-                        # Update alpha
-                        Alpha_pos = self.Positions[i, :].copy()
+        for l in range(0, ngen):
+            self.b= 1 - l * ((1) / ngen)  #mir: b decreases linearly between 1 to 0, for discrete mutation
+            #---------------------
+            # Fitness calcs
+            #---------------------
+            core_lst=[]
+            for case in range (0, self.Positions.shape[0]):
+                core_lst.append(self.Positions[case, :])
         
-                    if fits > Alpha_score and fits < Beta_score:
-                        Delta_score = Beta_score  # Update delte
-                        Delta_pos = Beta_pos.copy()
-                        Beta_score = fits  # Update beta
-                        Beta_pos = self.Positions[i, :].copy()
-        
-                    if fits > Alpha_score and fits > Beta_score and fits < Delta_score:
-                        Delta_score = fits  # Update delta
-                        Delta_pos = self.Positions[i, :].copy()
-                    
-                    #save the best of the best!!!
-                    if fits < self.fitness_best:
-                        self.fitness_best=fits
-                        self.x_best=self.Positions[i, :].copy()
-                    
+            if self.vectorized:
+                fitness=self.fit_batch(core_lst)
+            elif self.ncores > 1:
+                fitness=self.evaluator.map(self.fit_worker, core_lst)
                     
-                self.history['alpha_wolf'].append(Alpha_score)
-                self.history['beta_wolf'].append(Beta_score)
-                self.history['delta_wolf'].append(Delta_score)
-                
-                if 'a' in kwargs:
-                    assert len(kwargs["a"]) == ngen, '--error: the length of `a` in kwargs must equal to ngen'
-                    a=kwargs["a"][l]
-                else:
-                    a = 2 - l * ((2) / ngen)
-                # a decreases linearly from 2 to 0
+            else:
+                fitness=[]
+                for item in core_lst:
+                    fitness.append(self.fit_worker(item))  
+            
+            self.last_pop=self.Positions.copy()  #for logging
+            self.last_fit=np.array(fitness)      #for logging
+            #----------------------
+            #  Update wolf scores
+            #----------------------
+            #Take the three best wolves out of the current group and the previous leaders
+            (Alpha_pos, Beta_pos, Delta_pos), (Alpha_score, Beta_score, Delta_score)=self.update_leaders(
+                                                  fitness=fitness, 
+                                                  leaders_pos=np.array([Alpha_pos, Beta_pos, Delta_pos]),
+                                                  leaders_score=np.array([Alpha_score, Beta_score, Delta_score]))
+            
+            #save the best of the best!!!
+            best_index=np.argmin(fitness)
+            if fitness[best_index] < self.fitness_best:
+                self.fitness_best=fitness[best_index]
+                self.x_best=self.Positions[best_index, :].copy()
                 
-                #--------------------------------
-                # Position update loop
-                #--------------------------------
-                # Update the position of search wolves
+            self.history['alpha_wolf'].append(Alpha_score)
+            self.history['beta_wolf'].append(Beta_score)
+            self.history['delta_wolf'].append(Delta_score)
+            
+            if 'a' in kwargs:
+                assert len(kwargs["a"]) == ngen, '--error: the length of `a` in kwargs must equal to ngen'
+                a=kwargs["a"][l]
+            else:
+                a = 2 - l * ((2) / ngen)
+            # a decreases linearly from 2 to 0
+            
+            #--------------------------------
+            # Position update loop
+            #--------------------------------
+            # Update the position of search wolves (all wolves and dimensions at once)
+            leaders=np.array([Alpha_pos, Beta_pos, Delta_pos])[:, None, :]  # shape (3, 1, dim)
+            r1 = np.random.random((3, self.nwolves, self.dim))  # r1 is a random number in [0,1]
+            r2 = np.random.random((3, self.nwolves, self.dim))  # r2 is a random number in [0,1]
+            
+            A = 2 * a * r1 - a
+            # Equation (3.3)
+            C = 2 * r2
+            # Equation (3.4)
+            D = abs(C * leaders - self.Positions)
+            # Equation (3.5), for alpha, beta, and delta
+            X = leaders - A * D
+            # Equation (3.6), for alpha, beta, and delta
+            self.Positions = X.mean(axis=0)  # Equation (3.7)
+            
+            self.Positions=np.clip(self.Positions, self.lb, self.ub)
+            if self.int_flag:
                 for i in range(0, self.nwolves):
-                    for j in range(0, self.dim):
-        
-                        r1 = random.random()  # r1 is a random number in [0,1]
-                        r2 = random.random()  # r2 is a random number in [0,1]
-        
-                        A1 = 2 * a * r1 - a
-                        # Equation (3.3)
-                        C1 = 2 * r2
-                        # Equation (3.4)
-                        #print('A1=', A1,C1)
-                        D_alpha = abs(C1 * Alpha_pos[j] - self.Positions[i, j])
-                        # Equation (3.5)-part 1
-                        X1 = Alpha_pos[j] - A1 * D_alpha
-                        # Equation (3.6)-part 1
-        
-                        r1 = random.random()
-                        r2 = random.random()
-        
-                        A2 = 2 * a * r1 - a
-                        # Equation (3.3)
-                        C2 = 2 * r2
-                        # Equation (3.4)
-                        #print('A2=', A2,C2)
-                        D_beta = abs(C2 * Beta_pos[j] - self.Positions[i, j])
-                        # Equation (3.5)-part 2
-                        X2 = Beta_pos[j] - A2 * D_beta
-                        # Equation (3.6)-part 2
-        
-                        r1 = random.random()
-                        r2 = random.random()
-        
-                        A3 = 2 * a * r1 - a
-                        # Equation (3.3)
-                        C3 = 2 * r2
-                        # Equation (3.4)
-                        #print('A3=', A3,C3)
-                        D_delta = abs(C3 * Delta_pos[j] - self.Positions[i, j])
-                        # Equation (3.5)-part 3
-                        X3 = Delta_pos[j] - A3 * D_delta
-                        # Equation (3.5)-part 3
-        
-                        self.Positions[i, j] = (X1 + X2 + X3) / 3  # Equation (3.7)
-                    
-                    self.Positions[i,:]=self.ensure_bounds(self.Positions[i,:])
                     self.Positions[i, :] = self.ensure_discrete(self.Positions[i, :])
-                 
-                #--mir
-                if self.mode=='max':
-                    self.fitness_best_correct=-self.fitness_best
+             
+            #--mir
+            if self.mode=='max':
+                self.fitness_best_correct=-self.fitness_best
+            else:
+                self.fitness_best_correct=self.fitness_best
+            
+            # Print statistics
+            if self.verbose:
+                print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+                print('GWO step {}/{}, nwolves={}, Ncores={}'.format((l+1)*self.nwolves, ngen*self.nwolves, self.nwolves, self.ncores))
+                print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+                print('Best Group Fitness:', np.round(self.fitness_best_correct,6))
+                if self.grid_flag:
+                    self.wolf_decoded = decode_discrete_to_grid(self.x_best, self.orig_bounds, self.bounds_map)
+                    print('Best Group Position:', self.wolf_decoded)
                 else:
-                    self.fitness_best_correct=self.fitness_best
-                
-                # Print statistics
-                if self.verbose and i % self.nwolves:
-                    print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
-                    print('GWO step {}/{}, nwolves={}, Ncores={}'.format((l+1)*self.nwolves, ngen*self.nwolves, self.nwolves, self.ncores))
-                    print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
-                    print('Best Group Fitness:', np.round(self.fitness_best_correct,6))
-                    if self.grid_flag:
-                        self.wolf_decoded = decode_discrete_to_grid(self.x_best, self.orig_bounds, self.bounds_map)
-                        print('Best Group Position:', self.wolf_decoded)
-                    else:
-                        print('Best Group Position:', self.x_best)
-                    print('Alpha wolf Fitness:', np.round(Alpha_score,6) if self.mode == 'min' else -np.round(Alpha_score,6))
-                    print('Beta wolf Fitness:', np.round(Beta_score,6) if self.mode == 'min' else -np.round(Beta_score,6))
-                    print('Delta wolf Fitness:', np.round(Delta_score,6) if self.mode == 'min' else -np.round(Delta_score,6))
-                    print('a:', a)
-                    print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
-    
-        
-                self.history['fitness'].append(self.fitness_best)
+                    print('Best Group Position:', self.x_best)
+                print('Alpha wolf Fitness:', np.round(Alpha_score,6) if self.mode == 'min' else -np.round(Alpha_score,6))
+                print('Beta wolf Fitness:', np.round(Beta_score,6) if self.mode == 'min' else -np.round(Beta_score,6))
+                print('Delta wolf Fitness:', np.round(Delta_score,6) if self.mode == 'min' else -np.round(Delta_score,6))
+                print('a:', a)
+                print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+
+
+            self.history['fitness'].append(self.fitness_best)
 
         #mir-grid
         if self.grid_flag:
@@ -364,6 +359,9 @@ class GWO(object):
                                                      bounds=self.orig_bounds, bounds_map=self.bounds_map)
         else:
             self.history['last_pop'] = get_population(self.last_pop, fits=self.last_fit, grid_flag=False)
+        
+        if evaluator is None:
+            self.evaluator.close()
             
         return self.wolf_correct, self.fitness_best_correct, self.history
 
@@ -21,12 +21,12 @@
 
 import random
 import numpy as np
-import joblib
 from numpy import arange, dot, multiply, exp, ones, zeros, ceil
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator
 
 
 class HCLPSO(object):
@@ -114,8 +114,7 @@ class HCLPSO(object):
     
         if self.ncores > 1:
 
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in core_lst)
+            fitness_lst=self.evaluator.map(self.fit_worker, core_lst)
                 
         else:
             fitness_lst=[]
@@ -223,16 +222,18 @@ class HCLPSO(object):
                     self.obj_func_slope[i]=0
             
 
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the HCLPSO algorithm for a number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) initial position of the particles (must be of same size as ``g1 + g2``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.history = {'local_fitness':[], 'global_fitness':[], 'c1': [], 'c2': [], 'K': []}
         self.best_fitness=float("inf") 
         self.verbose=verbose
@@ -408,5 +409,8 @@ class HCLPSO(object):
             print('Best individual (x) found:', self.hclpso_correct)
             print('--------------------------------------------------------------')  
             
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.hclpso_correct, self.fitness_best_correct, self.history
 
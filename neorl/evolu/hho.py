@@ -30,12 +30,12 @@ import random
 import numpy as np
 import math
 import time
-import joblib
 import matplotlib.pyplot as plt
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 class HHO(object):
     """
@@ -48,8 +48,9 @@ class HHO(object):
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors (must be ``<= nhawks``)
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
-    def __init__(self, mode, bounds, fit, nhawks, int_transform='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, nhawks, int_transform='nearest_int', ncores=1, seed=None, vectorized=False):
         
         self.seed = seed
         set_neorl_seed(self.seed)
@@ -90,17 +91,22 @@ class HHO(object):
         
         self.lb = np.array([self.bounds[item][1] for item in self.bounds])
         self.ub = np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
         
-    def evolute(self, ngen, x0=None, verbose=False, **kwargs):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None, **kwargs):
         """
         This function evolutes the HHO algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) initial position of the hawks (must be of same size as ``nhawks``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         set_neorl_seed(self.seed)
 
         self.history = {'local_fitness':[], 'global_fitness':[]}
@@ -222,6 +228,9 @@ class HHO(object):
             self.history['last_pop'] = get_population(self.prev_pop, fits=self.prev_fits, grid_flag=False)
             
         
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.rabbit_correct, self.best_global_fitness, self.history
 
     def ensure_bounds(self, vec, bounds):
@@ -271,9 +280,10 @@ class HHO(object):
         #list - hawk fitnesses
         #"""
         #print(self.hawk_positions)
-        if self.ncores > 1:
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness_lst = parallel(joblib.delayed(self.fit_worker)(self.hawk_positions[i, :]) for i in range(self.nhawks))
+        if self.vectorized:
+            fitness_lst=self.fit_batch([self.hawk_positions[i, :] for i in range(self.nhawks)])
+        elif self.ncores > 1:
+            fitness_lst=self.evaluator.map(self.fit_worker, [self.hawk_positions[i, :] for i in range(self.nhawks)])
         else:
             fitness_lst = []
             for i in range(self.nhawks):
@@ -444,7 +454,14 @@ class HHO(object):
                     self.hawk_positions[hawk_index, :] = Z.copy()
                     
 
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, hawk_pos):
+        if self.vectorized:
+            return self.fit_batch([hawk_pos])[0]
+
         #"""
         #Evaluates fitness of a hawk.
 
@@ -19,11 +19,11 @@
 #"""
 import random
 import numpy as np
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 class JAYA:
     """
@@ -36,9 +36,10 @@ class JAYA:
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     
-    def __init__(self, mode, bounds, fit, npop=50, int_transform ='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, npop=50, int_transform ='nearest_int', ncores=1, seed=None, vectorized=False):
 
         self.seed=seed
         set_neorl_seed(self.seed)
@@ -82,6 +83,9 @@ class JAYA:
         self.dim = len(bounds)
         self.lb=[self.bounds[item][1] for item in self.bounds]
         self.ub=[self.bounds[item][2] for item in self.bounds]
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
         
     def gen_indv(self, bounds): # individual 
 
@@ -141,16 +145,23 @@ class JAYA:
         #Return:
         #list - pop fitnesses
         #"""
-        if self.ncores > 1:
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness_lst = parallel(joblib.delayed(self.fit_worker)(pos_array[i, :]) for i in range(self.npop))
+        if self.vectorized:
+            fitness_lst=self.fit_batch([pos_array[i, :] for i in range(self.npop)])
+        elif self.ncores > 1:
+            fitness_lst=self.evaluator.map(self.fit_worker, [pos_array[i, :] for i in range(self.npop)])
         else:
             fitness_lst = []
             for i in range(self.npop):
                 fitness_lst.append(self.fit_worker(pos_array[i, :]))
         return fitness_lst
 
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
         
         # Clip the wolf with position outside the lower/upper bounds and return same position
         # x=self.ensure_bounds(x)
@@ -187,16 +198,18 @@ class JAYA:
         
         return vec
 
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the MFO algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial individuals of the population
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and a list of fitness history)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.history = {'local_fitness':[], 'global_fitness':[]}
         N = self.npop # population size
         dim = len(self.bounds) # individual length
@@ -326,4 +339,7 @@ class JAYA:
         else:
             self.history['last_pop'] = get_population(self.last_pop, fits=self.last_fit, grid_flag=False)
         
+        if evaluator is None:
+            self.evaluator.close()
+
         return x_best_correct, y_best_correct, self.history
@@ -20,11 +20,11 @@
 import random
 import numpy as np
 import math
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 
 class MFO:
@@ -39,9 +39,10 @@ class MFO:
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     
-    def __init__(self, mode, bounds, fit, nmoths=50, b=1, int_transform='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, nmoths=50, b=1, int_transform='nearest_int', ncores=1, seed=None, vectorized=False):
 
         self.seed=seed
         set_neorl_seed(self.seed)
@@ -87,6 +88,9 @@ class MFO:
         self.dim = len(bounds)
         self.lb=np.array([self.bounds[item][1] for item in self.bounds])
         self.ub=np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
         
     def gen_indv(self, bounds): # individual 
 
@@ -144,7 +148,13 @@ class MFO:
         
         return vec_new
 
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
         
         x=self.ensure_bounds(x)
         
@@ -181,16 +191,18 @@ class MFO:
         
         return vec
 
-    def evolute(self, ngen, x0=None, verbose=False, **kwargs):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None, **kwargs):
         """
         This function evolutes the MFO algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial individuals of the population
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and a list of fitness history)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         
         self.history = {'local_fitness':[], 'global_fitness':[], 'r': []}
         self.best_fitness=float("inf")
@@ -236,9 +248,10 @@ class MFO:
             for case in range (0, Moth_pos.shape[0]):
                 core_lst.append(Moth_pos[case, :])
                     
-            if self.ncores > 1: 
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    Moth_fitness=parallel(joblib.delayed(self.fit_worker)(indv) for indv in core_lst) # 2d list
+            if self.vectorized:
+                Moth_fitness=self.fit_batch(core_lst)
+            elif self.ncores > 1:
+                Moth_fitness=self.evaluator.map(self.fit_worker, core_lst)
                 Moth_pos = np.array(Moth_pos)
                 Moth_fitness = np.array(Moth_fitness)
             else:
@@ -371,4 +384,7 @@ class MFO:
         else:
             self.history['last_pop'] = get_population(self.previous_population, fits=self.previous_fitness, grid_flag=False)
             
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.moth_correct, self.fitness_best_correct, self.history
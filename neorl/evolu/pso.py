@@ -21,11 +21,11 @@ import numpy as np
 from collections import defaultdict
 import copy
 import time
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 class PSO:
     """
@@ -40,8 +40,9 @@ class PSO:
     :param speed_mech: (str) type of speed mechanism to update particle velocity, choose between ``constric``, ``timew``, ``globw``.			
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
-    def __init__ (self, mode, bounds, fit, npar=50, c1=2.05, c2=2.05, speed_mech='constric', ncores=1, seed=None):  
+    def __init__ (self, mode, bounds, fit, npar=50, c1=2.05, c2=2.05, speed_mech='constric', ncores=1, seed=None, vectorized=False):  
 
         set_neorl_seed(seed)
         
@@ -99,6 +100,9 @@ class PSO:
         
         self.low = np.array([self.bounds[item][1] for item in self.bounds])
         self.up = np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
                         
     def GenParticle(self, bounds):
         #"""
@@ -143,7 +147,14 @@ class PSO:
             
         return vec_new
     
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.low, self.up)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
+
         #"""
         #Evaluates fitness of an individual.
         #"""
@@ -203,13 +214,15 @@ class PSO:
                 pop[i].append(speed)
         
         #Evaluate the swarm
-        if self.ncores > 1:  #evaluate swarm in parallel
+        if self.vectorized or self.ncores > 1:  #evaluate swarm in parallel
             core_list=[]
             for particle in pop:
                 core_list.append(pop[particle][0])
 
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness=parallel(joblib.delayed(self.fit_worker)(item) for item in core_list)
+            if self.vectorized:
+                fitness=self.fit_batch(core_list)
+            else:
+                fitness=self.evaluator.map(self.fit_worker, core_list)
                 
             [pop[particle].append(fitness[particle]) for particle in range(len(pop))]
         
@@ -355,16 +368,18 @@ class PSO:
     
         return offspring
 
-    def evolute(self, ngen, x0=None, verbose=False, **kwargs):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None, **kwargs):
         """
         This function evolutes the PSO algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial position of the swarm particles
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and a list of fitness history)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.pso_hist={}
         self.pso_hist['mean_speed']=[]
         self.best_scores=[]
@@ -394,14 +409,16 @@ class PSO:
             #Parallel: Evaluate the particles 
             # with multiprocessign Pool
             #***************************
-            if self.ncores > 1:
+            if self.vectorized or self.ncores > 1:
                 t0=time.time()
                 core_list=[]
                 for key in offspring:
                     core_list.append(offspring[key][0])
 
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    fitness=parallel(joblib.delayed(self.fit_worker)(item) for item in core_list)
+                if self.vectorized:
+                    fitness=self.fit_batch(core_list)
+                else:
+                    fitness=self.evaluator.map(self.fit_worker, core_list)
                 
                 self.partime=time.time()-t0
                 #print('PSO:', self.partime)
@@ -519,4 +536,7 @@ class PSO:
         
         self.pso_hist['local_fitness'] = self.best_scores
                 
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.swm_pos_correct, self.swm_fit_correct, self.pso_hist
@@ -23,11 +23,11 @@ import random
 import math
 import numpy as np
 import copy
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator
 
 class SA:
     """
@@ -36,7 +36,7 @@ class SA:
     :param mode: (str) problem type, either ``min`` for minimization problem or ``max`` for maximization
     :param bounds: (dict) input parameter type and lower/upper bounds in dictionary form. Example: ``bounds={'x1': ['int', 1, 4], 'x2': ['float', 0.1, 0.8], 'x3': ['float', 2.2, 6.2]}``
     :param fit: (function) the fitness function 
-    :param cooling: (str) cooling schedule, choose ``fast``, ``boltzmann``, ``cauchy``,``equilibrium``. The ``equilibrium`` mode is only valid with ``ncores > 1`` (See **Notes** below)
+    :param cooling: (str) cooling schedule, choose ``fast``, ``boltzmann``, ``cauchy``,``equilibrium``, ``tempering``. The ``equilibrium`` and ``tempering`` modes are only valid with ``ncores > 1`` (See **Notes** below)
     :param chain_size: (int) number of individuals to evaluate in the chain every generation (e.g. like ``npop`` for other algorithms)
     :param Tmax: (int) initial/maximum temperature
     :param Tmin: (int) final/minimum temperature
@@ -48,12 +48,13 @@ class SA:
     :param lmbda: (float) ONLY used if ``cooling = equilibrium``, control the cooling rate, and the speed at which the algorithm converges.
     :param alpha: (float) ONLY used if ``cooling = equilibrium``, control the initial temperature of the cooling schedule.
     :param threshold: (float) ONLY used if ``cooling = equilibrium``. The threshold (in %) for the acceptance rate of solution under which the algorithm stops running. 
+    :param nspec: (int) number of candidate moves proposed by a chain at every step and evaluated in one parallel batch (speculative annealing), ``nspec=1`` evaluates one move at a time (See **Notes** below)
     :param ncores: (int) number of parallel processors (``ncores > 1`` is required for ``cooling = equilibrium``)
     :param seed: (int) random seed for sampling
     """
     def __init__ (self, mode, bounds, fit, cooling='fast', chain_size=10,  
                   Tmax=10000, Tmin=1, chi=0.1, move_func=None, reinforce_best='soft', 
-                  lmbda = 1.5, alpha = 1.5, threshold = 10 ,ncores=1, seed=None):  
+                  lmbda = 1.5, alpha = 1.5, threshold = 10, nspec=1, ncores=1, seed=None):  
 
         set_neorl_seed(seed)
         
@@ -74,6 +75,8 @@ class SA:
         self.ncores=ncores
         self.npop=chain_size
         self.threshold = threshold
+        assert nspec >= 1, '--error: nspec ({}) must be more than or equal 1'.format(nspec)
+        self.nspec=nspec
         #assert npop % self.ncores == 0, 'The number of population (npop) to run must be divisible by ncores, {} mod {} != 0'.format(npop,self.ncores)
         self.Tmax=Tmax
         self.Tmin=Tmin
@@ -86,15 +89,19 @@ class SA:
             raise Exception ('for chi, either list of floats or scalar float are allowed')
         
         
-        assert cooling in ['fast', 'boltzmann', 'cauchy', 'equilibrium'], '--error: invalid cooling is provided'
+        assert cooling in ['fast', 'boltzmann', 'cauchy', 'equilibrium', 'tempering'], '--error: invalid cooling is provided'
         assert reinforce_best in ['soft', 'hard', None], '--error: invalid `reinforce_best` option is provided'
         
         self.cooling=cooling 
         self.equilib_deactivate=False
-        if self.cooling == 'equilibrium' and self.ncores == 1:#Paul. The equilibrium cooling is only available with multiple chains working at the same time.
-            print("-- warning: equilibrium cooling is implemented ONLY for ncores > 1. The cooling is changed to default cooling --> 'fast'")
+        if self.cooling in ['equilibrium', 'tempering'] and self.ncores == 1:#Paul. The equilibrium cooling is only available with multiple chains working at the same time.
+            print("-- warning: {} cooling is implemented ONLY for ncores > 1. The cooling is changed to default cooling --> 'fast'".format(self.cooling))
+            self.deactivated_cooling = self.cooling
             self.cooling = 'fast'
             self.equilib_deactivate=True
+        if self.cooling == 'tempering':
+            #temperature ladder of the chains, geometric from the coldest chain (Tmin) to the hottest chain (Tmax)
+            self.ladder=list(np.geomspace(Tmin, Tmax, self.ncores))
         if not self.cooling=='equilibrium':# Paul
             self.T=Tmax #initialize T
         else:
@@ -238,6 +245,68 @@ class SA:
         
         return T
     
+    def propose(self, x_prev, chi):
+        #"""
+        #This function returns a new candidate from the current state x_prev of a chain
+        #"""
+        if self.move_func is None:
+            x=self.move(x=x_prev,chi=chi)
+        else:
+            x=self.move(x=list(x_prev))  #a copy, so a move editing x in place keeps the chain state
+        
+        return self.ensure_bounds(x)  #a new list, so the chain state is never shared with other candidates
+    
+    def init_state(self, inp):
+        #"""
+        #This function returns the state of a chain from the input list of chain_object
+        #"""
+        state={'x_prev': inp[0], 'E_prev': inp[1], 'x_best': inp[0], 'E_best': inp[1], 
+               'k': inp[2], 'max_step': inp[3], 'chi': self.chi[inp[4]-1], 'T': inp[5],
+               'accepts': 0, 'rejects': 0, 'improves': 0, 'accepted_energy': []}
+        return state
+    
+    def end_state(self, state):
+        #"""
+        #This function returns the outputs of chain_object from the state of a chain
+        #"""
+        out=(state['x_prev'], state['E_prev'], state['T'], state['accepts'], state['rejects'], 
+             state['improves'], state['x_best'], state['E_best'])
+        if self.cooling == 'equilibrium':#Paul.
+            out=out + (state['accepted_energy'],)
+        return out
+    
+    def metropolis(self, state, x, E):
+        #"""
+        #This function applies the Improve/Accept/Reject test to the candidate x of energy E 
+        #at the current step of a chain, updates the chain state, and returns True if x is accepted
+        #"""
+        if self.cooling not in ['equilibrium', 'tempering']: #Paul. if updated here may not return nan in first few steps
+            state['T']=self.temp(step=state['k'])
+        
+        #SA is programmed to maximize reward
+        dE = E - state['E_prev']
+        if dE > 0: #improvement
+            state['improves'] += 1
+            accepted=True
+        else:
+            accepted=np.exp(dE/state['T']) >= random.random() #accept the state
+            
+        if accepted:
+            state['accepts'] += 1
+            state['x_prev'] = x
+            state['E_prev'] = E
+            if E > state['E_best']:
+                state['x_best'] = x
+                state['E_best'] = E
+            if self.cooling == 'equilibrium':# Paul
+                state['accepted_energy'].append(E)
+        else:
+            # Reject the new solution (maintain the current state!)
+            state['rejects'] += 1
+        state['k'] += 1
+        
+        return accepted
+    
     def chain_object(self,inp):
         #"""
         #This function is a multiprocessing object, used to be passed to Pool, that respresents 
@@ -248,70 +317,63 @@ class SA:
         #    inp[1] --> E0: initial energy of x0
         #    inp[2] --> min_step: min step to start this chain 
         #    inp[3] --> max_step: max step to terminate this chain 
-        #    inp[4] --> core_seed: seed for this chain
+        #    inp[4] --> core_seed: index of this chain
+        #    inp[5] --> T: current temperature (used by equilibrium cooling and tempering)
         #returns: 
         #    x_best, E_best: best obtained from this chain
         #    T: last temperature for this chain
         #    accepts, rejects, improves for this chain
         #"""
-        x_prev=copy.deepcopy(inp[0])
-        x_best=copy.deepcopy(x_prev)
-        E_prev=inp[1]
-        E_best=inp[1]
-        min_step=inp[2]
-        max_step=inp[3]
-        core_seed=inp[4]
+        state=self.init_state(inp)
         
         if not (self.seed is None):
-            random.seed(self.seed + core_seed)
-            np.random.seed(self.seed + core_seed)
+            #the first step (min_step) is unique for every chain and generation, so a chain does 
+            #not replay the same random numbers every generation
+            random.seed(self.seed + inp[2])
+            np.random.seed(self.seed + inp[2])
         
-        rejects=0; accepts=0; improves=0
-        k=min_step
-        
-        if self.cooling == 'equilibrium':#Paul.
-            T = copy.deepcopy(self.T)#Paul
-            accepted_energy = []#Paul
-        while k <= max_step:
-            if self.cooling != 'equilibrium': #Paul. if updated here may not return nan in first few steps
-                T=self.temp(step=k)
-                
-            if self.move_func is None:
-                x=copy.deepcopy(self.move(x=x_prev,chi=self.chi[core_seed-1]))
-            else:
-                x=copy.deepcopy(self.move(x=x_prev))
-            
-            x=self.ensure_bounds(x)
-            #SA is programmed to maximize reward
+        while state['k'] <= state['max_step']:
+            x=self.propose(state['x_prev'], state['chi'])
             E=self.fit_worker(x)
-            dE = E - E_prev        
-            #-----------------------------------
-            # Improve/Accept/Reject
-            #-----------------------------------
-            if dE > 0: #improvement
-                improves += 1
-                accepts += 1
-                x_prev = copy.deepcopy(x)
-                E_prev = E
-                if E > E_best:
-                    x_best = copy.deepcopy(x)
-                    E_best = E     
-                if self.cooling == 'equilibrium':# Paul
-                    accepted_energy.append(E)
-            elif np.exp(dE/T) >= random.random(): #accept the state
-                accepts += 1
-                x_prev = copy.deepcopy(x)
-                E_prev = E
-                if self.cooling == 'equilibrium':# Paul
-                    accepted_energy.append(E)
-            else:
-                # Reject the new solution (maintain the current state!)
-                rejects += 1
-            k+=1
-        if self.cooling == 'equilibrium':#Paul.
-            return x_prev, E_prev, T, accepts, rejects, improves, x_best, E_best,accepted_energy
-        else:
-            return x_prev, E_prev, T, accepts, rejects, improves, x_best, E_best
+            self.metropolis(state, x, E)
+            
+        return self.end_state(state)
+    
+    def spec_chains(self, core_list):
+        #"""
+        #Speculative version of chain_object, all chains are run by this process.
+        #At every step, each chain proposes ``nspec`` moves from its current state and the moves
+        #of all chains are evaluated in one parallel batch. The Metropolis test is then replayed
+        #over the moves of a chain in order, as if they were proposed one after the other. 
+        #The moves after the first accepted one were proposed from an outdated state, so they are 
+        #discarded, and the chain continues from the accepted state. Hence, the chains follow the 
+        #same Markov process as chain_object, while up to ``nspec`` steps are done per batch.
+        #Input:
+        #    core_list: list of the inputs of chain_object, one per chain
+        #returns: 
+        #    list of the outputs of chain_object, one per chain
+        #"""
+        states=[self.init_state(inp) for inp in core_list]
+        active=states
+        while active:
+            batch=[]
+            for state in active:
+                nprop=min(self.nspec, state['max_step']-state['k']+1)
+                state['props']=[self.propose(state['x_prev'], state['chi']) for j in range(nprop)]
+                batch.extend(state['props'])
+            
+            energies=self.evaluator.map(self.fit_worker, batch)
+            
+            pos=0
+            for state in active:
+                props=state.pop('props')
+                for x, E in zip(props, energies[pos:pos+len(props)]):
+                    if self.metropolis(state, x, E):
+                        break
+                pos+=len(props)
+            active=[state for state in active if state['k'] <= state['max_step']]
+            
+        return [self.end_state(state) for state in states]
         
     def chain(self, x0, E0, step0):
         #"""
@@ -331,14 +393,19 @@ class SA:
         core_step_min=step0
         for j in range(1,self.ncores+1):
             core_step_max=step0+j*self.npop-1
-            core_list.append([x0[j-1], E0[j-1], core_step_min, core_step_max, j])
+            T=self.ladder[j-1] if self.cooling == 'tempering' else self.T
+            core_list.append([x0[j-1], E0[j-1], core_step_min, core_step_max, j, T])
             core_step_min=core_step_max+1
             
         
-        if self.ncores > 1:
+        if self.nspec > 1:
+            
+            #the chains stay in this process and the evaluator runs their batches of moves
+            results=self.spec_chains(core_list)
+        elif self.ncores > 1:
 
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                results=parallel(joblib.delayed(self.chain_object)(item) for item in core_list)
+            #the chain state travels in core_list, so the workers keep the chain_object shipped once
+            results=self.evaluator.map(self.chain_object, core_list)
         else:
             results=[]
             results.append(list(self.chain_object(core_list[0])))
@@ -364,6 +431,28 @@ class SA:
         
         return self.x_last, self.E_last, self.T, self.accepts, self.rejects, self.improves, self.x_best, self.E_best
     
+    def swap(self, x, E, gen):
+        #"""
+        #This function exchanges the states of the chains of neighbor temperatures in the ladder 
+        #(replica exchange). The pairs (1,2), (3,4), ... and (2,3), (4,5), ... alternate every generation, 
+        #a swap between the chains i and j is accepted with probability min(1, exp((E_j - E_i)*(1/T_i - 1/T_j))).
+        #Inputs:
+        #    x, E: last states and energies of the chains, ordered from the coldest to the hottest chain
+        #    gen: generation number
+        #returns: 
+        #    x, E after the swaps, and the swap acceptance rate (%)
+        #"""
+        pairs=range(gen % 2, self.ncores-1, 2)
+        swaps=0
+        for i in pairs:
+            delta=(E[i+1]-E[i])*(1/self.ladder[i]-1/self.ladder[i+1])
+            if delta >= 0 or np.exp(delta) >= random.random():
+                x[i], x[i+1]=x[i+1], x[i]
+                E[i], E[i+1]=E[i+1], E[i]
+                swaps+=1
+        
+        return x, E, np.round(swaps/max(1, len(pairs))*100, 1)
+    
     def InitChains(self, x0=None):
         
         #initialize the chain and run them in parallel (these samples will be used to initialize the annealing process)
@@ -390,8 +479,7 @@ class SA:
             for ind in x0:
                 core_list.append(ind)
            
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                E0=parallel(joblib.delayed(self.fit_worker)(item) for item in core_list)
+            E0=self.evaluator.map(self.fit_worker, core_list)
             if self.cooling == 'equilibrium': # Paul
                 self.T = np.max([self.alpha * np.std(E0),self.Tmin,1e-10])
 
@@ -404,22 +492,26 @@ class SA:
 
         return x0, E0 #return initial guess and initial fitness      
     
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the SA algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) initial samples to start the evolution (``len(x0)`` must be equal to ``ncores``)
         :param verbose: (int) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         #chain statistics
         #self.accept=0
         #self.reject=0
         #self.improve=0
         
         stat={'x':[], 'fitness':[], 'T':[], 'accept':[], 'reject':[], 'improve':[]}
+        if self.cooling == 'tempering':
+            stat['swap']=[]
         E_opt=-np.inf
         
         step0=1
@@ -469,8 +561,12 @@ class SA:
                 elif np.mean(self.accepts) == 0:
                     print("--warning: The SA stopped because the average acceptance rate throughout the chain {} % reaches 0%".format(np.mean(self.accepts),self.threshold))
                     break
+            if self.cooling == 'tempering':
+                #the chains keep their temperature and exchange their states, so reinforce_best is not used
+                x_next, E_next, swap_rate=self.swap(x_next, E_next, gen=i)
+                stat['swap'].append(swap_rate)
             # Paul
-            if self.reinforce_best == 'hard':
+            elif self.reinforce_best == 'hard':
                 x_next=[x_opt]*self.ncores
                 E_next=[E_opt]*self.ncores
             elif self.reinforce_best == 'soft':
@@ -516,6 +612,9 @@ class SA:
                 print('Acceptance Rate (%):', acc)
                 print('Rejection Rate (%):', rej)
                 print('Improvment Rate (%):', imp)
+                if self.cooling == 'tempering':
+                    print('Temperature ladder:', np.round(self.ladder, 3))
+                    print('Swap Rate (%):', swap_rate)
                 print('***********************************************************************')
 
             
@@ -532,6 +631,9 @@ class SA:
             print('--------------------------------------------------------------')
 
         if self.equilib_deactivate: #Paul.
-            print("-- warning: equilibrium cooling is implemented ONLY for ncores > 1. The cooling is changed to default cooling --> 'fast'")
+            print("-- warning: {} cooling is implemented ONLY for ncores > 1. The cooling is changed to default cooling --> 'fast'".format(self.deactivated_cooling))
+        
+        if evaluator is None:
+            self.evaluator.close()
             
         return x_opt_correct, self.E_opt_correct, stat
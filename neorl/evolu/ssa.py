@@ -23,11 +23,11 @@ import random
 import numpy as np
 import math
 import time
-import joblib
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator, eval_batch
 
 
 class SSA(object):
@@ -41,8 +41,9 @@ class SSA(object):
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.
     :param ncores: (int) number of parallel processors (must be ``<= nsalps``)
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives the whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
-    def __init__(self, mode, bounds, fit, nsalps=5, int_transform='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, nsalps=5, int_transform='nearest_int', ncores=1, seed=None, vectorized=False):
         
         set_neorl_seed(seed)
         
@@ -86,6 +87,9 @@ class SSA(object):
         self.dim = len(bounds)
         self.lb=np.array([self.bounds[item][1] for item in self.bounds])
         self.ub=np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
 
     def init_sample(self, bounds):
     
@@ -110,10 +114,10 @@ class SSA(object):
         for case in range (0, self.Positions.shape[0]):
             core_lst.append(self.Positions[case, :])
     
-        if self.ncores > 1:
-
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                fitness_lst=parallel(joblib.delayed(self.fit_worker)(item) for item in core_lst)
+        if self.vectorized:
+            fitness_lst=self.fit_batch(core_lst)
+        elif self.ncores > 1:
+            fitness_lst=self.evaluator.map(self.fit_worker, core_lst)
                 
         else:
             fitness_lst=[]
@@ -150,7 +154,14 @@ class SSA(object):
             
         return vec_new
     
+    def fit_batch(self, pop):
+        #evaluate the whole population with one call of the vectorized fitness
+        return eval_batch(self.fit, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
+        if self.vectorized:
+            return self.fit_batch([x])[0]
+
         #This worker is for parallel calculations
         
         # Clip the salp with position outside the lower/upper bounds and return same position
@@ -217,7 +228,7 @@ class SSA(object):
             self.Positions = np.transpose(self.Positions)
             
 
-    def evolute(self, ngen, x0=None, c1=None, verbose=False):
+    def evolute(self, ngen, x0=None, c1=None, verbose=False, evaluator=None):
         """
         This function evolutes the SSA algorithm for number of generations.
         
@@ -226,9 +237,11 @@ class SSA(object):
         :param c1: (float/list): a scalar value or a list of values with size ``ngen`` for the coefficient that controls exploration/exploitation. 
                             If ``None``, default annealing formula for ``c1`` is used (see **Notes** below for more info).
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.history = {'local_fitness':[], 'global_fitness':[], 'c1': []}
         self.best_fitness=float("inf") 
         self.verbose=verbose
@@ -330,5 +343,8 @@ class SSA(object):
             print('Best individual (x) found:', self.salp_correct)
             print('--------------------------------------------------------------')  
             
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.salp_correct, self.fitness_best_correct, self.history
 
@@ -24,11 +24,11 @@ import random
 import numpy as np
 import joblib
 from itertools import combinations
-import copy 
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
+from neorl.utils.evaluator import PoolEvaluator
 
 class TS(object):
     """
@@ -42,23 +42,32 @@ class TS(object):
                             i.e. importance of the frequency of a certain action performed in the search. The higher the value, the least likely is an action to be performed again after
                             multiple attempts.
     :param swap_mode: (str): either "swap" for swapping two elements of the input or "perturb" to perturb each input within certain bounds (see **Notes** below)
-    :param ncores: (int) number of parallel processors (only ``ncores=1`` is supported now)
+    :param delta_fit: (function) optional function ``delta_fit(position, move)`` returning the change of the fitness when ``move`` is applied to ``position``, 
+                      which replaces the full fitness evaluation of every neighbor. ``move`` is a tuple ``(i, j)`` of the two indices of ``position`` to swap 
+                      if ``swap_mode="swap"``, or ``(i, value)`` for the new value of ``position[i]`` if ``swap_mode="perturb"`` (see **Notes** below)
+    :param ncores: (int) number of parallel processors to evaluate the neighborhood
     :param seed: (int) random seed for sampling
     """
-    def __init__(self, mode, bounds, fit, tabu_tenure=6, penalization_weight = 0.8, swap_mode = "perturb", ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, tabu_tenure=6, penalization_weight = 0.8, swap_mode = "perturb", delta_fit=None, ncores=1, seed=None):
         
         set_neorl_seed(seed)
-        assert ncores == 1,'-error: parallel implementaiton is not yet available. ncores ({}) should be equal to 1.'.format(ncores)
         #assert ncores <= len(bounds), '--error: ncores ({}) must be less than or equal than the length of an individual solution ({})'.format(ncores, len(bounds))
         
         int_transform='nearest_int'
         self.mode=mode #  mode for optimization: CS only solves a minimization problem.
         if mode == 'min':
             self.fit=fit
+            self.delta_fit=delta_fit
         elif mode == 'max':
             def fitness_wrapper(*args, **kwargs):
                 return -fit(*args, **kwargs) 
             self.fit=fitness_wrapper
+            if delta_fit is None:
+                self.delta_fit=None
+            else:
+                def delta_wrapper(*args, **kwargs):
+                    return -delta_fit(*args, **kwargs) 
+                self.delta_fit=delta_wrapper
         else:
             raise ValueError('--error: The mode entered by user is invalid, use either `min` or `max`')
           
@@ -142,6 +151,9 @@ class TS(object):
         return best_pos, best_fit 
         
     def ensure_bounds(self, vec):
+        arr=np.asarray(vec)
+        if np.all((arr >= self.lb) & (arr <= self.ub)):
+            return list(vec)  #fast path, the variable types are kept
         vec_new = []
         # cycle through each variable in vector 
         for i, (key, val) in enumerate(self.bounds.items()):
@@ -192,53 +204,97 @@ class TS(object):
 
         return vec
 
-    def UpdateTabu(self,Position, i, j):
-        #""" 
-        #Perturb the 'Position' vector with parameter i and j
-        #if swap option: swap elements
-        #if perturb option: perturb elements
+    def init_moves(self):
+        #"""
+        #Builds the list of moves of the neighborhood and the tabu structure as arrays 
+        #(one entry per move): tabu_time, freq, MoveValue, and Penalized_MV
         #"""
-        tempposition = copy.deepcopy(Position)
         if self.swap_mode == "swap":
-            # job index in the Position:
-            i_index = tempposition.index(i)
-            j_index = tempposition.index(j)
-            tempposition[i_index], tempposition[j_index] = tempposition[j_index], tempposition[i_index]# Swap
+            # a move swaps the elements of values (a, b), the permutation holds the values 1..n
+            self.moves = np.array(list(combinations(range(1,self.ntabus + 1), 2)), dtype=int).reshape(-1, 2)
         elif self.swap_mode == "perturb":
-            if self.var_type[i] == 'int':
-                tempposition[i] = random.randint(j[0],j[1])
-            elif self.var_type[i] == 'float':
-                tempposition[i] = random.uniform(j[0],j[1])
-        return tempposition
+            # a move perturbs the element l
+            self.moves = np.arange(self.ntabus)
+        nmoves = len(self.moves)
+        self.tabu_time = np.zeros(nmoves)
+        self.freq = np.zeros(nmoves)
+        self.move_value = np.zeros(nmoves)
+        self.penalized_mv = np.zeros(nmoves)
+    
+    def apply_move(self, position, m):
+        #"""
+        #Returns a copy of position with the move of index m applied, and the move in the 
+        #format of delta_fit
+        #"""
+        new_position = list(position)
+        if self.swap_mode == "swap":
+            a, b = self.moves[m]
+            i, j = self.index[a], self.index[b]
+            new_position[i], new_position[j] = new_position[j], new_position[i]  # Swap
+            return new_position, (int(i), int(j))
+        else:
+            new_position[m] = self.perturbed[m]
+            return new_position, (m, self.perturbed[m])
+        
+    def eval_neighborhood(self, fitness):
+        #"""
+        #Evaluates all moves from the current position with the fitness of the current position,
+        #either by delta_fit, or by the full fitness of the neighbors evaluated in one parallel batch
+        #"""
+        if self.swap_mode == "swap":
+            # index of every value in the current permutation, so a swap costs O(1) instead of list.index
+            self.index = np.zeros(self.ntabus + 1, dtype=int)
+            self.index[np.asarray(self.Positions, dtype=int)] = np.arange(self.ntabus)
+        elif self.swap_mode == "perturb":
+            # store the new values to avoid the problem of change in perturbation when the best move is called
+            self.perturbed = []
+            for l in range(self.ntabus):
+                if self.var_type[l] == 'int':
+                    self.perturbed.append(random.randint(self.lb[l], self.ub[l]))
+                elif self.var_type[l] == 'float':
+                    self.perturbed.append(random.uniform(self.lb[l], self.ub[l]))
+                    
+        if self.delta_fit is not None:
+            if self.swap_mode == "swap":
+                moves = zip(self.index[self.moves[:,0]].tolist(), self.index[self.moves[:,1]].tolist())
+            else:
+                moves = enumerate(self.perturbed)
+            self.move_value[:] = [self.delta_fit(self.Positions, move) for move in moves]
+            self.move_value += fitness
+        else:
+            candidates = [self.apply_move(self.Positions, m)[0] for m in range(len(self.moves))]
+            self.move_value[:] = self.evaluator.map(self.fit_worker, candidates)
+        # Penalized fitness by simply adding freq to it (minimization):
+        self.penalized_mv[:] = self.move_value + self.freq * self.penalization_weight
         
-    def evolute(self,ngen,x0=None, verbose=False):
+    def evolute(self,ngen,x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the TS algorithm for number of generations
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list) initial position of the tabu (vector size must be of same size as ``len(bounds)``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.history = {'local_fitness':[], 'global_fitness':[]}
         self.best_fitness=float("inf") 
         self.verbose=verbose
         self.Positions = np.zeros(self.dim)#np.zeros((self.ntabus, self.dim))
         if x0:
-            if self.ncores==1:  
-                if not any(isinstance(el, list) for el in x0):  #ensure a list of list is submitted for ncores=1
-                    x0=[x0]
+            if not any(isinstance(el, list) for el in x0):  #ensure a list of list is submitted
+                x0=[x0]
                     
             assert len(x0[0]) == self.ntabus, '--error: the length of individual in x0 ({}) MUST equal the size of the problem ({})'.format(len(x0[0]), self.ntabus)        
-            assert len(x0) == self.ncores, '--error: the length of x0 ({}) MUST equal the number of ncores/parallel chains ({})'.format(len(x0), self.ncores)
+            assert len(x0) == 1, '--error: the length of x0 ({}) MUST equal 1, TS runs a single tabu'.format(len(x0))
 
-            for i in range(self.ncores):
-                check_mixed_individual(x=x0[i], bounds=self.orig_bounds) #assert the type provided is consistent
-                if self.grid_flag:
-                    self.Positions = encode_grid_indv_to_discrete(x0[i], bounds=self.orig_bounds, bounds_map=self.bounds_map)
-                else:
-                    self.Positions = x0[i]
+            check_mixed_individual(x=x0[0], bounds=self.orig_bounds) #assert the type provided is consistent
+            if self.grid_flag:
+                self.Positions = encode_grid_indv_to_discrete(x0[0], bounds=self.orig_bounds, bounds_map=self.bounds_map)
+            else:
+                self.Positions = list(x0[0])
                     
         else:
             #self.Positions=self.init_sample(self.bounds)  #TODO, update later for mixed-integer optimisation
@@ -251,77 +307,48 @@ class TS(object):
 
         fitness=self.fit_worker(self.Positions) # evaluate the initial tabu
         self.best_position, self.best_fitness = self.Positions.copy(), fitness#self.select(pos = self.Positions,fit = fitness) # find the initial best position and fitness
-        current_solution = self.Positions.copy()
     
-        tabu_structure = {} # record possible the tabu memory for all possible moves
-        if self.swap_mode == "swap":
-            for swap in combinations(range(1,self.ntabus + 1), 2):
-                tabu_structure[swap] = {'tabu_time': 0, 'MoveValue': 0, 'freq': 0, 'Penalized_MV': 0}
-        elif self.swap_mode == "perturb":
-            for l in range(self.ntabus):
-                tabu_structure[l] = {'tabu_time': 0, 'MoveValue': 0, 'freq': 0, 'Penalized_MV': 0}
+        self.init_moves() # record possible the tabu memory for all possible moves
                 
         iter = 1    
         for l in range(1, ngen+1):# Main loop
             #-----------------------------
             # Performs multiple moves and evaluate the resulting tabu
             #-----------------------------
-            increment = 0 # utilize to perturb the Position vector at the 'increment'th position
-            temp_candidate = [] # store new candidate for perturbation to avoid the problem of change in perturbation when best move is called
-            for move in tabu_structure:# Searching the whole neighborhood of the current solution:
-                if self.swap_mode == "swap":
-                    candidate_solution = self.UpdateTabu(self.Positions, move[0], move[1])
-                elif self.swap_mode == "perturb":
-                    candidate_solution = self.UpdateTabu(self.Positions, increment,[self.lb[increment], self.ub[increment]])
-                    temp_candidate.append(candidate_solution)
-                    increment +=1
-                fitness = self.fit_worker(candidate_solution)
-                tabu_structure[move]['MoveValue'] = fitness
-                tabu_structure[move]['Penalized_MV'] = fitness + (tabu_structure[move]['freq'] *
-                                                                             self.penalization_weight)# Penalized fitness by simply adding freq to it (minimization):
+            self.eval_neighborhood(fitness)
             #----------------------
             #  Manipulate the tabu list
             #----------------------
-            while True:# Admissible move
-                best_move = min(tabu_structure, key =lambda x: tabu_structure[x]['Penalized_MV']) # select the move with the lowest Penalized fitness in the neighborhood (minimization)
-                MoveValue = tabu_structure[best_move]["MoveValue"]
-                tabu_time = tabu_structure[best_move]["tabu_time"]
-                if tabu_structure[best_move]['Penalized_MV'] > 1e11:# no improvement
+            for best_move in np.argsort(self.penalized_mv, kind='stable'):# Admissible move, from the lowest Penalized fitness in the neighborhood (minimization)
+                MoveValue = self.move_value[best_move]
+                if self.penalized_mv[best_move] > 1e11:# no improvement
                     break
-                if tabu_time < iter:# Not Tabu: the current move can be potentially added to the tabu list
+                if self.tabu_time[best_move] < iter:# Not Tabu: the current move can be potentially added to the tabu list
                     # make the move
-                    if self.swap_mode == "swap":
-                        self.Positions = self.UpdateTabu(self.Positions, best_move[0], best_move[1])
-                    elif self.swap_mode == "perturb":
-                        best_loc = np.argmin([tabu_structure[x]['Penalized_MV'] for x in tabu_structure.keys()])
-                        self.Positions = temp_candidate[best_loc].copy()
+                    self.Positions = self.apply_move(self.Positions, best_move)[0]
                     fitness = MoveValue#self.fit(self.Positions)
                     if MoveValue < self.best_fitness:# Best Improving move
                         self.best_position = self.Positions.copy()
                         self.best_fitness = fitness
                     # update tabu_time for the move and freq count
-                    tabu_structure[best_move]['tabu_time'] = iter + self.tabu_tenure
-                    tabu_structure[best_move]['freq'] += 1
+                    self.tabu_time[best_move] = iter + self.tabu_tenure
+                    self.freq[best_move] += 1
+                    iter += 1
+                    break
+                # If tabu
+                elif MoveValue < self.best_fitness:# Aspiration
+                    # make the move
+                    self.Positions = self.apply_move(self.Positions, best_move)[0]
+                    fitness = MoveValue
+                    self.best_position = self.Positions.copy()
+                    self.best_fitness = fitness
+                    self.freq[best_move] += 1
                     iter += 1
                     break
-                else:# If tabu
-                    # Aspiration
-                    if MoveValue < self.best_fitness:
-                        # make the move
-                        if self.swap_mode == "swap":
-                            self.Positions = self.UpdateTabu(self.Positions, best_move[0], best_move[1])
-                        elif self.swap_mode == "perturb":
-                            best_loc = np.argmin([tabu_structure[x]['Penalized_MV'] for x in tabu_structure.keys()])
-                            self.Positions = temp_candidate[best_loc].copy()
-                        fitness = self.fit_worker(self.Positions)
-                        self.best_position = self.Positions.copy()
-                        self.best_fitness = fitness
-                        tabu_structure[best_move]['freq'] += 1
-                        iter += 1
-                        break
-                    else:
-                        tabu_structure[best_move]['Penalized_MV'] = float('inf')
-                        continue
+            
+            if self.delta_fit is not None:
+                # the full fitness of the new position avoids the accumulation of round-off errors of the deltas
+                fitness = self.fit_worker(self.Positions)
             
             #----------------------
             #  Logger related portion
@@ -367,4 +394,8 @@ class TS(object):
             print('Best fitness (y) found:', self.fitness_best_correct)
             print('Best individual (x) found:', self.tabu_correct)
             print('--------------------------------------------------------------')  
+        
+        if evaluator is None:
+            self.evaluator.close()
+            
         return self.tabu_correct, self.fitness_best_correct, self.history
\ No newline at end of file
@@ -24,12 +24,12 @@ from numpy import dot, eye, asarray, array, trace, exp
 from numpy import mean, sum, argsort, arange
 from scipy.stats import multivariate_normal, norm
 from scipy.linalg import det, expm
-import joblib
 import random
 import numpy as np
 import copy
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population
+from neorl.utils.evaluator import PoolEvaluator
 
 class XNES(object):
     """
@@ -44,12 +44,14 @@ class XNES(object):
     :param eta_sigma: (float) learning rate for updating the step size ``sigma`` (default: if None, it will make an approximation, see **Notes** below)
     :param eta_Bmat: (float) learning rate for updating the normalized transformation matrix ``B``  (default: if None, it will make an approximation, see **Notes** below)
     :param adapt_sampling: (bool): activate the adaption sampling option
+    :param covariance: (str) structure of the transformation matrix ``B``: ``full`` for the full ``d x d`` matrix of XNES, ``separable`` for a diagonal matrix (SNES), or ``lowrank`` for a diagonal matrix plus ``rank`` correlated directions (see **Notes** below)
+    :param rank: (int) number of correlated directions of ``covariance='lowrank'`` (default: if None, ``max(1, int(log(d)))``)
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
     """
     def __init__(self, mode, bounds, fit, A=None, npop=None,
                  eta_mu=1.0, eta_sigma=None, eta_Bmat=None, 
-                 adapt_sampling=False, ncores=1, seed=None):
+                 adapt_sampling=False, covariance='full', rank=None, ncores=1, seed=None):
         
         set_neorl_seed(seed)
             
@@ -72,18 +74,43 @@ class XNES(object):
         self.ncores = ncores
         self.bounds=bounds
 
+        assert covariance in ['full', 'separable', 'lowrank'], '--error: covariance must be either `full`, `separable`, or `lowrank`, not {}'.format(covariance)
+        self.covariance=covariance
+        self.lower=np.array([bounds[key][1] for key in bounds], dtype=float)
+        self.upper=np.array([bounds[key][2] for key in bounds], dtype=float)
+
         dim = len(bounds)
-        A = np.eye(dim) if A is None else A
-        sigma = abs(det(A))**(1.0/dim)
-        bmat = A*(1.0/sigma)
+        if covariance == 'full':
+            A = np.eye(dim) if A is None else A
+            sigma = abs(det(A))**(1.0/dim)
+            bmat = A*(1.0/sigma)
+        else:
+            # only the diagonal of A is used, B is stored as a vector of size d
+            A = np.ones(dim) if A is None else np.asarray(A, dtype=float)
+            A = np.abs(np.diag(A)) if A.ndim == 2 else np.abs(A)
+            sigma = np.exp(mean(np.log(A)))
+            bmat = A*(1.0/sigma)
         self.dim = dim
         self.sigma = sigma
         self.bmat = bmat
+        if covariance == 'lowrank':
+            # the correlated directions start at zero and are learned from the samples
+            self.rank = max(1, int(np.log(dim))) if rank is None else rank
+            assert 1 <= self.rank < dim, '--error: rank ({}) must be between 1 and the number of parameters ({}) - 1'.format(self.rank, dim)
+            self.vmat = np.zeros((dim, self.rank))
+        else:
+            self.rank = 0
+            self.vmat = None
 
         # default population size and learning rates
         npop = int(4 + 3*np.log(dim)) if npop is None else npop
-        eta_sigma = 3*(3+np.log(dim))*(1.0/(5*dim*np.sqrt(dim))) if eta_sigma is None else eta_sigma
-        eta_Bmat = 3*(3+np.log(dim))*(1.0/(5*dim*np.sqrt(dim))) if eta_Bmat is None else eta_Bmat
+        if covariance == 'full':
+            eta_default = 3*(3+np.log(dim))*(1.0/(5*dim*np.sqrt(dim)))
+        else:
+            # the O(d) parameters of SNES are learned much faster than the d x d matrix of XNES
+            eta_default = (3+np.log(dim))*(1.0/(5*np.sqrt(dim)))
+        eta_sigma = eta_default if eta_sigma is None else eta_sigma
+        eta_Bmat = eta_default if eta_Bmat is None else eta_Bmat
         self.npop = npop
         self.eta_sigma = eta_sigma
         self.eta_bmat = eta_Bmat
@@ -133,36 +160,18 @@ class XNES(object):
                 raise Exception ('unknown data type is given, either int, float, or grid are allowed for parameter bounds')   
         return indv
     
-    def ensure_bounds(self, vec, bounds):
-    
-        vec_new = []
-        # cycle through each variable in vector 
-        for i, (key, val) in enumerate(bounds.items()):
-    
-            # variable exceedes the minimum boundary
-            if vec[i] < bounds[key][1]:
-                vec_new.append(bounds[key][1])
-    
-            # variable exceedes the maximum boundary
-            if vec[i] > bounds[key][2]:
-                vec_new.append(bounds[key][2])
-    
-            # the variable is fine
-            if bounds[key][1] <= vec[i] <= bounds[key][2]:
-                vec_new.append(vec[i])
-            
-        return vec_new
-
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the XNES algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list) initial guess for the search (must be of same size as ``len(bounds)``)
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and dictionary containing major search results)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         f = self.f
         self.verbose=verbose
         if x0:
@@ -170,96 +179,101 @@ class XNES(object):
             self.mu=x0
         else:
             self.mu=self.init_sample(self.bounds)
-        mu, sigma, bmat = self.mu, self.sigma, self.bmat
+        mu, sigma, bmat, vmat = self.mu, self.sigma, self.bmat, self.vmat
         eta_mu, eta_sigma, eta_bmat = self.eta_mu, self.eta_sigma, self.eta_bmat
         npop = self.npop
         dim = self.dim
         sigma_old = self.sigma_old
 
-        eyemat = eye(dim)
-
-        with joblib.Parallel(n_jobs=self.ncores) as parallel:
+        eyemat = eye(dim) if self.covariance == 'full' else None
 
-            for i in range(ngen):
-                s_try = np.random.randn(npop, dim)
-                z_try = mu + sigma * dot(s_try, bmat)     # broadcast
-                
-                for k in range (len(z_try)):
-                    z_try[k] = self.ensure_bounds(vec=z_try[k], bounds=self.bounds)
-                
-                #print(z_try)
-                    
-                f_try = parallel(joblib.delayed(f)(z) for z in z_try)
-                f_try = asarray(f_try)
-                
-                # save if best
-                fitness = mean(f_try)
-
-                isort = argsort(f_try)                
-                f_try = f_try[isort]
-                s_try = s_try[isort]
-                z_try = z_try[isort]
+        for i in range(ngen):
+            s_try = np.random.randn(npop, dim)
+            t_try = np.random.randn(npop, self.rank) if vmat is not None else None
+            z_try = mu + sigma * self.transform(s_try, t_try, bmat, vmat)     # broadcast
+            z_try = np.clip(z_try, self.lower, self.upper)
+            
+            #print(z_try)
                 
-                for m in range (len(f_try)):
-                    if f_try[m] > self.fitness_best:
-                        self.fitness_best=f_try[m]
-                        self.x_best=copy.deepcopy(z_try[m])
+            f_try = self.evaluator.map(f, z_try)
+            f_try = asarray(f_try)
+            
+            # save if best
+            fitness = mean(f_try)
+
+            isort = argsort(f_try)                
+            f_try = f_try[isort]
+            s_try = s_try[isort]
+            z_try = z_try[isort]
+            if t_try is not None:
+                t_try = t_try[isort]
+            
+            for m in range (len(f_try)):
+                if f_try[m] > self.fitness_best:
+                    self.fitness_best=f_try[m]
+                    self.x_best=copy.deepcopy(z_try[m])
 
-                self.last_pop=z_try.copy()
-                self.last_fit=np.array(f_try).copy()
-                        
-                if fitness - 1e-8 > self.fitness_best:
-                    self.mu_best = mu.copy()
-                    self.counter = 0
-                else: 
-                    self.counter += 1
+            self.last_pop=z_try.copy()
+            self.last_fit=np.array(f_try).copy()
                     
-                #if self.counter > self.patience:
-                #    self.done = True
-                #    return
+            if fitness - 1e-8 > self.fitness_best:
+                self.mu_best = mu.copy()
+                self.counter = 0
+            else: 
+                self.counter += 1
                 
-                u_try = self.utilities if self.use_fshape else f_try
+            #if self.counter > self.patience:
+            #    self.done = True
+            #    return
+            
+            u_try = self.utilities if self.use_fshape else f_try
+
+            if self.use_adasam and sigma_old is not None:  # sigma_old must be available
+                eta_sigma = self.adasam(eta_sigma, mu, sigma, bmat, sigma_old, z_try, vmat=vmat)
 
-                if self.use_adasam and sigma_old is not None:  # sigma_old must be available
-                    eta_sigma = self.adasam(eta_sigma, mu, sigma, bmat, sigma_old, z_try)
+            sigma_old = sigma
 
+            if self.covariance == 'full':
                 dj_delta = dot(u_try, s_try)
                 dj_mmat = dot(s_try.T, s_try*u_try.reshape(npop,1)) - sum(u_try)*eyemat
                 dj_sigma = trace(dj_mmat)*(1.0/dim)
                 dj_bmat = dj_mmat - dj_sigma*eyemat
-
-                sigma_old = sigma
-
+    
                 # update
                 mu += eta_mu * sigma * dot(bmat, dj_delta)
                 sigma *= exp(0.5 * eta_sigma * dj_sigma)
                 bmat = dot(bmat, expm(0.5 * eta_bmat * dj_bmat))
+            else:
+                mu, sigma, bmat, vmat = self.diag_update(mu, sigma, bmat, vmat, u_try, s_try, t_try, 
+                                                         eta_mu, eta_sigma, eta_bmat)
 
-                # logging
-                self.history['fitness'].append(self.fitness_best)
-                self.history['sigma'].append(sigma)
-                self.history['eta_sigma'].append(eta_sigma)
-                
-                #--mir
-                if self.mode=='min':
-                    self.fitness_best_correct=-self.fitness_best
-                else:
-                    self.fitness_best_correct=self.fitness_best
-
-                # Print data
-                if self.verbose and i % self.npop:
-                    print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
-                    print('XNES step {}/{}, NPOP={}, ETA_MU={}, ETA_SIGMA={}, ETA_BMAT={}, Ncores={}'.format((i+1)*self.npop, ngen*self.npop, self.npop, np.round(self.eta_mu,2), np.round(self.eta_sigma,2), np.round(self.eta_bmat,2), self.ncores))
-                    print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
-                    print('Best XNES Fitness:', np.round(self.fitness_best_correct,6))
-                    print('Best XNES Position:', np.round(self.x_best,6))
-                    print('MU:', np.round(mu,3))
-                    print('Sigma:', np.round(sigma,3))
-                    print('BMAT:', np.round(bmat,3))
-                    print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+            # logging
+            self.history['fitness'].append(self.fitness_best)
+            self.history['sigma'].append(sigma)
+            self.history['eta_sigma'].append(eta_sigma)
             
+            #--mir
+            if self.mode=='min':
+                self.fitness_best_correct=-self.fitness_best
+            else:
+                self.fitness_best_correct=self.fitness_best
+
+            # Print data
+            if self.verbose and i % self.npop:
+                print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+                print('XNES step {}/{}, NPOP={}, ETA_MU={}, ETA_SIGMA={}, ETA_BMAT={}, Ncores={}'.format((i+1)*self.npop, ngen*self.npop, self.npop, np.round(self.eta_mu,2), np.round(self.eta_sigma,2), np.round(self.eta_bmat,2), self.ncores))
+                print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+                print('Best XNES Fitness:', np.round(self.fitness_best_correct,6))
+                print('Best XNES Position:', np.round(self.x_best,6))
+                print('MU:', np.round(mu,3))
+                print('Sigma:', np.round(sigma,3))
+                print('BMAT:', np.round(bmat,3))
+                if vmat is not None:
+                    print('VMAT:', np.round(vmat,3))
+                print('^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^')
+        
         # keep last results
-        self.mu, self.sigma, self.bmat = mu, sigma, bmat
+        self.mu, self.sigma, self.bmat, self.vmat = mu, sigma, bmat, vmat
         self.eta_sigma = eta_sigma
         self.sigma_old = sigma_old
         
@@ -276,24 +290,68 @@ class XNES(object):
             self.last_fit=-self.last_fit
         
         self.history['last_pop'] = get_population(self.last_pop, fits=self.last_fit)
-
+        
+        if evaluator is None:
+            self.evaluator.close()
             
         return self.x_best, self.fitness_best_correct, self.history
 
-    def adasam(self, eta_sigma, mu, sigma, bmat, sigma_old, z_try):
+    def transform(self, s_try, t_try, bmat, vmat):
+        #maps the standard normal samples to the search distribution (before mu and sigma)
+        if self.covariance == 'full':
+            return dot(s_try, bmat)
+        elif vmat is None:
+            return s_try*bmat
+        else:
+            return s_try*bmat + dot(t_try, vmat.T)
+
+    def diag_update(self, mu, sigma, bmat, vmat, u_try, s_try, t_try, eta_mu, eta_sigma, eta_bmat):
+        #Natural gradient update of the separable (diagonal B) and low-rank (diagonal B plus vmat) 
+        #distributions, the cost is O(npop*d*(rank+1)) instead of the O(d^3) of the full update
+        dj_delta = dot(u_try, s_try)
+        dj_diag = dot(u_try, s_try**2) - sum(u_try)       # diagonal of the gradient of B
+        if vmat is None:
+            dj_sigma = mean(dj_diag)
+            mu = mu + eta_mu * sigma * bmat * dj_delta
+        else:
+            rank = vmat.shape[1]
+            dj_t = dot(u_try, t_try)
+            dj_st = dot((s_try*u_try[:,None]).T, t_try)    # d x rank cross terms
+            dj_tt = dot(t_try.T, t_try*u_try[:,None]) - sum(u_try)*eye(rank)
+            dj_sigma = (sum(dj_diag) + trace(dj_tt))*(1.0/(self.dim + rank))
+            mu = mu + eta_mu * sigma * (bmat * dj_delta + dot(vmat, dj_t))
+            vmat = dot(vmat + 0.5 * eta_bmat * bmat[:,None] * dj_st, expm(0.5 * eta_bmat * (dj_tt - dj_sigma*eye(rank))))
+        sigma = sigma * exp(0.5 * eta_sigma * dj_sigma)
+        bmat = bmat * exp(0.5 * eta_bmat * (dj_diag - dj_sigma))
+        return mu, sigma, bmat, vmat
+
+    def adasam(self, eta_sigma, mu, sigma, bmat, sigma_old, z_try, vmat=None):
         #Adaptation sampling
         eta_sigma_init = self.eta_sigma_init
         dim = self.dim
         c = .1
         rho = 0.5 - 1./(3*(dim+1))  # empirical
 
-        bbmat = dot(bmat.T, bmat)
-        cov = sigma**2 * bbmat
         sigma_ = sigma * np.sqrt(sigma*(1./sigma_old))  # increase by 1.5
-        cov_ = sigma_**2 * bbmat
-
-        p0 = multivariate_normal.logpdf(z_try, mean=mu, cov=cov)
-        p1 = multivariate_normal.logpdf(z_try, mean=mu, cov=cov_)
+        if self.covariance == 'full':
+            bbmat = dot(bmat.T, bmat)
+            cov = sigma**2 * bbmat
+            cov_ = sigma_**2 * bbmat
+    
+            p0 = multivariate_normal.logpdf(z_try, mean=mu, cov=cov)
+            p1 = multivariate_normal.logpdf(z_try, mean=mu, cov=cov_)
+        else:
+            # both densities only differ by the scale, so the log ratio only needs the 
+            # Mahalanobis distance of the samples, computed in O(d*rank^2) with Woodbury identity
+            y = (z_try - mu)*(1.0/sigma)
+            w = y/bmat**2
+            r2 = sum(y*w, axis=1)
+            if vmat is not None:
+                wv = dot(w, vmat)
+                mmat = eye(vmat.shape[1]) + dot(vmat.T/bmat**2, vmat)
+                r2 -= sum(wv*np.linalg.solve(mmat, wv.T).T, axis=1)
+            p0 = 0
+            p1 = -dim*np.log(sigma_/sigma) - 0.5*r2*((sigma/sigma_)**2 - 1)
         w = exp(p1-p0)
 
         # Mann-Whitney. It is assumed z_try was in ascending order.
@@ -212,7 +212,7 @@ def get_algo_ngtonevals(obj):
     elif algo == 'PSO':
         return lambda i, a : (i+1)*a
     elif algo == 'DE':
-        return lambda i, a : 2*i*a
+        return lambda i, a : (i+1)*a
     elif algo == 'ES':
         return lambda i, a : (i+1)*a
     elif algo == 'HHO':
@@ -212,6 +212,7 @@ class NGA(object):
     def updatemodel(self):
         # """
         # Updates each model to include the most accurately predicted sample from the current generation.
+        # The centers fitted on the warmup samples are kept, only the output weights get a rank-one update.
         # """
         pre0 = self.models[0].predict(self.ga.pop)
         pre1 = self.models[1].predict(self.ga.pop)
@@ -219,18 +220,12 @@ class NGA(object):
 
         error = abs(pre1-pre2)
         seq = np.ravel(np.where(error == np.min(error)))[0]
-        xtemp = np.row_stack((self.warmup_x0, self.ga.pop[seq]))
-        ytemp = np.append(self.warmup_y0, (pre1[seq]+pre2[seq])/2)
-        self.models[0].fit(xtemp, ytemp)
+        self.models[0].partial_fit(self.ga.pop[seq], (pre1[seq]+pre2[seq])/2)
 
         error = abs(pre0-pre2)
         seq = np.ravel(np.where(error == np.min(error)))[0]
-        xtemp = np.row_stack((self.warmup_x1, self.ga.pop[seq]))
-        ytemp = np.append(self.warmup_y1, (pre0[seq]+pre2[seq])/2)
-        self.models[1].fit(xtemp, ytemp)
+        self.models[1].partial_fit(self.ga.pop[seq], (pre0[seq]+pre2[seq])/2)
 
         error = abs(pre0-pre1)
         seq = np.ravel(np.where(error == np.min(error)))[0]
-        xtemp = np.row_stack((self.warmup_x2, self.ga.pop[seq]))
-        ytemp = np.append(self.warmup_y2, (pre0[seq]+pre1[seq])/2)
-        self.models[2].fit(xtemp, ytemp)
\ No newline at end of file
+        self.models[2].partial_fit(self.ga.pop[seq], (pre0[seq]+pre1[seq])/2)
\ No newline at end of file
@@ -31,14 +31,16 @@ class RBFN(object):
         self.centers = None
         self.weights = None
         self.bias = None
-        def Gaussianfun(center, data_point):  # Gaussian function
-            return np.exp(-0.5 * np.power(np.linalg.norm(center - data_point) / self.sigma, 2))
-        def Reflectedfun(center, data_point):  # Reflected function
-            return 1/(1 + np.exp(np.power(np.linalg.norm(center - data_point) / self.sigma, 2)))
-        def Multiquadric(center, data_point):  # Multiquadric function
-            return np.sqrt(np.power(np.linalg.norm(center - data_point), 2) + np.power(self.sigma, 2))
-        def INMultiquadric(center, data_point):  #  Inverse multiquadric function
-            return 1/np.sqrt(np.power(np.linalg.norm(center - data_point), 2) + np.power(self.sigma, 2))
+        self.P = None
+        # kernels act on the whole matrix of center-to-point distances
+        def Gaussianfun(dist):  # Gaussian function
+            return np.exp(-0.5 * np.power(dist / self.sigma, 2))
+        def Reflectedfun(dist):  # Reflected function
+            return 1/(1 + np.exp(np.power(dist / self.sigma, 2)))
+        def Multiquadric(dist):  # Multiquadric function
+            return np.sqrt(np.power(dist, 2) + np.power(self.sigma, 2))
+        def INMultiquadric(dist):  #  Inverse multiquadric function
+            return 1/np.sqrt(np.power(dist, 2) + np.power(self.sigma, 2))
         if kernel == 'gaussian':
             self.kernel_ = Gaussianfun
         elif kernel == 'reflect':
@@ -48,38 +50,56 @@ class RBFN(object):
         elif kernel == 'inmul':
             self.kernel_ = INMultiquadric
 
+    def _distances(self, X, C):
+        # pairwise euclidean distances between the rows of X and C
+        sq = np.sum(X**2, axis=1)[:, None] + np.sum(C**2, axis=1)[None, :] - 2 * np.dot(X, C.T)
+        return np.sqrt(np.maximum(sq, 0.0))
+
     def _calculate_interpolation_matrix(self, X):
-        G = np.zeros((X.shape[0], self.hidden_shape))
-        for data_point_arg, data_point in enumerate(X):
-            for center_arg, center in enumerate(self.centers):
-                G[data_point_arg,center_arg] = self.kernel_(center, data_point)
-        return G
+        return self.kernel_(self._distances(np.atleast_2d(X), self.centers))
 
     def calsigma(self):
-        max = 0.0
-        num = 0
-        total = 0.0
-        for i in range(self.hidden_shape-1):
-            for j in range(i+1,self.hidden_shape):
-                dis = np.linalg.norm(self.centers[i] - self.centers[j])
-                total = total + dis
-                num += 1
-                if dis > max:
-                    max = dis
-        self.sigma = 2*total/num
+        dist = self._distances(self.centers, self.centers)
+        upper = dist[np.triu_indices(self.hidden_shape, k=1)]
+        self.sigma = 2*np.mean(upper)
+
+    def _design(self, X):
+        # interpolation matrix augmented with the bias column
+        G = self._calculate_interpolation_matrix(X)
+        return np.column_stack((G, np.ones(len(G))))
 
     def fit(self,X,Y):
         km = KMeans(n_clusters=self.hidden_shape).fit(X)
         self.centers = km.cluster_centers_
         self.calsigma()
-        G = self._calculate_interpolation_matrix(X)
-        temp = np.ones((len(X)))
-        temp = np.column_stack((G, temp))
-        temp = np.dot(np.linalg.pinv(temp), Y)
+        A = self._design(X)
+        temp = np.dot(np.linalg.pinv(A), Y)
         self.weights = temp[:self.hidden_shape]
         self.bias = temp[self.hidden_shape]
+        # inverse of the normal matrix, kept for the incremental updates
+        self.P = np.linalg.pinv(np.dot(A.T, A))
+
+    def partial_fit(self, X, Y):
+        # """
+        # Adds samples to a fitted network without moving the centers or sigma:
+        # the output weights are updated by rank-one recursive least squares
+        # (Sherman-Morrison) instead of a new KMeans + pinv.
+        # """
+        A = self._design(X)
+        ndim = np.ndim(self.weights)
+        theta = np.row_stack((np.reshape(self.weights, (self.hidden_shape, -1)), np.reshape(self.bias, (1, -1))))
+        Y = np.reshape(Y, (len(A), theta.shape[1]))
+        for a, y in zip(A, Y):
+            Pa = np.dot(self.P, a)
+            gain = Pa / (1 + np.dot(a, Pa))
+            theta = theta + np.outer(gain, y - np.dot(a, theta))
+            self.P = self.P - np.outer(gain, Pa)
+        if ndim == 1:
+            theta = theta[:, 0]
+        self.weights = theta[:self.hidden_shape]
+        self.bias = theta[self.hidden_shape]
 
     def predict(self, X):
         G = self._calculate_interpolation_matrix(X)
         predictions = np.dot(G, self.weights) + self.bias
-        return predictions
\ No newline at end of file
+        return predictions
@@ -27,8 +27,6 @@ warnings.filterwarnings('ignore')
 import joblib
 from neorl.hybrid.nhhocore.nnmodel import NNmodel
 from neorl.hybrid.nhhocore.hho import HHO
-from tensorflow.keras.models import load_model
-import shutil
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
@@ -180,17 +178,17 @@ class NHHO(object):
 
 
         # train hawks in three models
+        #the surrogates stay in memory: workers receive and return the weights as arrays
         #construct a worker for parallel training
+        def startup_worker(index):
+            return NNmodel(self.nn_params, gen=0, model_num=index+1, logger_paths=self.paths).fit(self.warmup_hawks[index], self.warmup_fitnesses[index]).get_weights()
+        
         if self.ncores > 1:
-            def startup_worker(index):
-                NNmodel(self.nn_params, gen=0, model_num=index+1, logger_paths=self.paths).fit(self.warmup_hawks[index], self.warmup_fitnesses[index]) # saved as best_models/model1_0000.h5
-            
             with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                parallel(joblib.delayed(startup_worker)(i) for i in range(3))    
+                self.weights=parallel(joblib.delayed(startup_worker)(i) for i in range(3))    
         else:
-            NNmodel(self.nn_params, gen=0, model_num=1, logger_paths=self.paths).fit(self.warmup_hawks[0], self.warmup_fitnesses[0]) # saved as best_models/model1_0000.h5
-            NNmodel(self.nn_params, gen=0, model_num=2, logger_paths=self.paths).fit(self.warmup_hawks[1], self.warmup_fitnesses[1])
-            NNmodel(self.nn_params, gen=0, model_num=3, logger_paths=self.paths).fit(self.warmup_hawks[2], self.warmup_fitnesses[2])
+            self.weights=[startup_worker(i) for i in range(3)]
+        self.models=[NNmodel(self.nn_params, gen=0, model_num=i+1).from_weights(self.weights[i]) for i in range(3)]
 
         ##################################
         # Set initial locations of hawks #
@@ -277,11 +275,6 @@ class NHHO(object):
             print('Final fitness (y) found:', self.best_local_fitness)
             print('Final individual (x) found:', self.hawk_decoded)
             print('-------------------------------------------------------------- \n \n')
-        
-        if self.nn_params['save_models']:
-            [shutil.move('model{}_0000.h5'.format(i+1), self.paths['models']) for i in range(3)]
-        else:
-            [os.remove('model{}_0000.h5'.format(i+1)) for i in range(3)]
 
         return self.history['best_hawk'], self.history['local_fitness']
 
@@ -353,22 +346,23 @@ class NHHO(object):
         i = np.argmin(errors)
         X = np.row_stack((self.warmup_hawks[index], self.hawk_positions[i]))
         Y = np.append(self.warmup_fitnesses[index], (self.preds[p[0]][i] + self.preds[p[1]][i])/2)
-        model = NNmodel(self.nn_params, gen=gen, model_num=index+1, logger_paths=self.paths).fit(X, Y)
+        #warm-start from the weights of the previous generation
+        model = NNmodel(self.nn_params, gen=gen, model_num=index+1, logger_paths=self.paths).fit(X, Y, weights=self.weights[index])
         preds=model.predict(self.hawk_positions).flatten()
         
-        return preds
+        return preds, model.get_weights()
+    
+    def __getstate__(self):
+        #the keras models are not shipped to the workers, they receive self.weights instead
+        state=self.__dict__.copy()
+        state.pop('models', None)
+        return state
             
     def update_model(self, gen):
-        self.models = [] # list of three models
-        for i in range(3):
-            self.models.append(load_model('model{}_0000.h5'.format(i+1)))
-
         self.preds = [] # list of prediction arrays
         for model in self.models:
             self.preds.append(model.predict(self.hawk_positions))
         self.preds = np.array(self.preds) # array of prediction arrays
-        
-        del self.models
                 
         core_lst=[[0,(1,2),gen], [1,(2,0),gen], [2,(0,1),gen]]
         
@@ -377,12 +371,14 @@ class NHHO(object):
             with joblib.Parallel(n_jobs=self.ncores) as parallel:
                 model_fit=parallel(joblib.delayed(self.neural_worker)(item) for item in core_lst)
             
-            pred1, pred2, pred3 = model_fit
-        
         else:
-            pred1=self.neural_worker(core_lst[0])
-            pred2=self.neural_worker(core_lst[1])
-            pred3=self.neural_worker(core_lst[2])
+            model_fit=[self.neural_worker(item) for item in core_lst]
+        
+        pred1, pred2, pred3 = [item[0] for item in model_fit]
+        #keep the retrained ensemble in memory for the next generation
+        self.weights=[item[1] for item in model_fit]
+        for model, weights in zip(self.models, self.weights):
+            model.set_weights(weights)
             
         fitness=(pred1+pred2+pred3)/3
         
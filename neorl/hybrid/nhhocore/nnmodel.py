@@ -24,11 +24,34 @@ import matplotlib.pyplot as plt
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, Dropout
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import ModelCheckpoint
+from tensorflow.keras.callbacks import ModelCheckpoint, Callback
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 import os
 
+class BestWeights(Callback):
+    # """
+    # Keeps the weights of the epoch with the lowest validation error in memory
+    # and restores them at the end of training (in-memory ModelCheckpoint).
+    # """
+    def __init__(self, monitor='val_mean_absolute_error'):
+        super().__init__()
+        self.monitor = monitor
+
+    def on_train_begin(self, logs=None):
+        self.best = np.inf
+        self.best_weights = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get(self.monitor)
+        if current is not None and current < self.best:
+            self.best = current
+            self.best_weights = self.model.get_weights()
+
+    def on_train_end(self, logs=None):
+        if self.best_weights is not None:
+            self.model.set_weights(self.best_weights)
+
 class NNmodel(object):
     def __init__(self, nn_params, gen, model_num, logger_paths=None):
 
@@ -38,6 +61,7 @@ class NNmodel(object):
         self.batch_size = nn_params['batch_size'] if 'batch_size' in nn_params else 32
         self.learning_rate = nn_params['learning_rate'] if 'learning_rate' in nn_params else 6e-4
         self.epochs = nn_params['epochs'] if 'epochs' in nn_params else 100
+        self.retrain_epochs = nn_params['retrain_epochs'] if 'retrain_epochs' in nn_params else self.epochs
         self.plot_flag = nn_params['plot'] if 'plot' in nn_params else True
         self.verbose = nn_params['verbose'] if 'verbose' in nn_params else True
         self.save_models = nn_params['save_models'] if 'save_models' in nn_params else True
@@ -46,12 +70,15 @@ class NNmodel(object):
         self.model_num = model_num
         self.paths=logger_paths
             
-    def fit(self, X, Y):
+    def fit(self, X, Y, weights=None):
         # """
-        # Main function - generates model using NN parameters and saves the best of model of this generation.
+        # Main function - generates model using NN parameters and keeps the best weights of this generation.
+        #
+        # Params:
+        # weights - list of weight arrays of a previous model to warm-start the training (None: cold start)
         #
         # Return:
-        # tuple - best model, maximum relative error from test set
+        # best model
         # """
         self.Xtrain, self.Xtest, self.Ytrain, self.Ytest = train_test_split(X, Y, test_size=self.test_split)
         # print(self.Xtrain.shape, self.Xtest.shape)
@@ -63,20 +90,19 @@ class NNmodel(object):
         self.Ytrain = yscaler.fit_transform(self.Ytrain.reshape(-1,1)).flatten()
         self.Ytest = yscaler.transform(self.Ytest.reshape(-1,1)).flatten()
 
-        model = self.model_structure()
+        model = self.model_structure(input_dim=self.Xtrain.shape[1])
+        if weights is not None:
+            model.set_weights(weights)
         
+        cb = [BestWeights(monitor='val_mean_absolute_error')]
         if self.save_models:
-            cb = [ModelCheckpoint(filepath=os.path.join(self.paths['models'], 'model{0:0}_{1:04}.h5'.format(self.model_num, self.gen)), verbose=0, monitor='val_mean_absolute_error', save_best_only=True, mode='min')]
-        else:
-            cb = []
-
-        if self.gen == 0:  #force saving the first the three models
-            cb = [ModelCheckpoint(filepath='model{0:0}_{1:04}.h5'.format(self.model_num, self.gen), verbose=0, monitor='val_mean_absolute_error', save_best_only=True, mode='min')]
+            cb.append(ModelCheckpoint(filepath=os.path.join(self.paths['models'], 'model{0:0}_{1:04}.h5'.format(self.model_num, self.gen)), verbose=0, monitor='val_mean_absolute_error', save_best_only=True, mode='min'))
 
         model.compile(loss='mean_absolute_error', optimizer=Adam(self.learning_rate), metrics = ['mean_absolute_error'])
 
         #mir-new: consider these hyperparam: epochs, batch_size, validation_split
-        self.history = model.fit(self.Xtrain, self.Ytrain, epochs=self.epochs, batch_size=self.batch_size, validation_data=(self.Xtest, self.Ytest), callbacks=cb, verbose=0)
+        epochs = self.epochs if weights is None else self.retrain_epochs
+        self.history = model.fit(self.Xtrain, self.Ytrain, epochs=epochs, batch_size=self.batch_size, validation_data=(self.Xtest, self.Ytest), callbacks=cb, verbose=0)
         self.Ynn = model.predict(self.Xtest)
         self.Ynn = yscaler.inverse_transform(self.Ynn).flatten()
         self.Ytest = yscaler.inverse_transform(self.Ytest.reshape(-1,1)).flatten()
@@ -103,7 +129,18 @@ class NNmodel(object):
             #print('Plots generated')
         return model
 
-    def model_structure(self):
+    def from_weights(self, weights):
+        # """
+        # Rebuilds a model in memory from a list of weight arrays (e.g. returned by a worker).
+        #
+        # Return:
+        # model
+        # """
+        model = self.model_structure(input_dim=weights[0].shape[0])
+        model.set_weights(weights)
+        return model
+
+    def model_structure(self, input_dim):
         # """
         # Defines the general structure of the neural network according to nn parameters.
         #
@@ -115,7 +152,7 @@ class NNmodel(object):
         #mir-new: consider these hyperparam: num_nodes in list form (you infer num_dense_layers)
         num_dense_layers = len(self.num_nodes)
         #mir-new: consider activation in HIDDEN Layers ONLY (relu, sigmoid, etc.)
-        model.add(Dense(self.num_nodes[0], kernel_initializer='normal', activation=self.activation, input_dim=self.Xtrain.shape[1]))
+        model.add(Dense(self.num_nodes[0], kernel_initializer='normal', activation=self.activation, input_dim=input_dim))
         model.add(Dropout(0.5))
         for i in range(1, num_dense_layers):
             model.add(Dense(self.num_nodes[i], activation=self.activation, kernel_initializer='normal'))
@@ -23,26 +23,17 @@ from neorl.hybrid.pesacore.er import ExperienceReplay
 from neorl.hybrid.pesacore.sa import SAMod
 from neorl.hybrid.pesacore.es import ESMod
 from neorl.hybrid.pesacore.pso import PSOMod
+from neorl.hybrid.pesacore.workers import ModWorker
 from copy import deepcopy
-from multiprocessing import Process, Queue
 import random
 import numpy as np
 from collections import defaultdict
 import time
-import sys
-import uuid
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
-
-#multiprocessing trick to paralllelize nested functions in python (un-picklable objects!)
-def globalize(func):
-  def result(*args, **kwargs):
-    return -func(*args, **kwargs)
-  result.__name__ = result.__qualname__ = uuid.uuid4().hex
-  setattr(sys.modules[result.__module__], result.__name__, result)
-  return result
+from neorl.utils.evaluator import eval_batch
 
 class PESA(ExperienceReplay):
 
@@ -75,6 +66,7 @@ class PESA(ExperienceReplay):
     
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives a whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     
     def __init__ (self, mode, bounds, fit, npop, mu=None, #general parameters
@@ -82,7 +74,7 @@ class PESA(ExperienceReplay):
                   Tmax=10000, chi=0.1, #SA parameters
                   cxpb=0.7, mutpb=0.1,  #ES parameters
                   c1=2.05, c2=2.05, speed_mech='constric', #PSO parameters
-                  ncores=1, seed=None): #misc parameters
+                  ncores=1, seed=None, vectorized=False): #misc parameters
         
         #--------------------
         #General Parameters
@@ -95,7 +87,9 @@ class PESA(ExperienceReplay):
         if mode == 'max':
             self.FIT=fit
         elif mode == 'min':
-            self.FIT = globalize(lambda x: fit(x))  #use the function globalize to serialize the nested fit
+            def fitness_wrapper(*args, **kwargs):
+                return -fit(*args, **kwargs) 
+            self.FIT=fitness_wrapper
         else:
             raise ValueError('--error: The mode entered by user is invalid, use either `min` or `max`')
         
@@ -179,11 +173,22 @@ class PESA(ExperienceReplay):
         
         self.lb = np.array([self.bounds[item][1] for item in self.bounds])
         self.ub = np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
+
+    def fit_batch(self, pop):
+        #"""
+        #Evaluates a list of individuals with one call of the vectorized fitness.
+        #"""
+        return eval_batch(self.FIT, pop, self.lb, self.ub)
 
     def fit_worker(self, x):
         #"""
         #Evaluates fitness of an individual.
         #"""
+        if self.vectorized:
+            return self.fit_batch([x])[0]
         
         
         #mir-grid
@@ -207,6 +212,7 @@ class PESA(ExperienceReplay):
         """
         
         self.verbose=verbose
+        fit_batch=self.fit_batch if self.vectorized else None
         self.NGEN=ngen
         self.STEPS=self.NGEN*self.NPOP #all 
         if self.memory_size:
@@ -220,7 +226,7 @@ class PESA(ExperienceReplay):
         if x0: 
             self.x0=x0.copy()
             # use provided initial guess
-            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, mu=self.MU, lambda_=self.LAMBDA, ncores=self.ncores)
+            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, mu=self.MU, lambda_=self.LAMBDA, ncores=self.ncores)
             x0size=len(self.x0)
             assert x0size >= self.NPOP, 'the number of lists in x0 ({}) must be more than or equal npop ({})'.format(x0size, self.NPOP)
             for i in range(x0size):
@@ -232,8 +238,9 @@ class PESA(ExperienceReplay):
         else:
             #create initial guess 
             assert warmup > self.NPOP, 'the number of warmup samples ({}) must be more than npop ({})'.format(warmup, self.NPOP)
-            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, mu=self.MU, lambda_=self.LAMBDA, ncores=self.ncores)
+            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, mu=self.MU, lambda_=self.LAMBDA, ncores=self.ncores)
             self.pop0=warm.init_pop(warmup=warmup)  #initial population for ES
+        warm.evaluator.close()
             
         self.partime={}
         self.partime['pesa']=[]
@@ -254,16 +261,23 @@ class PESA(ExperienceReplay):
         # Obtain initial population for all methods
         espop0, swarm0, swm_pos0, swm_fit0, local_pos, local_fit, x0, E0=self.init_guess(pop0=self.pop0)
         # Initialize ES class
-        es=ESMod(bounds=self.bounds, fit=self.fit_worker, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES, indpb=self.INDPB, 
+        es=ESMod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES, indpb=self.INDPB, 
                  cxpb=self.CXPB, mutpb=self.MUTPB, smin=self.SMIN, smax=self.SMAX)
         # Initialize SA class
         sa=SAMod(bounds=self.bounds, memory=self.mymemory, fit=self.fit_worker, steps=self.STEPS, ncores=self.NCORES, 
                  chi=self.CHI, replay_rate=self.REPLAY_RATE, cooling=self.COOLING, Tmax=self.TMAX, Tmin=self.TMIN)
         # Initialize PSO class (if USED)
         if self.pso_flag:
-            pso=PSOMod(bounds=self.bounds, fit=self.fit_worker, npar=self.NPAR, swm0=[swm_pos0,swm_fit0], 
+            pso=PSOMod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, npar=self.NPAR, swm0=[swm_pos0,swm_fit0], 
                        ncores=self.NCORES, c1=self.C1, c2=self.C2, speed_mech=self.SPEED_MECH)
             
+        # Start long-lived workers, each module keeps its state between generations
+        if self.PROC:
+            sa_proc=ModWorker(sa, seed=self.SEED)
+            es_proc=ModWorker(es, seed=self.SEED)
+            if self.pso_flag:
+                pso_proc=ModWorker(pso, seed=self.SEED)
+            
         #--------------------------------
         # Step 3: Initialize PESA engine
         #--------------------------------
@@ -293,38 +307,26 @@ class PESA(ExperienceReplay):
             if self.PROC:
                 t0=time.time()
                 
-                QSA = Queue(); QES=Queue(); QPSO=Queue()
-                def sa_worker():
-                    random.seed(self.SEED)
-                    x_new, E_new, self.T, self.acc, self.rej, self.imp, x_best, E_best, sa_partime= sa.anneal(ngen=1,npop=self.NPOP, x0=self.x_next, 
-                                                                                                  E0=self.E_next, step0=self.STEP0)
-                    QSA.put((x_new, E_new, self.T, self.acc, self.rej, self.imp, x_best, E_best, sa_partime))
-                def es_worker():
-                    random.seed(self.SEED)
-                    pop_new, es_partime=es.evolute(population=self.pop_next,ngen=1,caseids=caseids)
-                    QES.put((pop_new, es_partime))
-                def pso_worker():
-                    random.seed(self.SEED)
-                    if gen > 1:
-                        swm_new, swm_pos_new, swm_fit_new, pso_partime=pso.evolute(ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, local_fit=self.local_fit_next, 
-                                                                      swm_best=[self.swm_pos, self.swm_fit], mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
-                                                                      caseids=pso_caseids, verbose=0)
-                    else:
-                        swm_new, swm_pos_new, swm_fit_new, pso_partime=pso.evolute(ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, 
-                                                                      local_fit=self.local_fit_next, mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
-                                                                      caseids=pso_caseids, verbose=0)
-                    QPSO.put((swm_new, swm_pos_new, swm_fit_new, pso_partime))
-                Process(target=sa_worker).start()
-                Process(target=es_worker).start()
+                #only the populations and the best memory sample are sent to the workers
+                sa_proc.submit('anneal', ngen=1, npop=self.NPOP, x0=self.x_next, E0=self.E_next, step0=self.STEP0,
+                               replay=self.mymemory.sample(batch_size=1, mode='greedy')[0])
+                es_proc.submit('evolute', population=self.pop_next, ngen=1, caseids=caseids)
                 
                 if self.pso_flag:
-                    Process(target=pso_worker).start()
-                    self.swm_next, self.swm_pos, self.swm_fit, pso_partime=QPSO.get()
+                    if gen > 1:
+                        pso_proc.submit('evolute', ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, local_fit=self.local_fit_next, 
+                                        swm_best=[self.swm_pos, self.swm_fit], mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
+                                        caseids=pso_caseids, verbose=0)
+                    else:
+                        pso_proc.submit('evolute', ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, 
+                                        local_fit=self.local_fit_next, mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
+                                        caseids=pso_caseids, verbose=0)
+                    self.swm_next, self.swm_pos, self.swm_fit, pso_partime=pso_proc.result()
                     self.local_pos_next=[self.swm_next[key][3] for key in self.swm_next]
                     self.local_fit_next=[self.swm_next[key][4] for key in self.swm_next]
                      
-                self.x_next, self.E_next, self.T, self.acc, self.rej, self.imp, self.x_best, self.E_best, sa_partime=QSA.get()
-                self.pop_next, es_partime=QES.get()
+                self.x_next, self.E_next, self.T, self.acc, self.rej, self.imp, self.x_best, self.E_best, sa_partime=sa_proc.result()
+                self.pop_next, es_partime=es_proc.result()
                 #self.partime.append(time.time()-t0)
                 self.partime['pesa'].append(time.time()-t0)
                 self.partime['pso'].append(pso_partime)
@@ -382,7 +384,7 @@ class PESA(ExperienceReplay):
             #--------------------------------------------------------
             self.pesa_best=self.mymemory.sample(batch_size=1,mode='greedy')[0]  #`greedy` will sample the best in memory
             self.fit_hist.append(self.pesa_best[1])
-            self.memory_size=len(self.mymemory.storage) #memory size so far
+            self.memory_size=self.mymemory.n_samples #memory size so far
                 
             #--mir
             if self.mode=='min':
@@ -399,6 +401,11 @@ class PESA(ExperienceReplay):
             if self.verbose:  #print summary data to screen
                 self.printout(mode=2, gen=gen)
 
+        if self.PROC:
+            sa_proc.close(); es_proc.close()
+            if self.pso_flag:
+                pso_proc.close()
+                
         if self.verbose:
             print('------------------------ PESA Summary --------------------------')
             print('Best fitness (y) found:', self.fitness_best)
@@ -24,26 +24,17 @@ from neorl.hybrid.pesacore.gwo import GWOmod
 from neorl.hybrid.pesacore.de import DEmod
 from neorl.hybrid.pesacore.woa import WOAmod
 from neorl.hybrid.pesacore.es import ESMod
+from neorl.hybrid.pesacore.workers import ModWorker
 from copy import deepcopy
-from multiprocessing import Process, Queue
 import random
 import numpy as np
 from collections import defaultdict
 import time
-import sys
-import uuid
 from neorl.evolu.discrete import mutate_discrete, encode_grid_to_discrete 
 from neorl.evolu.discrete import decode_discrete_to_grid, encode_grid_indv_to_discrete
 from neorl.utils.seeding import set_neorl_seed
 from neorl.utils.tools import get_population, check_mixed_individual
-
-#multiprocessing trick to paralllelize nested functions in python (un-picklable objects!)
-def globalize(func):
-  def result(*args, **kwargs):
-    return -func(*args, **kwargs)
-  result.__name__ = result.__qualname__ = uuid.uuid4().hex
-  setattr(sys.modules[result.__module__], result.__name__, result)
-  return result
+from neorl.utils.evaluator import eval_batch
 
 
 class PESA2(ExperienceReplay):
@@ -76,6 +67,7 @@ class PESA2(ExperienceReplay):
     :param int_transform: (str): method of handling int/discrete variables, choose from: ``nearest_int``, ``sigmoid``, ``minmax``.    
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives a whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     
     def __init__ (self, mode, bounds, fit, R_frac=0.5, #general parameters
@@ -83,7 +75,7 @@ class PESA2(ExperienceReplay):
                   nwolves=5, #GOW parameters
                   npop=50, CR=0.7, F=0.5,  #DE parameters
                   nwhales=10, #WOA parameters
-                  int_transform ='nearest_int', ncores=1, seed=None): #misc parameters
+                  int_transform ='nearest_int', ncores=1, seed=None, vectorized=False): #misc parameters
         
         
         set_neorl_seed(seed)
@@ -93,7 +85,9 @@ class PESA2(ExperienceReplay):
         if mode == 'max':
             self.FIT=fit
         elif mode == 'min':
-            self.FIT = globalize(lambda x: fit(x))  #use the function globalize to serialize the nested fit
+            def fitness_wrapper(*args, **kwargs):
+                return -fit(*args, **kwargs) 
+            self.FIT=fitness_wrapper
         else:
             raise ValueError('--error: The mode entered by user is invalid, use either `min` or `max`')
 
@@ -186,6 +180,9 @@ class PESA2(ExperienceReplay):
         
         self.lb = np.array([self.bounds[item][1] for item in self.bounds])
         self.ub = np.array([self.bounds[item][2] for item in self.bounds])
+        self.vectorized=vectorized
+        if self.vectorized:
+            assert not self.grid_flag, '--error: vectorized=True is not supported for grid parameters'
 
     def ensure_bounds(self, vec):
     
@@ -207,10 +204,18 @@ class PESA2(ExperienceReplay):
             
         return vec_new
     
+    def fit_batch(self, pop):
+        #"""
+        #Evaluates a list of individuals with one call of the vectorized fitness.
+        #"""
+        return eval_batch(self.FIT, pop, self.lb, self.ub)
+
     def fit_worker(self, x):
         #"""
         #Evaluates fitness of an individual.
         #"""
+        if self.vectorized:
+            return self.fit_batch([x])[0]
         
         x=self.ensure_bounds(x)
         
@@ -237,6 +242,7 @@ class PESA2(ExperienceReplay):
         
         assert ngen >= 2, '--error: use ngen > 2 for PESA2'
         self.verbose=verbose
+        fit_batch=self.fit_batch if self.vectorized else None
         self.NGEN=int(ngen/replay_every)
         self.STEPS=self.NGEN*self.NPOP #all 
         if self.memory_size:
@@ -250,7 +256,7 @@ class PESA2(ExperienceReplay):
         if x0: 
             self.x0=x0.copy()
             # use provided initial guess
-            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, mu=self.NPOP, lambda_=self.NPOP, ncores=self.ncores)
+            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, mu=self.NPOP, lambda_=self.NPOP, ncores=self.ncores)
             x0size=len(self.x0)
             assert x0size >= self.NPOP, 'the number of lists in x0 ({}) must be more than or equal npop ({})'.format(x0size, self.NPOP)
             for i in range(x0size):
@@ -261,8 +267,9 @@ class PESA2(ExperienceReplay):
         else:
             #create initial guess 
             assert warmup >= self.NPOP, 'the number of warmup samples ({}) must be more than or equal npop ({})'.format(warmup, self.NPOP)
-            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, mu=self.NPOP, lambda_=self.NPOP, ncores=self.ncores)
+            warm=ESMod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, mu=self.NPOP, lambda_=self.NPOP, ncores=self.ncores)
             self.pop0=warm.init_pop(warmup=warmup)  #initial population for all methods (use external ES modules for initialization)
+        warm.evaluator.close()
         
         self.fit_hist=[]
         #------------------------------
@@ -278,16 +285,22 @@ class PESA2(ExperienceReplay):
         # Obtain initial population for all methods
         x0_gwo, fit0_gwo, x0_de, fit0_de, x0_woa, fit0_woa=self.init_guess(pop0=self.pop0)
         # Initialize GWO class
-        gwo=GWOmod(mode='max', bounds=self.bounds, fit=self.fit_worker, int_transform=self.int_transform,
+        gwo=GWOmod(mode='max', bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, int_transform=self.int_transform,
                    nwolves=self.NWOLVES, ncores=self.NCORES, seed=self.SEED)
         # Initialize DE class
-        de=DEmod(bounds=self.bounds, fit=self.fit_worker, npop=self.NPOP, 
+        de=DEmod(bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, npop=self.NPOP, 
                  F=self.F, int_transform=self.int_transform,
                  CR=self.CR, ncores=self.NCORES, seed=self.SEED)
         # Initialize WOA class
-        woa=WOAmod(mode='max', bounds=self.bounds, fit=self.fit_worker, int_transform=self.int_transform,
+        woa=WOAmod(mode='max', bounds=self.bounds, fit=self.fit_worker, fit_batch=fit_batch, int_transform=self.int_transform,
                    nwhales=self.NWHALES, ncores=self.NCORES, seed=self.SEED)
             
+        # Start long-lived workers, each module keeps its state between generations
+        if self.PROC:
+            gwo_proc=ModWorker(gwo, seed=self.SEED)
+            de_proc=ModWorker(de, seed=self.SEED)
+            woa_proc=ModWorker(woa, seed=self.SEED)
+            
         #--------------------------------
         # Step 3: Initialize PESA engine
         #--------------------------------
@@ -312,30 +325,15 @@ class PESA2(ExperienceReplay):
             
             if self.PROC:
                 
-                QGWO = Queue(); QDE=Queue(); QWOA=Queue()
-                def gwo_worker():
-                    random.seed(self.SEED)
-                    xgwo_best, ygwo_best, gwo_new= gwo.evolute(ngen=self.GWO_gen*replay_every, x0=self.gwo_next, verbose=0)
-                                                                                                 
-                    QGWO.put((xgwo_best, ygwo_best, gwo_new))
-                def de_worker():
-                    random.seed(self.SEED)
-                    xde_best, yde_best, de_new=de.evolute(ngen=1*replay_every,x0=self.de_next, verbose=0)
-                    QDE.put((xde_best, yde_best, de_new))
-                
-                def woa_worker():
-                    random.seed(self.SEED)
-                    xwoa_best, ywoa_best, woa_new=woa.evolute(ngen=self.WOA_gen*replay_every,x0=self.woa_next, verbose=0)
-                    QWOA.put((xwoa_best, ywoa_best, woa_new))
-                    
-                Process(target=gwo_worker).start()
-                Process(target=de_worker).start()
-                Process(target=woa_worker).start()
+                #only the populations are exchanged with the workers
+                gwo_proc.submit('evolute', ngen=self.GWO_gen*replay_every, x0=self.gwo_next, verbose=0)
+                de_proc.submit('evolute', ngen=1*replay_every, x0=self.de_next, verbose=0)
+                woa_proc.submit('evolute', ngen=self.WOA_gen*replay_every, x0=self.woa_next, verbose=0)
                 
-                #get the values from the Queue
-                self.gwo_best, self.ygwo_best, self.gwo_next=QGWO.get()
-                self.de_best, self.yde_best, self.de_next=QDE.get()
-                self.woa_best, self.ywoa_best, self.woa_next=QWOA.get()
+                #get the values from the workers
+                self.gwo_best, self.ygwo_best, self.gwo_next=gwo_proc.result()
+                self.de_best, self.yde_best, self.de_next=de_proc.result()
+                self.woa_best, self.ywoa_best, self.woa_next=woa_proc.result()
                 
             #*********************************
             #--Step 5B: Complete Serial calcs
@@ -379,7 +377,7 @@ class PESA2(ExperienceReplay):
             #--------------------------------------------------------
             self.pesa_best=self.mymemory.sample(batch_size=1,mode='greedy')[0]  #`greedy` will sample the best in memory
             self.fit_hist.append(self.pesa_best[1])
-            self.memory_size=len(self.mymemory.storage) #memory size so far
+            self.memory_size=self.mymemory.n_samples #memory size so far
             
             
             #--mir
@@ -397,6 +395,9 @@ class PESA2(ExperienceReplay):
             if self.verbose:  #print summary data to screen
                 self.printout(mode=2, gen=gen)
             
+        if self.PROC:
+            gwo_proc.close(); de_proc.close(); woa_proc.close()
+            
         #--mir
         if self.mode=='min':
             self.fit_hist=[-item for item in self.fit_hist]
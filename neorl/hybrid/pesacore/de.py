@@ -20,22 +20,9 @@ import random
 import numpy as np
 from collections import defaultdict
 
-import multiprocessing
-import multiprocessing.pool
 from neorl.evolu.discrete import mutate_discrete
 from neorl.utils.seeding import set_neorl_seed
-class NoDaemonProcess(multiprocessing.Process):
-    # make 'daemon' attribute always return False
-    def _get_daemon(self):
-        return False
-    def _set_daemon(self, value):
-        pass
-    daemon = property(_get_daemon, _set_daemon)
-
-# We sub-class multiprocessing.pool.Pool instead of multiprocessing.Pool
-# because the latter is only a wrapper function, not a proper class.
-class MyPool(multiprocessing.pool.Pool):
-    Process = NoDaemonProcess
+from neorl.utils.evaluator import PoolEvaluator
 
 class DEmod:
     """
@@ -48,8 +35,9 @@ class DEmod:
     :param CR: (float) crossover probability between [0,1]
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param fit_batch: (function) optional vectorized fitness evaluating a list of individuals in one call
     """
-    def __init__ (self, bounds, fit, npop=50, F=0.5, CR=0.3, int_transform ='nearest_int', ncores=1, seed=None):  
+    def __init__ (self, bounds, fit, npop=50, F=0.5, CR=0.3, int_transform ='nearest_int', ncores=1, seed=None, fit_batch=None):  
 
         self.seed=seed
         set_neorl_seed(self.seed)
@@ -58,7 +46,9 @@ class DEmod:
         self.npop=npop
         self.bounds=bounds
         self.ncores=ncores
+        self.evaluator=PoolEvaluator(ncores=ncores)
         self.fit=fit
+        self.fit_batch=fit_batch
         self.F=F
         self.CR=CR
         self.dim=len(bounds)
@@ -221,16 +211,17 @@ class DEmod:
                 x_t_lst.append(x_t)
                 v_trial_lst.append(v_trial)
             
+            #vectorized evaluation of trials and targets in one call
+            if self.fit_batch:
+                scores=self.fit_batch(v_trial_lst+x_t_lst)
+                score_trial_lst=scores[:len(v_trial_lst)]
+                score_target_lst=scores[len(v_trial_lst):]
             #paralell evaluation
-            if self.ncores > 1:
+            elif self.ncores > 1:
 
-                p=MyPool(self.ncores)
-                score_trial_lst = p.map(self.fit, v_trial_lst)
-                p.close(); p.join()
+                score_trial_lst=self.evaluator.map(self.fit, v_trial_lst)
 
-                p=MyPool(self.ncores)
-                score_target_lst = p.map(self.fit, x_t_lst)
-                p.close(); p.join()
+                score_target_lst=self.evaluator.map(self.fit, x_t_lst)
                                     
             else:
                 score_trial_lst=[]
@@ -24,23 +24,46 @@ import numpy as np
 
 #alpha0=0, anneal_alpha=False, anneal_steps=None, alpha_end=1
 class ExperienceReplay:
+    #"""
+    #Ring buffer replay memory backed by numpy arrays:
+    #  - attributes, objectives, and methods are stored in preallocated arrays 
+    #    (grown by doubling up to ``size``), the oldest sample is overwritten when full
+    #  - a hash index (dict) detects duplicated samples in O(1)
+    #  - a sorted index of slots (best to worst objective) is updated on every ``add``, 
+    #    so greedy and prioritized sampling do not sort the memory again
+    #"""
     def __init__(self, size):
         #"""
         #:param size (int): the max size of the memory
         #"""
         random.seed(1)
         self.size=size
-        self.storage = []
-        self.next_indx=0    
+        self.next_indx=0
+        self.n_samples=0            #number of samples in the memory
+        self._capacity=0            #number of allocated rows
+        self._x=None                #attributes, shape (capacity, dim)
+        self._obj=None              #objective values, shape (capacity,)
+        self._method=None           #method of each sample (None for (x, obj) samples)
+        self._int_cols=None         #columns which only received int values
+        self._index={}              #hash index: sample key --> slot
+        self._keys=[]               #slot --> sample key
+        self._order=np.zeros(0, dtype=int)  #slots sorted from the highest to the lowest objective
         
     @property
     def memory(self):
         #"""
         #content of the memory buffer
-        #[(np.ndarray, float, str)]: 
+        #[(list, float, str)]: 
         #"""
         return self.storage
 
+    @property
+    def storage(self):
+        #"""
+        #all samples in the memory as a list of tuples (built on request, use ``n_samples`` for the size)
+        #"""
+        return [self._get(slot) for slot in range(self.n_samples)]
+
     @property
     def buffer_size(self):
         #"""Max memory capacity"""
@@ -53,14 +76,60 @@ class ExperienceReplay:
         #:param n_samples (int):  number of samples to draw
         #:return (bool): whether we can sample or not
         #"""
-        return len(self.storage) >= n_samples
+        return self.n_samples >= n_samples
 
     def memory_is_full(self):
         #"""
         #Check whether the replay buffer is full or not.
         #:return: (bool)
         #"""
-        return len(self.storage) == self.buffer_size
+        return self.n_samples == self.buffer_size
+
+    def _allocate(self, dim, slot):
+        #"""
+        #Allocate the arrays on the first add and double them when ``slot`` does not fit
+        #"""
+        if self._x is None:
+            self._capacity=min(self.size, 1024)
+            self._x=np.zeros((self._capacity, dim))
+            self._obj=np.zeros(self._capacity)
+            self._method=np.empty(self._capacity, dtype=object)
+            self._int_cols=np.ones(dim, dtype=bool)
+        elif slot >= self._capacity:
+            self._capacity=min(self.size, 2*self._capacity)
+            x=np.zeros((self._capacity, self._x.shape[1]))
+            x[:self.n_samples]=self._x[:self.n_samples]
+            obj=np.zeros(self._capacity)
+            obj[:self.n_samples]=self._obj[:self.n_samples]
+            method=np.empty(self._capacity, dtype=object)
+            method[:self.n_samples]=self._method[:self.n_samples]
+            self._x, self._obj, self._method=x, obj, method
+
+    def _get(self, slot):
+        #"""
+        #Rebuild the sample tuple stored in ``slot``, int attributes are returned as int
+        #"""
+        x=self._x[slot].tolist()
+        for i in np.flatnonzero(self._int_cols):
+            x[i]=int(x[i])
+        if self._method[slot] is None:
+            return (x, self._obj[slot].item())
+        return (x, self._obj[slot].item(), self._method[slot])
+
+    def _update_order(self, new_slots, removed_slots):
+        #"""
+        #Keep the sorted index: drop the overwritten slots and merge the new ones
+        #(ties are placed after the older samples)
+        #"""
+        order=self._order
+        if removed_slots:
+            order=order[~np.isin(order, removed_slots)]
+        if new_slots:
+            new=np.array(new_slots, dtype=int)
+            new=new[np.argsort(-self._obj[new], kind='stable')]
+            pos=np.searchsorted(-self._obj[order], -self._obj[new], side='right')
+            order=np.insert(order, pos, new)
+        self._order=order
 
     def add(self, xvec, obj, method=None):
         #"""
@@ -69,49 +138,61 @@ class ExperienceReplay:
         #:param obj (float): objective value of xvec
         #:param method (string): method of which this sample belongs to
         #"""
-
         
         #check if multiple or single samples is to be added 
         if type(obj) is list: # multiple samples 
             if method:
                 data = [(x, o, m) for x,o,m in zip(xvec,obj,method)]
             else:
-                data = [(x, o) for x,o in zip(xvec,obj)]
-            
-            for sample in data:
-                # check if sample is in memory
-                if sample not in self.storage:
-                    if self.next_indx >= len(self.storage):
-                        self.storage.append(sample)
-                    else:
-                        self.storage[self.next_indx] = sample
-                    self.next_indx = (self.next_indx + 1) % self.size
-            
+                data = [(x, o, None) for x,o in zip(xvec,obj)]
         else: #single sample
-            if method:
-                data = (xvec, obj, method)
-            else:
-                data = (xvec, obj)
-            
+            data = [(xvec, obj, method if method else None)]
+        
+        new_slots={}   #ordered set of slots written by this call
+        removed_slots=[]
+        for x, o, m in data:
+            row=np.array(x, dtype=float).ravel()
+            key=(row.tobytes(), float(o), m)
             # check if sample is in memory
-            if data not in self.storage:
-                if self.next_indx >= len(self.storage):
-                    self.storage.append(data)
+            if key in self._index:
+                continue
+            
+            slot=self.next_indx
+            self._allocate(dim=row.size, slot=slot)
+            if slot < self.n_samples:  #overwrite the oldest sample
+                del self._index[self._keys[slot]]
+                if slot in new_slots:
+                    del new_slots[slot]
                 else:
-                    self.storage[self.next_indx] = data
-                self.next_indx = (self.next_indx + 1) % self.size
+                    removed_slots.append(slot)
+                self._keys[slot]=key
+            else:
+                self._keys.append(key)
+                self.n_samples+=1
+            
+            self._x[slot]=row
+            self._obj[slot]=o
+            self._method[slot]=m
+            if isinstance(x, np.ndarray):
+                self._int_cols &= (x.dtype.kind in 'iu')
+            else:
+                self._int_cols &= np.array([isinstance(v, (int, np.integer)) for v in x])
+            self._index[key]=slot
+            new_slots[slot]=None
+            self.next_indx = (self.next_indx + 1) % self.size
+        
+        self._update_order(list(new_slots), removed_slots)
                     
     def calc_priorities(self, alpha):
         #"""
         #calculate priorties for each memory sample
         #:param alpha: priortization value 
         #:return
-        #  - list of normalized priorities 
+        #  - list of normalized priorities (ordered from the best to the worst sample)
         #"""
         #Fixed :)
         
-        self.storage.sort(key=lambda e: e[1], reverse=True)
-        ranks=np.array(range(1,len(self.storage)+1))
+        ranks=np.arange(1,self.n_samples+1)
         ranks=1/ranks
         priors=ranks**alpha/np.sum(ranks**alpha)
         assert np.round(np.sum(priors)) == 1.0, 'the calculated priorties are not normalized'
@@ -127,38 +208,42 @@ class ExperienceReplay:
         #  -"prior": priortized replay with alpha value
         #:param alpha: the prioritization ceoffcient between 0 (no priority) and 1 (full priority)
         #:return:
-        #    - batch_size of samples in a list of tuples [(np.ndarray, float, str),...,(np.ndarray, float, str)]
+        #    - batch_size of samples in a list of tuples [(list, float, str),...,(list, float, str)]
         #"""
         if mode=='uniform': # uniform sampling
-            idxs = [random.randint(0, len(self.storage) - 1) for _ in range(batch_size)]
-            return [self.storage[i] for i in idxs]
+            idxs = [random.randint(0, self.n_samples - 1) for _ in range(batch_size)]
         elif mode=='greedy': #greedy mode (always take the highest)
-            #Fixed :) 
-            self.storage.sort(key=lambda e: e[1], reverse=True)
-            return self.storage[:batch_size]
+            idxs = self._order[:batch_size]
         elif mode=='prior':  #priortized replay
             priors=self.calc_priorities(alpha=alpha)
             np.random.seed(seed)
-            idxs = np.random.choice(range(len(self.storage)),p=priors, size=batch_size)
-            return [self.storage[i] for i in idxs]
+            ranks = np.random.choice(self.n_samples, p=priors, size=batch_size)
+            idxs = self._order[ranks]
         else:
-            raise ('unknown mode is entered for experience replay: either uniform, greedy, or prior are allowed')
+            raise ValueError('--error: unknown mode is entered for experience replay: either uniform, greedy, or prior are allowed')
+        
+        return [self._get(i) for i in idxs]
     
     def remove_duplicates(self):
+        #"""
+        #remove the samples with duplicated attributes (the oldest sample is kept)
+        #"""
+        if self.n_samples == 0:
+            return
+        #slots from the oldest to the newest sample
+        chrono=np.arange(self.n_samples)
+        if self.memory_is_full():
+            chrono=np.roll(chrono, -self.next_indx)
+        _, first=np.unique(self._x[chrono], axis=0, return_index=True)
+        keep=chrono[np.sort(first)]
         
-        #TODO: Time consuming step!!!
-        if len(self.storage[0])==3: #(x, obj, method) tuple
-            seen = []
-            # using list comprehension 
-            self.storage = [(a, b, c) for a, b, c in self.storage 
-                     if not (a in seen or seen.append(a))]
-        elif len(self.storage[0])==2:   #(x, obj) tuple
-            seen = []
-            # using list comprehension 
-            self.storage = [(a, b) for a, b in self.storage 
-                     if not (a in seen or seen.append(a))]
-        else:
-            raise ('memory content is corrupted and cannot be filtered')
+        n=len(keep)
+        self._x[:n], self._obj[:n], self._method[:n]=self._x[keep], self._obj[keep], self._method[keep]
+        self._keys=[self._keys[i] for i in keep]
+        self._index={key: slot for slot, key in enumerate(self._keys)}
+        self.n_samples=n
+        self.next_indx=n % self.size
+        self._order=np.argsort(-self._obj[:n], kind='stable')
 
 #if __name__=='__main__':
 #    random.seed(1)
@@ -171,5 +256,3 @@ class ExperienceReplay:
 #    x=per.storage
 #    samples=per.sample(10,alpha=1)
 #    print([item[1] for item in samples])
-  
-    
\ No newline at end of file
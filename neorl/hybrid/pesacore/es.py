@@ -25,24 +25,11 @@ from collections import defaultdict
 import copy
 import time
 import joblib
-import multiprocessing
-import multiprocessing.pool
 from neorl.utils.seeding import set_neorl_seed
-class NoDaemonProcess(multiprocessing.Process):
-    # make 'daemon' attribute always return False
-    def _get_daemon(self):
-        return False
-    def _set_daemon(self, value):
-        pass
-    daemon = property(_get_daemon, _set_daemon)
-
-# We sub-class multiprocessing.pool.Pool instead of multiprocessing.Pool
-# because the latter is only a wrapper function, not a proper class.
-class MyPool(multiprocessing.pool.Pool):
-    Process = NoDaemonProcess
+from neorl.utils.evaluator import PoolEvaluator
 
 class ESMod:
-    def __init__ (self, bounds, fit, mu, lambda_, ncores=1, indpb=0.1, cxpb=0.6, mutpb=0.3, smin=0.01, smax=0.5, seed=None):  
+    def __init__ (self, bounds, fit, mu, lambda_, ncores=1, indpb=0.1, cxpb=0.6, mutpb=0.3, smin=0.01, smax=0.5, seed=None, fit_batch=None):  
         """
         Parallel ES:
         A module for constructing evolution strategy (ES) with parallelization in evaluating the population
@@ -57,11 +44,14 @@ class ESMod:
             -indpb (float): independent probability for attribute mutation (ONLY used for continuous attributes)
             -smin (float): minimum bound for strategy vector (fix it to 0.01)
             -smin (float): max bound for strategy vector (fix it to 0.5)
+            -fit_batch (function): optional vectorized fitness evaluating a list of individuals in one call
         """
         set_neorl_seed(seed)
         self.bounds=bounds
         self.fit=fit
+        self.fit_batch=fit_batch
         self.ncores=ncores
+        self.evaluator=PoolEvaluator(ncores=ncores)
         self.smin=smin
         self.smax=smax
         self.cxpb=cxpb
@@ -136,15 +126,17 @@ class ESMod:
                 pop[i].append(data[0])
             pop[i].append(data[1])
         
-        if self.ncores > 1:  #evaluate warmup in parallel
+        if self.fit_batch:  #evaluate warmup with one vectorized call
+            fitness=self.fit_batch([pop[key][0] for key in pop])
+            [pop[ind].append(fitness[ind]) for ind in range(len(pop))]
+        
+        elif self.ncores > 1:  #evaluate warmup in parallel
             core_list=[]
             for key in pop:
                 caseid='es_gen{}_ind{}'.format(0,key+1) 
                 core_list.append([pop[key][0],caseid])
            
-            p=MyPool(self.ncores)
-            fitness = p.map(self.gen_object, core_list)
-            p.close(); p.join()
+            fitness=self.evaluator.map(self.gen_object, core_list)
             #with joblib.Parallel(n_jobs=self.ncores) as parallel:
             #    fitness=parallel(joblib.delayed(self.gen_object)(item) for item in core_list)
             
@@ -408,7 +400,15 @@ class ESMod:
             
             # Evaluate the individuals with an invalid fitness with multiprocessign Pool
             # create and run the Pool
-            if self.ncores > 1:
+            if self.fit_batch: #vectorized calcs
+                
+                fitness=self.fit_batch([offspring[key][0] for key in offspring])
+                [offspring[ind].append(fitness[ind]) for ind in range(len(offspring))]
+                if caseids:
+                    case_idx+=len(offspring)
+                
+                self.partime=0
+            elif self.ncores > 1:
                 t0=time.time()
                 core_list=[]
                 for key in offspring:
@@ -416,9 +416,7 @@ class ESMod:
                     case_idx+=1
                 
                 #initialize a pool
-                p=MyPool(self.ncores)
-                fitness = p.map(self.gen_object, core_list)
-                p.close(); p.join()
+                fitness=self.evaluator.map(self.gen_object, core_list)
                 #with joblib.Parallel(n_jobs=self.ncores) as parallel:
                 #    fitness=parallel(joblib.delayed(self.gen_object)(item) for item in core_list)
                 
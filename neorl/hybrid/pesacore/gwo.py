@@ -26,34 +26,12 @@ import math
 #from solution import solution
 import time
 from collections import defaultdict
-import sys
-import uuid
 
-import multiprocessing
-import multiprocessing.pool
 from neorl.evolu.discrete import mutate_discrete
 from neorl.utils.seeding import set_neorl_seed
+from neorl.utils.evaluator import PoolEvaluator
 
-class NoDaemonProcess(multiprocessing.Process):
-    # make 'daemon' attribute always return False
-    def _get_daemon(self):
-        return False
-    def _set_daemon(self, value):
-        pass
-    daemon = property(_get_daemon, _set_daemon)
 
-# We sub-class multiprocessing.pool.Pool instead of multiprocessing.Pool
-# because the latter is only a wrapper function, not a proper class.
-class MyPool(multiprocessing.pool.Pool):
-    Process = NoDaemonProcess
-
-#multiprocessing trick to paralllelize nested functions in python (un-picklable objects!)
-def globalize(func):
-  def result(*args, **kwargs):
-    return -func(*args, **kwargs)
-  result.__name__ = result.__qualname__ = uuid.uuid4().hex
-  setattr(sys.modules[result.__module__], result.__name__, result)
-  return result
     
 class GWOmod(object):
     """
@@ -65,8 +43,9 @@ class GWOmod(object):
     :param nwolves: (int): number of the grey wolves in the group
     :param ncores: (int) number of parallel processors (must be ``<= nwolves``)
     :param seed: (int) random seed for sampling
+    :param fit_batch: (function) optional vectorized fitness evaluating a list of individuals in one call
     """
-    def __init__(self, mode, bounds, fit, nwolves=5, int_transform ='nearest_int', ncores=1, seed=None):
+    def __init__(self, mode, bounds, fit, nwolves=5, int_transform ='nearest_int', ncores=1, seed=None, fit_batch=None):
         
         
         set_neorl_seed(seed)
@@ -76,12 +55,20 @@ class GWOmod(object):
         if mode == 'min':
             self.fit=fit
         elif mode == 'max':
-            self.fit=globalize(lambda x: fit(x))  #use the function globalize to serialize the nested fit
+            def fitness_wrapper(*args, **kwargs):
+                return -fit(*args, **kwargs) 
+            self.fit=fitness_wrapper
         else:
             raise ValueError('--error: The mode entered by user is invalid, use either `min` or `max`')
+        
+        if fit_batch and mode == 'max':
+            self.fit_batch=lambda pop: [-item for item in fit_batch(pop)]
+        else:
+            self.fit_batch=fit_batch
             
         self.bounds=bounds
         self.ncores = ncores
+        self.evaluator=PoolEvaluator(ncores=ncores)
         self.nwolves=nwolves
         self.dim = len(bounds)
         self.int_transform=int_transform
@@ -192,10 +179,10 @@ class GWOmod(object):
             for case in range (0, self.Positions.shape[0]):
                 self.x_lst.append(list(self.Positions[case, :]))
         
-            if self.ncores > 1:
-                p=MyPool(self.ncores)
-                self.fitness = p.map(self.fit, self.x_lst)
-                p.close(); p.join()            
+            if self.fit_batch:
+                self.fitness=self.fit_batch(self.x_lst)
+            elif self.ncores > 1:
+                self.fitness=self.evaluator.map(self.fit, self.x_lst)
             else:
                 self.fitness=[]
                 for item in self.x_lst:
@@ -24,25 +24,12 @@ import numpy as np
 from collections import defaultdict
 import copy
 import time
-import multiprocessing
-import multiprocessing.pool
 import joblib
 from neorl.utils.seeding import set_neorl_seed
-class NoDaemonProcess(multiprocessing.Process):
-    # make 'daemon' attribute always return False
-    def _get_daemon(self):
-        return False
-    def _set_daemon(self, value):
-        pass
-    daemon = property(_get_daemon, _set_daemon)
-
-# We sub-class multiprocessing.pool.Pool instead of multiprocessing.Pool
-# because the latter is only a wrapper function, not a proper class.
-class MyPool(multiprocessing.pool.Pool):
-    Process = NoDaemonProcess
+from neorl.utils.evaluator import PoolEvaluator
 
 class PSOMod:
-    def __init__ (self, bounds, fit, npar, swm0=None, ncores=1, c1=2.05, c2=2.05, speed_mech='constric', seed=None):  
+    def __init__ (self, bounds, fit, npar, swm0=None, ncores=1, c1=2.05, c2=2.05, speed_mech='constric', seed=None, fit_batch=None):  
         """
         Particle Swarm Optimisaion (PSO)
         Parallel mixed discrete/continuous PSO module
@@ -60,13 +47,16 @@ class PSOMod:
             -c1 (float): cognative speed constant 
             -c2 (float): social speed constant 
             -w (float): constant inertia weight (how much to weigh the previous velocity)
+            -fit_batch (function): optional vectorized fitness evaluating a list of individuals in one call
         """
         set_neorl_seed(seed)
         
         self.bounds=bounds
         self.npar=npar
         self.fit=fit
+        self.fit_batch=fit_batch
         self.ncores=ncores
+        self.evaluator=PoolEvaluator(ncores=ncores)
         self.speed_mech=speed_mech
         self.c1=c1
         self.c2=c2
@@ -318,20 +308,24 @@ class PSOMod:
             #Parallel: Evaluate the particles 
             # with multiprocessign Pool
             #***************************
-            if self.ncores > 1:
+            if self.fit_batch or self.ncores > 1:
                 t0=time.time()
-                core_list=[]
-                for key in offspring:
-                    core_list.append([offspring[key][0],caseids[case_idx]])
-                    case_idx+=1
-                
-                #initialize a pool
-                p=MyPool(self.ncores)
-                fitness = p.map(self.gen_object, core_list)
-                p.close(); p.join()
-
-                #with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                #    fitness=parallel(joblib.delayed(self.gen_object)(item) for item in core_list)
+                if self.fit_batch:
+                    #one vectorized call for the whole swarm
+                    fitness=self.fit_batch([offspring[key][0] for key in offspring])
+                    if caseids:
+                        case_idx+=len(offspring)
+                else:
+                    core_list=[]
+                    for key in offspring:
+                        core_list.append([offspring[key][0],caseids[case_idx]])
+                        case_idx+=1
+                    
+                    #initialize a pool
+                    fitness=self.evaluator.map(self.gen_object, core_list)
+    
+                    #with joblib.Parallel(n_jobs=self.ncores) as parallel:
+                    #    fitness=parallel(joblib.delayed(self.gen_object)(item) for item in core_list)
                 
                 self.partime=time.time()-t0
                 #print('PSO:', self.partime)
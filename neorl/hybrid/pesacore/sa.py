@@ -24,22 +24,9 @@ import numpy as np
 import copy
 from neorl.hybrid.pesacore.er import ExperienceReplay
 import time
-import multiprocessing
-import multiprocessing.pool
 import joblib
 from neorl.utils.seeding import set_neorl_seed
-class NoDaemonProcess(multiprocessing.Process):
-    # make 'daemon' attribute always return False
-    def _get_daemon(self):
-        return False
-    def _set_daemon(self, value):
-        pass
-    daemon = property(_get_daemon, _set_daemon)
-
-# We sub-class multiprocessing.pool.Pool instead of multiprocessing.Pool
-# because the latter is only a wrapper function, not a proper class.
-class MyPool(multiprocessing.pool.Pool):
-    Process = NoDaemonProcess
+from neorl.utils.evaluator import PoolEvaluator
 
 class SAMod(ExperienceReplay):
     
@@ -71,6 +58,7 @@ class SAMod(ExperienceReplay):
         self.replay_rate=replay_rate
         self.bounds=bounds
         self.ncores=ncores
+        self.evaluator=PoolEvaluator(ncores=ncores)
         self.Tmax=Tmax
         self.Tmin=Tmin
         if type(chi) == list:
@@ -152,6 +140,7 @@ class SAMod(ExperienceReplay):
             inp[2] --> min_step: min step to start this chain 
             inp[3] --> max_step: max step to terminate this chain 
             inp[4] --> core_seed: seed for this chain
+            inp[5] --> replay: best sample of the replay memory (x, E, method) or None
         returns: 
             x_best, E_best: best obtained from this chain
             T: last temperature for this chain
@@ -165,6 +154,7 @@ class SAMod(ExperienceReplay):
         min_step=inp[2]
         max_step=inp[3]
         core_seed=inp[4]
+        replay=inp[5]
         random.seed(core_seed)
         
         rejects=0; accepts=0; improves=0
@@ -172,8 +162,8 @@ class SAMod(ExperienceReplay):
         while k <= max_step:
             T=self.temp(step=k)
             
-            if random.random() < self.replay_rate and self._memory: #replay memory
-                x, E, _=self._memory.sample(batch_size=1, mode='greedy', seed=core_seed)[0]
+            if random.random() < self.replay_rate and replay: #replay memory
+                x, E, _=replay
                 E=self.fit(x)
                 #if core_seed==1 or core_seed==10:
                 #    print('memory sample {}, step {}, E {}'.format(core_seed, k, np.round(E,2)))
@@ -211,7 +201,7 @@ class SAMod(ExperienceReplay):
             #assert self.fit(x_prev) == E_prev
         return x_prev, E_prev, T, accepts, rejects, improves, x_best, E_best
         
-    def chain(self, x0, E0, step0, npop):
+    def chain(self, x0, E0, step0, npop, replay=None):
         """
         This function creates ``ncores`` independent SA chains with same initial guess x0, E0 and 
         runs them via multiprocessing Pool.
@@ -220,9 +210,12 @@ class SAMod(ExperienceReplay):
             E0: energy/fitness value of x0
             step0: is the first time step to use for temperature annealing
             npop: total number of individuals to be evaluated in this annealing stage
+            replay: best sample of the replay memory, if None, it is taken from ``memory``
         returns: 
             x_best, E_best, and T obtained from this annealing stage from all chains
         """
+        if replay is None and self._memory:
+            replay=self._memory.sample(batch_size=1, mode='greedy')[0]
         assert npop % self.ncores == 0, 'The number of communications to run must be divisible by ncores, {} mod {} != 0'.format(npop,self.ncores)
         core_npop =int(npop/self.ncores)
         
@@ -231,16 +224,13 @@ class SAMod(ExperienceReplay):
         core_step_min=step0
         for j in range(1,self.ncores+1):
             core_step_max=step0+j*core_npop-1
-            core_list.append([x0[j-1], E0[j-1], core_step_min, core_step_max, j])
+            core_list.append([x0[j-1], E0[j-1], core_step_min, core_step_max, j, replay])
             core_step_min=core_step_max+1
         
         if self.ncores > 1:
             # create and run the Pool
             t0=time.time()
-            p=MyPool(self.ncores)
-            results = p.map(self.chain_object, core_list)
-            p.close()
-            p.join()
+            results=self.evaluator.map(self.chain_object, core_list)
             
             #with joblib.Parallel(n_jobs=self.ncores) as parallel:
             #    results=parallel(joblib.delayed(self.chain_object)(item) for item in core_list)
@@ -264,9 +254,10 @@ class SAMod(ExperienceReplay):
         
         return self.x_last, self.E_last, self.T, self.accepts, self.rejects, self.improves, self.x_best, self.E_best
     
-    def anneal(self, ngen, npop, x0, E0, step0, verbose=0):
+    def anneal(self, ngen, npop, x0, E0, step0, verbose=0, replay=None):
         """
         Perform annealing over total ``steps`` by updating chains every ``npop``
+        (``replay`` is the best memory sample, used when the memory lives in another process)
         Returns the best ``x`` and ``energy`` over the whole stage 
         """
         assert len(x0) == self.ncores, 'Length of initial guesses x0 ({}) for chains do not equal to ncores or # of chains ({})'.format(len(x0), self.ncores)
@@ -275,7 +266,7 @@ class SAMod(ExperienceReplay):
         E_next=copy.deepcopy(E0)
         steps=ngen*npop
         for i in range (ngen):
-            x_next,E_next,self.T, acc, rej, imp, x_best, E_best=self.chain(x0=x_next, E0=E_next, step0=step0, npop=npop)
+            x_next,E_next,self.T, acc, rej, imp, x_best, E_best=self.chain(x0=x_next, E0=E_next, step0=step0, npop=npop, replay=replay)
             step0=step0+npop
             arg_max=np.argmax(E_best)
             if verbose:
@@ -0,0 +1,93 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+
+import random
+import traceback
+import weakref
+import cloudpickle
+from multiprocessing import Process, Queue
+
+def _worker_loop(payload, seed, inbox, outbox):
+    #"""
+    #Body of a long-lived worker: unpickle the module once, then serve
+    #(method, kwargs) requests until ``None`` is received
+    #"""
+    mod=cloudpickle.loads(payload)
+    random.seed(seed)
+    try:
+        while True:
+            request=inbox.get()
+            if request is None:
+                break
+            method, kwargs=request
+            try:
+                outbox.put((True, getattr(mod, method)(**kwargs)))
+            except Exception:
+                outbox.put((False, traceback.format_exc()))
+    finally:
+        if hasattr(mod, 'evaluator'):
+            mod.evaluator.close()
+
+def _stop_worker(inbox, process):
+    #ask the worker to leave its loop and wait for it
+    if process.is_alive():
+        inbox.put(None)
+        process.join()
+
+class ModWorker:
+    """
+    A long-lived process hosting one PESA module (e.g. ``ESMod``, ``SAMod``, ``PSOMod``).
+    The module is shipped once when the worker starts and keeps its internal state
+    between generations, so every generation only exchanges the inputs and results
+    of one method call.
+
+    :param mod: (object) the module to host, it is serialized with ``cloudpickle``
+    :param seed: (int) random seed of the worker process
+    """
+    def __init__(self, mod, seed=None):
+        self.inbox=Queue()
+        self.outbox=Queue()
+        self.process=Process(target=_worker_loop,
+                             args=(cloudpickle.dumps(mod), seed, self.inbox, self.outbox))
+        self.process.start()
+        #stop the worker if the optimizer exits without calling close
+        self._finalizer=weakref.finalize(self, _stop_worker, self.inbox, self.process)
+
+    def submit(self, method, **kwargs):
+        """
+        This function starts ``mod.method(**kwargs)`` in the worker without waiting for the result.
+
+        :param method: (str) name of the module method to call
+        :param kwargs: (dict) keyword arguments of the call
+        """
+        self.inbox.put((method, kwargs))
+
+    def result(self):
+        """
+        This function waits for the last submitted call and returns its output.
+
+        :return: the output of the module method
+        """
+        ok, out=self.outbox.get()
+        if not ok:
+            raise RuntimeError('--error: the PESA worker failed with the traceback below\n{}'.format(out))
+        return out
+
+    def close(self):
+        """
+        This function stops the worker process.
+        """
+        self._finalizer()
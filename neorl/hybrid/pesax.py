@@ -23,13 +23,14 @@ from neorl.hybrid.pesacore.er import ExperienceReplay
 from neorl.hybrid.pesacore.de import DEmod
 from neorl.hybrid.pesacore.es import ESMod
 from neorl.hybrid.pesacore.pso import PSOMod
+from neorl.hybrid.pesacore.workers import ModWorker
 from copy import deepcopy
-from multiprocessing import Process, Queue
 import random
 import numpy as np
 from collections import defaultdict
 import time
 from neorl.utils.seeding import set_neorl_seed
+from neorl.utils.evaluator import eval_batch
 
 class PESAX(ExperienceReplay):
 
@@ -65,6 +66,7 @@ class PESAX(ExperienceReplay):
     
     :param ncores: (int) number of parallel processors
     :param seed: (int) random seed for sampling
+    :param vectorized: (bool) if ``True``, ``fit`` receives a whole population as a 2-D array of shape ``(npop, dim)`` and returns a 1-D array of fitness values (grid parameters are not supported)
     """
     
     def __init__ (self, mode, bounds, fit, npop, mu=None, #general parameters
@@ -72,7 +74,7 @@ class PESAX(ExperienceReplay):
                   CR=0.7, F=0.5,  #DE parameters
                   cxpb=0.7, mutpb=0.2,  #ES parameters
                   c1=2.05, c2=2.05, speed_mech='constric', #PSO parameters
-                  ncores=1, seed=None): #misc parameters
+                  ncores=1, seed=None, vectorized=False): #misc parameters
         
         #--------------------
         #General Parameters
@@ -150,7 +152,21 @@ class PESAX(ExperienceReplay):
         self.SMIN = 1/self.nx #ES
         self.SMAX = 0.5  #ES
         self.v0=0.1 #constant to initialize PSO speed, not very important
+        self.lb=np.array([self.BOUNDS[item][1] for item in self.BOUNDS])
+        self.ub=np.array([self.BOUNDS[item][2] for item in self.BOUNDS])
+        self.vectorized=vectorized
 
+    def fit_batch(self, pop):
+        #"""
+        #Evaluates a list of individuals with one call of the vectorized fitness.
+        #"""
+        return eval_batch(self.FIT, pop, self.lb, self.ub)
+
+    def fit_worker(self, x):
+        #"""
+        #Evaluates fitness of an individual with the vectorized fitness.
+        #"""
+        return self.fit_batch([x])[0]
 
     def evolute(self, ngen, x0=None, warmup=100, verbose=0):
         """
@@ -165,6 +181,10 @@ class PESAX(ExperienceReplay):
         """
         
         self.verbose=verbose
+        if self.vectorized:
+            fit, fit_batch=self.fit_worker, self.fit_batch
+        else:
+            fit, fit_batch=self.FIT, None
         self.NGEN=ngen
         self.STEPS=self.NGEN*self.NPOP #all 
         if self.memory_size:
@@ -177,15 +197,16 @@ class PESAX(ExperienceReplay):
         #-------------------------------------------------------
         if x0: 
             # use provided initial guess
-            warm=ESMod(bounds=self.BOUNDS, fit=self.FIT, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES)
+            warm=ESMod(bounds=self.BOUNDS, fit=fit, fit_batch=fit_batch, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES)
             x0size=len(x0)
             assert x0size >= self.NPOP, 'the number of lists in x0 ({}) must be more than or equal npop ({})'.format(x0size, self.NPOP)
             self.pop0=warm.init_pop(warmup=x0size, x_known=x0)  #initial population for ES
         else:
             #create initial guess 
             assert warmup > self.NPOP, 'the number of warmup samples ({}) must be more than npop ({})'.format(warmup, self.NPOP)
-            warm=ESMod(bounds=self.BOUNDS, fit=self.FIT, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES)
+            warm=ESMod(bounds=self.BOUNDS, fit=fit, fit_batch=fit_batch, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES)
             self.pop0=warm.init_pop(warmup=warmup)  #initial population for ES
+        warm.evaluator.close()
             
         self.partime={}
         self.partime['pesa']=[]
@@ -206,16 +227,23 @@ class PESAX(ExperienceReplay):
         # Obtain initial population for all methods
         espop0, swarm0, swm_pos0, swm_fit0, local_pos, local_fit, x0_de, fit0_de=self.init_guess(pop0=self.pop0)
         # Initialize ES class
-        es=ESMod(bounds=self.BOUNDS, fit=self.FIT, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES, indpb=self.INDPB, 
+        es=ESMod(bounds=self.BOUNDS, fit=fit, fit_batch=fit_batch, mu=self.MU, lambda_=self.LAMBDA, ncores=self.NCORES, indpb=self.INDPB, 
                  cxpb=self.CXPB, mutpb=self.MUTPB, smin=self.SMIN, smax=self.SMAX)
         # Initialize DE class
-        de=DEmod(bounds=self.BOUNDS, fit=self.FIT, npop=self.NPOP, F=self.F, 
+        de=DEmod(bounds=self.BOUNDS, fit=fit, fit_batch=fit_batch, npop=self.NPOP, F=self.F, 
                  CR=self.CR, ncores=self.NCORES, seed=self.SEED)
         # Initialize PSO class (if USED)
         if self.pso_flag:
-            pso=PSOMod(bounds=self.BOUNDS, fit=self.FIT, npar=self.NPAR, swm0=[swm_pos0,swm_fit0], 
+            pso=PSOMod(bounds=self.BOUNDS, fit=fit, fit_batch=fit_batch, npar=self.NPAR, swm0=[swm_pos0,swm_fit0], 
                        ncores=self.NCORES, c1=self.C1, c2=self.C2, speed_mech=self.SPEED_MECH)
             
+        # Start long-lived workers, each module keeps its state between generations
+        if self.PROC:
+            de_proc=ModWorker(de, seed=self.SEED)
+            es_proc=ModWorker(es, seed=self.SEED)
+            if self.pso_flag:
+                pso_proc=ModWorker(pso, seed=self.SEED)
+            
         #--------------------------------
         # Step 3: Initialize PESA engine
         #--------------------------------
@@ -245,37 +273,25 @@ class PESAX(ExperienceReplay):
             if self.PROC:
                 t0=time.time()
                 
-                QDE = Queue(); QES=Queue(); QPSO=Queue()
-                def de_worker():
-                    random.seed(self.SEED)
-                    xde_best, yde_best, de_new=de.evolute(ngen=1,x0=self.de_next, verbose=0)
-                    QDE.put((xde_best, yde_best, de_new))
-                def es_worker():
-                    random.seed(self.SEED)
-                    pop_new, es_partime=es.evolute(population=self.pop_next,ngen=1,caseids=caseids)
-                    QES.put((pop_new, es_partime))
-                def pso_worker():
-                    random.seed(self.SEED)
-                    if gen > 1:
-                        swm_new, swm_pos_new, swm_fit_new, pso_partime=pso.evolute(ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, local_fit=self.local_fit_next, 
-                                                                      swm_best=[self.swm_pos, self.swm_fit], mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
-                                                                      caseids=pso_caseids, verbose=0)
-                    else:
-                        swm_new, swm_pos_new, swm_fit_new, pso_partime=pso.evolute(ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, 
-                                                                      local_fit=self.local_fit_next, mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
-                                                                      caseids=pso_caseids, verbose=0)
-                    QPSO.put((swm_new, swm_pos_new, swm_fit_new, pso_partime))
-                Process(target=de_worker).start()
-                Process(target=es_worker).start()
+                #only the populations are exchanged with the workers
+                de_proc.submit('evolute', ngen=1, x0=self.de_next, verbose=0)
+                es_proc.submit('evolute', population=self.pop_next, ngen=1, caseids=caseids)
                 
                 if self.pso_flag:
-                    Process(target=pso_worker).start()
-                    self.swm_next, self.swm_pos, self.swm_fit, pso_partime=QPSO.get()
+                    if gen > 1:
+                        pso_proc.submit('evolute', ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, local_fit=self.local_fit_next, 
+                                        swm_best=[self.swm_pos, self.swm_fit], mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
+                                        caseids=pso_caseids, verbose=0)
+                    else:
+                        pso_proc.submit('evolute', ngen=1, swarm=self.swm_next, local_pos=self.local_pos_next, 
+                                        local_fit=self.local_fit_next, mu=self.MU, exstep=self.STEP0, exsteps=self.STEPS, 
+                                        caseids=pso_caseids, verbose=0)
+                    self.swm_next, self.swm_pos, self.swm_fit, pso_partime=pso_proc.result()
                     self.local_pos_next=[self.swm_next[key][3] for key in self.swm_next]
                     self.local_fit_next=[self.swm_next[key][4] for key in self.swm_next]
                      
-                self.de_best, self.yde_best, self.de_next=QDE.get()
-                self.pop_next, es_partime=QES.get()
+                self.de_best, self.yde_best, self.de_next=de_proc.result()
+                self.pop_next, es_partime=es_proc.result()
                 #self.partime.append(time.time()-t0)
                 self.partime['pesa'].append(time.time()-t0)
                 self.partime['pso'].append(pso_partime)
@@ -334,7 +350,7 @@ class PESAX(ExperienceReplay):
             #--------------------------------------------------------
             self.pesa_best=self.mymemory.sample(batch_size=1,mode='greedy')[0]  #`greedy` will sample the best in memory
             self.fit_hist.append(self.pesa_best[1])
-            self.memory_size=len(self.mymemory.storage) #memory size so far
+            self.memory_size=self.mymemory.n_samples #memory size so far
             if self.verbose:  #print summary data to screen
                 self.printout(mode=2, gen=gen)
                 
@@ -344,6 +360,11 @@ class PESAX(ExperienceReplay):
             else:
                 self.fitness_best=self.pesa_best[1]
         
+        if self.PROC:
+            de_proc.close(); es_proc.close()
+            if self.pso_flag:
+                pso_proc.close()
+                
         #--mir
         if self.mode=='min':
             self.fit_hist=[-item for item in self.fit_hist]
@@ -0,0 +1,245 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+#"""
+# Quality indicators of Pareto fronts: hypervolume, IGD and GD
+#"""
+
+import numpy as np
+
+#########################################################
+# Helper functions working on minimization problems     #
+#########################################################
+
+def _as_min(front, mode):
+    #"""
+    #Returns the front as a 2-D float array of a minimization problem
+    #"""
+    front=np.atleast_2d(np.asarray(front, dtype=float))
+    if mode == 'max':
+        return -front
+    elif mode == 'min':
+        return front
+    else:
+        raise ValueError('--error: mode must be either ``min`` or ``max``, not {}'.format(mode))
+
+def _hv2d(front, ref_point):
+    #"""
+    #Exact 2-D hypervolume by sweeping the points sorted on the first objective
+    #"""
+    if len(front) == 0:
+        return 0.0
+    order=np.lexsort((front[:,1], front[:,0]))
+    x, y=front[order,0], front[order,1]
+    ymin=np.minimum.accumulate(y)
+    widths=np.diff(np.append(x, ref_point[0]))
+    return float(np.sum(widths*(ref_point[1]-ymin)))
+
+def _hv3d(front, ref_point):
+    #"""
+    #Exact 3-D hypervolume by slicing along the third objective, every slab
+    #is the 2-D hypervolume of the points below it
+    #"""
+    if len(front) == 0:
+        return 0.0
+    front=front[np.argsort(front[:,2], kind='stable')]
+    z=np.append(front[:,2], ref_point[2])
+    hv=0.0
+    for i in range(len(front)):
+        depth=z[i+1]-z[i]
+        if depth > 0:
+            hv+=depth*_hv2d(front[:i+1,:2], ref_point[:2])
+    return hv
+
+def _mc_samples(ref_point, lower, n_samples, seed):
+    #"""
+    #Uniform samples in the box [lower, ref_point]
+    #"""
+    rng=np.random.default_rng(seed)
+    return lower+rng.random((n_samples, len(ref_point)))*(ref_point-lower)
+
+def _mc_dominated(front, samples, block=256):
+    #"""
+    #Boolean mask of the samples dominated by at least one point of the front
+    #"""
+    mask=np.zeros(len(samples), dtype=bool)
+    for start in range(0, len(front), block):
+        pts=front[start:start+block]
+        mask|=np.any(np.all(pts[:,None,:] <= samples[None,:,:], axis=2), axis=0)
+    return mask
+
+def _filter(front, ref_point):
+    #"""
+    #Keeps the points strictly dominating the reference point
+    #"""
+    return front[np.all(front < ref_point, axis=1)]
+
+def _distances(a, b, block=2**20):
+    #"""
+    #Euclidean distance matrix between the rows of a and b, computed in row blocks
+    #"""
+    out=np.empty((len(a), len(b)))
+    rows=max(1, block//max(1, len(b)))
+    for start in range(0, len(a), rows):
+        diff=a[start:start+rows,None,:]-b[None,:,:]
+        out[start:start+rows]=np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+    return out
+
+#########################################################
+# Quality indicators                                    #
+#########################################################
+
+def hypervolume(front, ref_point, mode='min', n_samples=100000, seed=None):
+    """
+    Hypervolume dominated by a Pareto front and bounded by a reference point.
+    The value is exact for 2 and 3 objectives and estimated by Monte Carlo sampling
+    for more objectives.
+
+    :param front: (list or np.array) objective values of the front, shape (npoints, nobj)
+    :param ref_point: (list) reference point, it must be worse than every point of interest
+    :param mode: (str) problem type, either ``min`` or ``max``
+    :param n_samples: (int) number of Monte Carlo samples, only used for more than 3 objectives
+    :param seed: (int) random seed of the Monte Carlo samples
+
+    :return: (float) hypervolume of the front
+    """
+    front=_as_min(front, mode)
+    ref_point=_as_min(ref_point, mode)[0]
+    assert front.shape[1] == len(ref_point), '--error: the front has {} objectives but the reference point has {}'.format(front.shape[1], len(ref_point))
+    front=_filter(front, ref_point)
+    nobj=len(ref_point)
+    if nobj == 1:
+        return float(ref_point[0]-np.min(front[:,0])) if len(front) else 0.0
+    elif nobj == 2:
+        return _hv2d(front, ref_point)
+    elif nobj == 3:
+        return _hv3d(front, ref_point)
+    if len(front) == 0:
+        return 0.0
+    lower=np.min(front, axis=0)
+    samples=_mc_samples(ref_point, lower, n_samples, seed)
+    return float(np.prod(ref_point-lower)*np.mean(_mc_dominated(front, samples)))
+
+def igd(front, true_front, mode='min'):
+    """
+    Inverted generational distance: mean distance from every point of the true
+    Pareto front to its closest point in the front.
+
+    :param front: (list or np.array) objective values of the front, shape (npoints, nobj)
+    :param true_front: (list or np.array) points of the true Pareto front, e.g. ``DTLZ2().pareto_front(ref_dirs)``
+    :param mode: (str) problem type, either ``min`` or ``max``
+
+    :return: (float) IGD of the front
+    """
+    return float(np.mean(np.min(_distances(_as_min(true_front, mode), _as_min(front, mode)), axis=1)))
+
+def gd(front, true_front, mode='min'):
+    """
+    Generational distance: mean distance from every point of the front to its
+    closest point in the true Pareto front.
+
+    :param front: (list or np.array) objective values of the front, shape (npoints, nobj)
+    :param true_front: (list or np.array) points of the true Pareto front, e.g. ``DTLZ2().pareto_front(ref_dirs)``
+    :param mode: (str) problem type, either ``min`` or ``max``
+
+    :return: (float) GD of the front
+    """
+    return float(np.mean(np.min(_distances(_as_min(front, mode), _as_min(true_front, mode)), axis=1)))
+
+class ParetoMetrics:
+    """
+    Tracks the hypervolume, IGD and GD of the Pareto front along the generations.
+    The values of every point (its distances to the true front and the Monte Carlo
+    samples it dominates) are cached, so each generation only evaluates the points
+    that entered the front. For more than 3 objectives, the Monte Carlo box is fixed
+    at the first update, between the ideal point of ``true_front`` (or of the first
+    front) and ``ref_point``.
+
+    :param mode: (str) problem type, either ``min`` or ``max``
+    :param ref_point: (list) reference point of the hypervolume, if ``None``, the hypervolume is not tracked
+    :param true_front: (list or np.array) points of the true Pareto front, if ``None``, IGD and GD are not tracked
+    :param n_samples: (int) number of Monte Carlo samples of the hypervolume, only used for more than 3 objectives
+    :param seed: (int) random seed of the Monte Carlo samples
+    """
+    def __init__(self, mode='min', ref_point=None, true_front=None, n_samples=100000, seed=None):
+        if ref_point is None and true_front is None:
+            raise ValueError('--error: provide at least one of ``ref_point`` or ``true_front`` to track the metrics')
+        self.mode=mode
+        self.ref_point=None if ref_point is None else _as_min(ref_point, mode)[0]
+        self.true_front=None if true_front is None else _as_min(true_front, mode)
+        self.n_samples=n_samples
+        self.seed=seed
+        self.samples=None
+        self.cache={}
+        self.history={}
+        if self.ref_point is not None:
+            self.history['hypervolume']=[]
+        if self.true_front is not None:
+            self.history['igd']=[]
+            self.history['gd']=[]
+
+    def _point_data(self, point):
+        #"""
+        #Cached data of one point: distances to the true front and packed mask of dominated samples
+        #"""
+        key=point.tobytes()
+        if key not in self.cache:
+            dist, mask=None, None
+            if self.true_front is not None:
+                dist=_distances(point[None,:], self.true_front)[0]
+            if self.samples is not None:
+                mask=np.packbits(np.all(point <= self.samples, axis=1))
+            self.cache[key]=(dist, mask)
+        return self.cache[key]
+
+    def update(self, front):
+        """
+        This function computes the metrics of a new front and appends them to the history.
+
+        :param front: (list or np.array) objective values of the front, shape (npoints, nobj)
+
+        :return: (dict) metrics of the front
+        """
+        front=_as_min(front, self.mode)
+        values={}
+        if self.ref_point is not None:
+            inside=_filter(front, self.ref_point)
+            if len(self.ref_point) <= 3:
+                values['hypervolume']=hypervolume(inside, self.ref_point)
+            elif self.samples is None and self.true_front is None and len(inside) == 0:
+                values['hypervolume']=0.0
+            else:
+                if self.samples is None:
+                    #the sampling box is fixed once so the cached masks stay valid, its lower
+                    #corner is the ideal point of the true front, or of the first front
+                    base=self.true_front if self.true_front is not None else inside
+                    self.lower=np.min(base, axis=0)
+                    self.samples=_mc_samples(self.ref_point, self.lower, self.n_samples, self.seed)
+                    self.cache={}
+                mask=np.zeros((self.n_samples+7)//8, dtype=np.uint8)
+                for point in inside:
+                    mask|=self._point_data(point)[1]
+                frac=np.unpackbits(mask)[:self.n_samples].sum()/self.n_samples
+                values['hypervolume']=float(np.prod(self.ref_point-self.lower)*frac)
+        if self.true_front is not None:
+            dist=np.array([self._point_data(point)[0] for point in front])
+            values['igd']=float(np.mean(np.min(dist, axis=0)))
+            values['gd']=float(np.mean(np.min(dist, axis=1)))
+        #only the points of the current front are kept in the cache
+        keys={point.tobytes() for point in front}
+        self.cache={key: self.cache[key] for key in keys if key in self.cache}
+        for key in values:
+            self.history[key].append(values[key])
+        return values
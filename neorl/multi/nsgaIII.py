@@ -25,7 +25,6 @@ import random
 import numpy as np
 from collections import defaultdict
 import copy
-import joblib
 from neorl.evolu.crossover import cxES2point, cxESBlend
 from neorl.evolu.discrete import encode_grid_to_discrete, decode_discrete_to_grid
 from neorl.utils.seeding import set_neorl_seed
@@ -34,6 +33,8 @@ from neorl.evolu.es import ES
 from itertools import chain
 from neorl.multi.tools import sortNondominated, sortLogNondominated, find_extreme_points, find_intercepts, associate_to_niche, niching, uniform_reference_points
 from neorl.utils.tools import get_population_nsga
+from neorl.multi.metrics import ParetoMetrics
+from neorl.utils.evaluator import PoolEvaluator
 
 class NSGAIII(ES):
     """
@@ -56,18 +57,23 @@ class NSGAIII(ES):
     
     NSGA-III specific parameters:
 
-    :param sorting: (str) sorting type, ``standard`` or ``log``. The latter should be faster and is used as default.#Paul
+    :param sorting: (str) sorting type, ``standard`` (array-based sort, faster for large populations) or ``log``, the latter is used as default.#Paul
     :param: p: (int) number of divisions along each objective for the reference points. The number of reference points is Combination(M + p - 1, p), where M is the number of objective
     :param ref_points: (list) of user inputs reference points. If none the reference points are generated uniformly on the hyperplane intersecting each axis at 1.
+    :param metrics: (ParetoMetrics) tracker of the hypervolume/IGD/GD of the pareto front, if given, ``es_hist['metrics']`` holds the metrics of every generation
     """
     def __init__ (self, mode, bounds, fit, lambda_=60, cxmode='cx2point', 
-                  alpha=0.5, cxpb=0.6, mutpb=0.3, smin=0.01, smax=0.5, clip=True, ncores=1, seed=None, p = 4,ref_points = None,sorting = 'log',**kwargs):  
+                  alpha=0.5, cxpb=0.6, mutpb=0.3, smin=0.01, smax=0.5, clip=True, ncores=1, seed=None, p = 4,ref_points = None,sorting = 'log',metrics=None, **kwargs):  
         
         set_neorl_seed(seed)
         super().__init__(mode = mode, bounds = bounds, fit = fit, lambda_=lambda_, mu=lambda_, cxmode=cxmode, 
                   alpha=alpha, cxpb=cxpb, mutpb=mutpb, smin=smin, smax=smax, clip=clip, ncores=ncores, seed=seed)
         # new hyper-parameters #Paul
         self.sorting = sorting
+        if metrics is not None:
+            assert isinstance(metrics, ParetoMetrics), '--error: metrics must be a ParetoMetrics object from neorl.multi.metrics'
+            assert metrics.mode == mode, '--error: the mode of metrics ({}) must match the mode of the optimizer ({})'.format(metrics.mode, mode)
+        self.metrics = metrics
         #NSGA-III specific
         self.p = p
         self.ref_points = ref_points
@@ -159,12 +165,16 @@ class NSGAIII(ES):
         n = k - sel_count
         selected = niching(pareto_fronts[-1], n, niches[sel_count:], dist[sel_count:], niche_counts)
         chosen.extend(selected)
-        # re-cast into a dictionary to comply with NEORL 
+        # re-cast into a dictionary to comply with NEORL, the individuals are shallow copies
+        # (new [x, strategy, fitness] lists sharing their content with pop)
+        # the indices of the selected individuals from the first front are kept in self.pareto_keys 
+        first_front=set(key for key, _ in pareto_fronts[0])
         best_dict=defaultdict(list)
-        index=0
-        for key in chosen:
-            best_dict[index] = key[1]
-            index+=1
+        self.pareto_keys=[]
+        for index, item in enumerate(chosen):
+            best_dict[index] = list(item[1])
+            if item[0] in first_front:
+                self.pareto_keys.append(index)
         
         return best_dict
     def GenOffspring(self, pop):
@@ -235,18 +245,22 @@ class NSGAIII(ES):
         
         return offspring
                
-    def evolute(self, ngen, x0=None, verbose=False):
+    def evolute(self, ngen, x0=None, verbose=False, evaluator=None):
         """
         This function evolutes the NSGA-III algorithm for number of generations.
         
         :param ngen: (int) number of generations to evolute
         :param x0: (list of lists) the initial position of the swarm particles
         :param verbose: (bool) print statistics to screen
+        :param evaluator: (PoolEvaluator) persistent worker pool used for ``ncores > 1``, if ``None``, a pool of ``ncores`` workers is created for this run
         
         :return: (tuple) (best individual, best fitness, and a list of fitness history)
         """
+        self.evaluator=evaluator if evaluator is not None else PoolEvaluator(ncores=self.ncores)
         self.es_hist={}
         self.es_hist['mean_strategy']=[]
+        if self.metrics is not None:
+            self.es_hist['metrics']=[]
         self.best_scores=[]
         self.best_indvs=[]
         if x0:    
@@ -274,8 +288,7 @@ class NSGAIII(ES):
                 for key in offspring:
                     core_list.append(offspring[key][0])
 
-                with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                    fitness=parallel(joblib.delayed(self.fit_worker)(item) for item in core_list)
+                fitness=self.evaluator.map(self.fit_worker, core_list)
                     
                 for ind in range(len(offspring)):
                     offspring[ind + len(self.population)].append(fitness[ind]) 
@@ -289,17 +302,22 @@ class NSGAIII(ES):
                 
             # Select the next generation population
             offspring.update(self.population) # concatenate offspring and parents dictionnaries
-            self.population = copy.deepcopy(self.select(pop=offspring, k=self.mu, ref_points = self.ref_points, nd = self.sorting))
+            self.population = self.select(pop=offspring, k=self.mu, ref_points = self.ref_points, nd = self.sorting)
             if self.RLmode:  #perform RL informed ES
                 self.population=self.mix_population(self.population)
                 
-            #Paul many changes: simply provide the pareto front (add a layer of calculation)
-            if self.sorting == "standard":#Paul
-                pareto_front = sortNondominated(self.population, len(self.population))[0]
-            elif self.sorting == 'log':
-                pareto_front = sortLogNondominated(self.population, len(self.population))[0]  
+                #Paul many changes: simply provide the pareto front (add a layer of calculation)
+                if self.sorting == "standard":#Paul
+                    pareto_front = sortNondominated(self.population, len(self.population))[0]
+                elif self.sorting == 'log':
+                    pareto_front = sortLogNondominated(self.population, len(self.population))[0]  
+            else:
+                #the pareto front of the selected population is the part of the first front kept by select
+                pareto_front = [(i, self.population[i]) for i in self.pareto_keys]
             inds_par, rwd_par=[i[1][0] for i in pareto_front], [i[1][2] for i in pareto_front]
             self.best_scores.append(rwd_par)
+            if self.metrics is not None:
+                self.es_hist['metrics'].append(self.metrics.update(-np.array(rwd_par) if self.mode == 'min' else np.array(rwd_par)))
             
             if self.grid_flag:
                 temp_indvs = []
@@ -367,5 +385,8 @@ class NSGAIII(ES):
         self.es_hist['local_fitness'] = self.best_scores # full history of pareto front
         self.es_hist['local_pop'] = self.best_indvs
         
+        if evaluator is None:
+            self.evaluator.close()
+
         return self.x_opt_correct, self.y_opt_correct, self.es_hist
     
\ No newline at end of file
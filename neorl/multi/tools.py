@@ -50,6 +50,83 @@ def isDominated(wvalues1, wvalues2):
             not_equal = True
     return not_equal
 
+def dominanceMatrix(fitnesses):
+    """
+    
+    Vectorized pairwise dominance between the rows of *fitnesses*.
+    
+    :param fitnesses: (np.ndarray) (n, m) matrix of the weighted fitness values (higher is better)
+    :Returns dominates: (np.ndarray) (n, n) boolean matrix, ``dominates[i, j]`` is `True` if row i dominates row j
+    
+    """
+    n, m = fitnesses.shape
+    dominates = np.empty((n, n), dtype=bool)
+    # process the rows by blocks to bound the size of the temporary (block, n) arrays
+    block = max(1, 2**22 // max(1, n))
+    for start in range(0, n, block):
+        fi = fitnesses[start:start+block]
+        geq = np.ones((fi.shape[0], n), dtype=bool)
+        gt = np.zeros((fi.shape[0], n), dtype=bool)
+        for j in range(m):
+            geq &= fi[:, j, np.newaxis] >= fitnesses[:, j]
+            gt |= fi[:, j, np.newaxis] > fitnesses[:, j]
+        dominates[start:start+block] = geq & gt
+    return dominates
+
+def nondominatedRanks(fitnesses, k=None):
+    """
+    
+    Array-based non-dominated sorting: returns the index of the front of each individual.
+    
+    :param fitnesses: (np.ndarray) (n, m) matrix of the weighted fitness values (higher is better)
+    :param k: (int) stop once at least *k* individuals are ranked, if None all individuals are ranked
+    :Returns ranks: (np.ndarray) front index of each individual, 0 for the non-dominated front 
+        and ``n`` for the individuals which are not ranked because of *k*
+    .. 
+
+    reference: [Deb2002] Deb, Pratab, Agarwal, and Meyarivan, "A fast elitist
+    non-dominated sorting genetic algorithm for multi-objective
+    optimization: NSGA-II", 2002.
+    """
+    fitnesses = np.asarray(fitnesses, dtype=float)
+    n = fitnesses.shape[0]
+    ranks = np.full(n, n, dtype=int)
+    k = n if k is None else min(k, n)
+    if k <= 0:
+        return ranks
+
+    dominates = dominanceMatrix(fitnesses)
+    # number of individuals dominating each individual
+    counts = dominates.sum(axis=0)
+    front = np.flatnonzero(counts == 0)
+    rank, pareto_sorted = 0, 0
+    while front.size > 0:
+        ranks[front] = rank
+        pareto_sorted += front.size
+        if pareto_sorted >= k:
+            break
+        # remove the current front and rank the next one
+        counts -= dominates[front].sum(axis=0)
+        counts[front] = -1
+        front = np.flatnonzero(counts == 0)
+        rank += 1
+    return ranks
+
+def ranksToFronts(pop, ranks):
+    """
+    Group the items of *pop* by front.
+    
+    :param pop: (list) list of (key, individual) items
+    :param ranks: (np.ndarray) front index of each item from ``nondominatedRanks``
+    :Returns pareto_front: (list) A list of Pareto fronts, the first list includes nondominated pop.
+    """
+    nfronts = np.max(ranks[ranks < len(pop)], initial=-1) + 1
+    fronts = [[] for _ in range(nfronts)]
+    for ind, rank in zip(pop, ranks):
+        if rank < nfronts:
+            fronts[rank].append(ind)
+    return fronts
+
 def sortNondominated(pop, k, first_front_only=False):
     """
     Sort the first *k* *pop* into different nondomination levels.
@@ -68,51 +145,9 @@ def sortNondominated(pop, k, first_front_only=False):
         return []
 
     pop=list(pop.items())
-
-    map_fit_ind = defaultdict(list)
-    for ind in pop:
-        map_fit_ind[ind[0]].append(ind)
-    fits = list(map_fit_ind.keys())
-
-    current_front = []
-    next_front = []
-    dominating_fits = defaultdict(int)
-    dominated_fits = defaultdict(list)
-
-    # Rank first Pareto front
-    for i, fit_i in enumerate(fits):
-        for fit_j in fits[i+1:]:
-            if isDominated(map_fit_ind[fit_j][0][1][2], map_fit_ind[fit_i][0][1][2]):
-                dominating_fits[fit_j] += 1
-                dominated_fits[fit_i].append(fit_j)
-            elif isDominated(map_fit_ind[fit_i][0][1][2], map_fit_ind[fit_j][0][1][2]):
-                dominating_fits[fit_i] += 1
-                dominated_fits[fit_j].append(fit_i)
-        if dominating_fits[fit_i] == 0:
-            current_front.append(fit_i)
-
-    fronts = [[]]
-    for fit in current_front:
-        fronts[-1].extend(map_fit_ind[fit])
-    pareto_sorted = len(fronts[-1])
-
-    # Rank the next front until all pop are sorted or
-    # the given number of individual are sorted.
-    if not first_front_only:
-        N = min(len(pop), k)
-        while pareto_sorted < N:
-            fronts.append([])
-            for fit_p in current_front:
-                for fit_d in dominated_fits[fit_p]:
-                    dominating_fits[fit_d] -= 1
-                    if dominating_fits[fit_d] == 0:
-                        next_front.append(fit_d)
-                        pareto_sorted += len(map_fit_ind[fit_d]) # add element to the next solution
-                        fronts[-1].extend(map_fit_ind[fit_d])
-            current_front = next_front
-            next_front = []
-
-    return fronts
+    fitnesses = np.array([ind[1][2] for ind in pop], dtype=float)
+    ranks = nondominatedRanks(fitnesses, 1 if first_front_only else k)
+    return ranksToFronts(pop, ranks)
 
 #######################################
 # Generalized Reduced runtime ND sort #
@@ -448,17 +483,23 @@ def associate_to_niche(fitnesses, reference_points, best_point, intercepts):
     # Normalize by ideal point and intercepts
     fn = (fitnesses - best_point) / (intercepts - best_point)
 
-    # Create distance matrix
-    fn = np.repeat(np.expand_dims(fn, axis=1), len(reference_points), axis=1)
-    norm = np.linalg.norm(reference_points, axis=1)
-
-    distances = np.sum(fn * reference_points, axis=2) / norm.reshape(1, -1)
-    distances = distances[:, :, np.newaxis] * reference_points[np.newaxis, :, :] / norm[np.newaxis, :, np.newaxis]
-    distances = np.linalg.norm(distances - fn, axis=2)
-
-    # Retrieve min distance niche index
-    niches = np.argmin(distances, axis=1)
-    distances = distances[range(niches.shape[0]), niches]
+    # Unit vectors of the reference directions
+    units = reference_points / np.linalg.norm(reference_points, axis=1)[:, np.newaxis]
+
+    # Squared perpendicular distance to each reference line |fn|^2 - (fn.u)^2, computed
+    # with a matrix product on blocks of individuals to bound the (block, nrefs) matrix
+    n = fn.shape[0]
+    fn_sq = np.sum(fn * fn, axis=1)
+    niches = np.empty(n, dtype=np.int64)
+    distances = np.empty(n)
+    block = max(1, 2**22 // max(1, len(units)))
+    for start in range(0, n, block):
+        proj = np.dot(fn[start:start+block], units.T)
+        dist_sq = fn_sq[start:start+block, np.newaxis] - proj * proj
+        # Retrieve min distance niche index
+        idx = np.argmin(dist_sq, axis=1)
+        niches[start:start+block] = idx
+        distances[start:start+block] = np.sqrt(np.maximum(dist_sq[np.arange(idx.shape[0]), idx], 0))
     return niches, distances
 
 
@@ -476,37 +517,42 @@ def niching(pop, k, niches, distances, niche_counts):
     :Returns selected: (list) remaining individual to complete the population
     """
     selected = []
-    available = np.ones(len(pop), dtype=np.bool)
+    available = np.ones(len(pop), dtype=bool)
+    niche_order = np.zeros(len(niche_counts), dtype=np.int64)
     while len(selected) < k:
         # Maximum number of individuals (niches) to select in that round
         n = k - len(selected)
 
         # Find the available niches and the minimum niche count in them
-        available_niches = np.zeros(len(niche_counts), dtype=np.bool)
-        available_niches[np.unique(niches[available])] = True
+        available_niches = np.zeros(len(niche_counts), dtype=bool)
+        available_niches[niches[available]] = True
         min_count = np.min(niche_counts[available_niches])
 
         # Select at most n niches with the minimum count
         selected_niches = np.flatnonzero(np.logical_and(available_niches, niche_counts == min_count))
         np.random.shuffle(selected_niches)
         selected_niches = selected_niches[:n]
-
-        for niche in selected_niches:
-            # Select from available individuals in niche
-            niche_individuals = np.flatnonzero(np.logical_and(niches == niche, available))
-            np.random.shuffle(niche_individuals)
-
-            # If no individual in that niche, select the closest to reference
-            # Else select randomly
-            if niche_counts[niche] == 0:
-                sel_index = niche_individuals[np.argmin(distances[niche_individuals])]
-            else:
-                sel_index = niche_individuals[0]
-
-            # Update availability, counts and selection
-            available[sel_index] = False
-            niche_counts[niche] += 1
-            selected.append(pop[sel_index])
+        niche_order[selected_niches] = np.arange(selected_niches.shape[0])
+
+        # Candidates are the available individuals in the selected niches
+        in_niche = np.zeros(len(niche_counts), dtype=bool)
+        in_niche[selected_niches] = True
+        candidates = np.flatnonzero(np.logical_and(available, in_niche[niches]))
+        cand_niches = niches[candidates]
+
+        # If no individual in that niche, select the closest to reference
+        # Else select randomly: pick the first candidate of each niche by (niche, key)
+        key = np.where(niche_counts[cand_niches] == 0, distances[candidates], np.random.random(candidates.shape[0]))
+        order = np.lexsort((key, niche_order[cand_niches]))
+        candidates, cand_niches = candidates[order], cand_niches[order]
+        first = np.ones(candidates.shape[0], dtype=bool)
+        first[1:] = cand_niches[1:] != cand_niches[:-1]
+        sel_index = candidates[first]
+
+        # Update availability, counts and selection
+        available[sel_index] = False
+        niche_counts[cand_niches[first]] += 1
+        selected.extend(pop[i] for i in sel_index)
 
     return selected
 
@@ -558,22 +604,19 @@ def assignCrowdingDist(pop):
     """
     if len(pop) == 0:
         return
-    CrowdDist = {}
-    distances = [0.0] * len(pop)
-    crowd = [(ind[1][2], i) for i, ind in enumerate(pop)]
-
-    nobj = len(pop[0][1][2])
+    fitnesses = np.array([ind[1][2] for ind in pop], dtype=float)
+    n, nobj = fitnesses.shape
 
+    # Sort each objective column (ties keep the order of the previous objective),
+    # the boundary individuals get an infinite distance
+    distances = np.zeros(n)
+    order = np.arange(n)
     for i in range(nobj):
-        crowd.sort(key=lambda element: element[0][i])
-        distances[crowd[0][1]] = float("inf")
-        distances[crowd[-1][1]] = float("inf")
-        if crowd[-1][0][i] == crowd[0][0][i]:
+        order = order[np.argsort(fitnesses[order, i], kind='stable')]
+        distances[order[[0, -1]]] = np.inf
+        norm = nobj * (fitnesses[order[-1], i] - fitnesses[order[0], i])
+        if norm == 0:
             continue
-        norm = nobj * float(crowd[-1][0][i] - crowd[0][0][i])
-        for prev, cur, next in zip(crowd[:-2], crowd[1:-1], crowd[2:]):
-            distances[cur[1]] += (next[0][i] - prev[0][i]) / norm
+        distances[order[1:-1]] += (fitnesses[order[2:], i] - fitnesses[order[:-2], i]) / norm
 
-    for i, dist in enumerate(distances):
-        CrowdDist[pop[i][0]] = dist
-    return CrowdDist
\ No newline at end of file
+    return {ind[0]: dist for ind, dist in zip(pop, distances)}
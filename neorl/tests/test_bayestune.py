@@ -0,0 +1,25 @@
+from neorl.tune import BAYESTUNE
+
+def test_bayestune():
+    
+    #cheap function of three hyperparameters of mixed types
+    def tune_fit(x1, x2, x3):
+        return (x1-0.3)**2 + (x2-2)**2 + (0 if x3 == 'a' else 1)
+    
+    param_grid={
+    'x1': ['float', -1, 1],
+    'x2': ['int', 0, 5],
+    'x3': ['grid', ('a', 'b')]}
+    
+    #one Gaussian process shared by two asynchronous processes
+    btune=BAYESTUNE(param_grid=param_grid, fit=tune_fit, mode='min', ncases=11, seed=1)
+    bayesres=btune.tune(ncores=2, verbose=True, parallel='shared')
+    assert len(bayesres) == 22
+    print(bayesres.sort_values(['score'], axis='index', ascending=True).head())
+    
+    #more processors than the initial random cases, the first lies wait for a told result
+    btune=BAYESTUNE(param_grid=param_grid, fit=tune_fit, mode='max', ncases=11, seed=1)
+    bayesres=btune.tune(ncores=11, verbose=False, parallel='shared')
+    assert len(bayesres) == 121
+
+test_bayestune()
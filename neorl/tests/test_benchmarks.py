@@ -3,6 +3,7 @@ import neorl.benchmarks.cec17 as functions    #import all cec17 functions
 import neorl.benchmarks.classic as classics   #import all classical functions
 from neorl.benchmarks.classic import ackley, levy, bohachevsky  #import specific functions
 from neorl.benchmarks.cec17 import f3, f10, f21  #import cec17 specific functions 
+from neorl.benchmarks.cec17 import CEC17Suite  #import the cec17 batch evaluator
 from neorl.benchmarks import bench_2dplot   #import the built-in plotter
 
 def test_benchmarks():
@@ -24,5 +25,15 @@ def test_benchmarks():
         sample = np.random.uniform(low=-10, high=10, size=d2)
         y = f(sample)
         print('Function: {}, x={}, y={}'.format(f.__name__, np.round(sample,2), np.round(y,2)))
+    
+    print('------------------------------------------------------')
+    print('CEC2017 Batch Evaluation')
+    print('------------------------------------------------------')
+    pop = np.random.uniform(low=-10, high=10, size=(5, d2))
+    for f in functions.all_functions:
+        suite = CEC17Suite(f, dim=d2)
+        y = suite(pop)
+        assert np.allclose(y, [f(x.copy()) for x in pop], equal_nan=True)
+        print('Function: {}, y={}'.format(suite.__name__, np.round(y,2)))
 
 test_benchmarks()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import random
+import numpy as np
+from neorl.hybrid.pesacore.er import ExperienceReplay
+
+def test_er():
+    #reference: the list memory, the oldest sample is overwritten and duplicates are skipped
+    size=20
+    ref=[]
+    next_indx=0
+    def ref_add(sample):
+        nonlocal next_indx
+        if sample not in ref:
+            if next_indx >= len(ref):
+                ref.append(sample)
+            else:
+                ref[next_indx]=sample
+            next_indx=(next_indx + 1) % size
+    
+    rng=random.Random(5)
+    def draw():
+        x=[rng.randint(0,3) for _ in range(3)]   #small space, many duplicates
+        return x, float(x[0] + 10*x[1] + 100*x[2])   #unique objective of every x
+    
+    er=ExperienceReplay(size=size)
+    for step in range(40):
+        if step % 2:   #single sample
+            x, o=draw()
+            er.add(xvec=x, obj=o, method='es')
+            ref_add((x, o, 'es'))
+        else:   #batch of samples
+            batch=[draw() for _ in range(4)]
+            er.add(xvec=[x for x, o in batch], obj=[o for x, o in batch], method=['es']*4)
+            for x, o in batch:
+                ref_add((x, o, 'es'))
+        assert er.storage == ref and er.n_samples == len(ref)
+    assert er.memory_is_full()
+    
+    #greedy and prioritized samples follow the memory sorted from the best to the worst objective
+    best=sorted(ref, key=lambda e: e[1], reverse=True)
+    assert er.sample(batch_size=5, mode='greedy') == best[:5]
+    ranks=1/np.arange(1,size+1)
+    np.random.seed(3)
+    idxs=np.random.choice(range(size), p=ranks**0.5/np.sum(ranks**0.5), size=10)
+    assert er.sample(batch_size=10, mode='prior', alpha=0.5, seed=3) == [best[i] for i in idxs]
+
+test_er()
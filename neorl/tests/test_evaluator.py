@@ -0,0 +1,34 @@
+from neorl import DE, GWO
+from neorl.utils.evaluator import PoolEvaluator
+
+def test_evaluator():
+    #Define the fitness function
+    def FIT(individual):
+            """Sphere test objective function.
+                    F(x) = sum_{i=1}^d xi^2
+                    d=1,2,3,...
+                    Range: [-100,100]
+                    Minima: 0
+            """
+            y=sum(x**2 for x in individual)
+            return y
+    
+    #Setup the parameter space (d=5)
+    nx=5
+    BOUNDS={}
+    for i in range(1,nx+1):
+            BOUNDS['x'+str(i)]=['float', -100, 100]
+    
+    #one pool of workers shared by all generations and both optimizers
+    with PoolEvaluator(ncores=2) as evaluator:
+        de=DE(mode='min', bounds=BOUNDS, fit=FIT, npop=20, F=0.5, CR=0.7, ncores=2, seed=1)
+        x_best, y_best, de_hist=de.evolute(ngen=20, evaluator=evaluator, verbose=0)
+        gwo=GWO(mode='min', fit=FIT, bounds=BOUNDS, nwolves=6, ncores=2, seed=1)
+        x_best, y_best, gwo_hist=gwo.evolute(ngen=20, evaluator=evaluator, verbose=0)
+    
+    #serial and parallel DE follow the same path for the same seed
+    de=DE(mode='min', bounds=BOUNDS, fit=FIT, npop=20, F=0.5, CR=0.7, ncores=1, seed=1)
+    x_serial, y_serial, _=de.evolute(ngen=20, verbose=0)
+    assert y_serial == de_hist['global_fitness'][-1]
+
+test_evaluator()
@@ -0,0 +1,29 @@
+from neorl.tune import HBTUNE
+
+def test_hbtune():
+    
+    #cheap fitness where a larger budget reduces the noise-free score
+    def tune_fit(x1, x2, x3, budget):
+        return (x1-0.3)**2 + (x2-2)**2 + (0 if x3 == 'a' else 1) + 1.0/budget
+    
+    param_grid={
+    'x1': ['float', -1, 1],
+    'x2': ['int', 0, 5],
+    'x3': ['grid', ('a', 'b')]}
+    
+    #successive halving: 27 cases at budget 1, 9 at budget 3, 3 at budget 9, 1 at budget 27
+    shtune=HBTUNE(param_grid=param_grid, fit=tune_fit, max_budget=27, min_budget=1, eta=3, ncases=27, seed=1)
+    shres=shtune.tune(ncores=1, verbose=False)
+    assert list(shres.groupby('rung').size()) == [27, 9, 3, 1]
+    assert list(shres.groupby('rung')['budget'].first()) == [1, 3, 9, 27]
+    #the promoted case is the best of the previous rung
+    best=shres[shres['rung'] == 3].sort_values('score')['id'].iloc[0]
+    assert shres[shres['rung'] == 4]['id'].iloc[0] == best
+    
+    #Hyperband in parallel with all brackets
+    hbtune=HBTUNE(param_grid=param_grid, fit=tune_fit, max_budget=9, min_budget=1, eta=3, mode='min', seed=1)
+    hbres=hbtune.tune(ncores=2, verbose=True)
+    assert list(hbres.groupby('bracket').size()) == [9+3+1, 5+1, 3]
+    print(hbres[hbres['budget'] == 9].sort_values(['score']))
+
+test_hbtune()
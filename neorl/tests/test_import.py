@@ -0,0 +1,14 @@
+import sys
+import subprocess
+
+def test_import():
+    #cold start of a fresh interpreter importing one evolutionary algorithm
+    code=("import sys, time; t0=time.time(); from neorl import DE; t=time.time()-t0; "
+          "print(round(t,3), 'tensorflow' in sys.modules, 'neorl.rl' in sys.modules)")
+    out=subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    t, tf_loaded, rl_loaded=out.stdout.split()[-3:]
+    print('Cold import time of `from neorl import DE`: {} s'.format(t))
+    assert tf_loaded == 'False', '--error: `from neorl import DE` imports tensorflow'
+    assert rl_loaded == 'False', '--error: `from neorl import DE` imports the RL baselines'
+
+test_import()
@@ -0,0 +1,39 @@
+import numpy as np
+from neorl import NSGAII
+from neorl.benchmarks.dtlz import DTLZ2
+from neorl.multi.metrics import hypervolume, igd, gd, ParetoMetrics
+from neorl.multi.tools import uniform_reference_points
+
+def test_metrics():
+    #exact hypervolumes
+    assert np.isclose(hypervolume([[0,1],[1,0]], ref_point=[2,2]), 3.0)
+    assert np.isclose(hypervolume([[0,0.5,0],[0.5,0,0.5]], ref_point=[1,1,1]), 0.625)
+    assert np.isclose(hypervolume([[0,-1],[-1,0]], ref_point=[-2,-2], mode='max'), 3.0)
+    #Monte Carlo estimate of a unit box in 4 objectives
+    assert np.isclose(hypervolume([[0,0,0,0],[0.5,0.5,0.5,0.5]], ref_point=[1,1,1,1], n_samples=20000, seed=1), 1.0)
+    
+    #IGD/GD against the true front of DTLZ2
+    NOBJ=3
+    nx=12
+    problem=DTLZ2(n_var=nx, n_obj=NOBJ)
+    true_front=problem.pareto_front(np.array(uniform_reference_points(nobj=NOBJ, p=12)))
+    assert igd(true_front, true_front) == 0 and gd(true_front, true_front) == 0
+    
+    BOUNDS={}
+    for i in range(1,nx+1):
+        BOUNDS['x'+str(i)]=['float', 0, 1]
+    
+    metrics=ParetoMetrics(mode='min', ref_point=[2,2,2], true_front=true_front)
+    nsgaii=NSGAII(mode='min', bounds=BOUNDS, fit=problem.evaluate, lambda_=92, mutpb=0.1,
+         cxmode='blend', cxpb=0.8, ncores=1, seed=1, metrics=metrics)
+    x_best, y_best, es_hist=nsgaii.evolute(ngen=10, verbose=0)
+    
+    #the incremental tracker matches the direct computation on the last front
+    assert len(es_hist['metrics']) == 10
+    last=es_hist['local_fitness'][-1]
+    assert np.isclose(es_hist['metrics'][-1]['hypervolume'], hypervolume(last, ref_point=[2,2,2]))
+    assert np.isclose(es_hist['metrics'][-1]['igd'], igd(last, true_front))
+    assert np.isclose(es_hist['metrics'][-1]['gd'], gd(last, true_front))
+    print(es_hist['metrics'][-1])
+
+test_metrics()
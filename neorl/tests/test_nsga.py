@@ -20,6 +20,11 @@ def test_nsga():
          cxmode='blend', cxpb=0.8, sorting = 'log',ncores=1,seed=1)
     x_best2, y_best2, es_hist2=nsgaii.evolute(ngen=10, verbose=1)
 
+    #NSGA-II with the array-based non-dominated sorting
+    nsgaii=NSGAII(mode='min', bounds=BOUNDS, fit=dtlz2, lambda_=lambda_, mutpb=0.1,
+         cxmode='blend', cxpb=0.8, sorting = 'standard',ncores=1,seed=1)
+    x_best3, y_best3, es_hist3=nsgaii.evolute(ngen=10, verbose=0)
+
     nsgaiii=NSGAIII(mode='min', bounds=BOUNDS, fit=dtlz2, lambda_=lambda_, mutpb=0.1,
          cxmode='blend', cxpb=0.8, ncores=1, p = nx ,sorting = 'log',seed=1)
     x_best, y_best, es_hist=nsgaiii.evolute(ngen=10, verbose=1)
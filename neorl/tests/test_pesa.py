@@ -24,4 +24,16 @@ def test_pesa():
     x0=[[50,50,50,50,50] for i in range(npop)]  #initial guess
     x_best, y_best, pesa_hist=pesa.evolute(ngen=50, x0=x0, verbose=1)
 
-test_pesa()
\ No newline at end of file
+def test_pesa_workers():
+    #ncores > 3 runs ES, SA, and PSO in long-lived worker processes
+    def FIT(individual):
+            return sum(x**2 for x in individual)
+    
+    BOUNDS={'x'+str(i): ['float', -100, 100] for i in range(1,6)}
+    pesa=PESA(mode='min', bounds=BOUNDS, fit=FIT, npop=20, mu=10, ncores=4, seed=1)
+    assert pesa.PROC
+    x_best, y_best, pesa_hist=pesa.evolute(ngen=5, warmup=50, verbose=0)
+    assert len(x_best) == 5 and y_best == FIT(x_best)
+
+test_pesa()
+test_pesa_workers()
\ No newline at end of file
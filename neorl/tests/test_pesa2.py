@@ -21,4 +21,16 @@ def test_pesa2():
     pesa2=PESA2(mode='min', bounds=BOUNDS, fit=FIT, npop=50, nwolves=5, nwhales=5, ncores=1)
     x_best, y_best, pesa2_hist=pesa2.evolute(ngen=50, replay_every=2, verbose=2)
 
-test_pesa2()
\ No newline at end of file
+def test_pesa2_workers():
+    #ncores > 3 runs GWO, DE, and WOA in long-lived worker processes
+    def FIT(individual):
+            return sum(x**2 for x in individual)
+    
+    BOUNDS={'x'+str(i): ['float', -100, 100] for i in range(1,6)}
+    pesa2=PESA2(mode='min', bounds=BOUNDS, fit=FIT, npop=20, nwolves=5, nwhales=5, ncores=4, seed=1)
+    assert pesa2.PROC
+    x_best, y_best, pesa2_hist=pesa2.evolute(ngen=5, replay_every=2, verbose=0)
+    assert len(x_best) == 5 and y_best == FIT(x_best)
+
+test_pesa2()
+test_pesa2_workers()
\ No newline at end of file
@@ -0,0 +1,20 @@
+from neorl.hybrid.pesax import PESAX
+
+def test_pesax():
+    #Define the fitness function
+    def FIT(individual):
+            return sum(x**2 for x in individual)
+    
+    BOUNDS={'x'+str(i): ['float', -100, 100] for i in range(1,6)}
+    
+    #serial modules
+    pesax=PESAX(mode='min', bounds=BOUNDS, fit=FIT, npop=20, ncores=1, seed=1)
+    x_best, y_best, pesax_hist=pesax.evolute(ngen=5, warmup=50, verbose=0)
+    
+    #ncores > 3 runs DE, ES, and PSO in long-lived worker processes
+    pesax=PESAX(mode='min', bounds=BOUNDS, fit=FIT, npop=20, ncores=4, seed=1)
+    assert pesax.PROC
+    x_best, y_best, pesax_hist=pesax.evolute(ngen=5, warmup=50, verbose=0)
+    assert len(x_best) == 5 and y_best == FIT(x_best)
+
+test_pesax()
@@ -1,4 +1,6 @@
 from neorl import SA
+import numpy as np
+from neorl.utils.evaluator import PoolEvaluator
 import random
 
 def test_sa():
@@ -63,5 +65,35 @@ def test_psa():
           move_func=my_move, reinforce_best='soft', cooling='equilibrium', ncores=8, seed=1)
     x_best, y_best, sa_hist=sa.evolute(ngen=100, verbose=1)
     
+def test_specsa():
+    #speculative SA: one chain proposes 4 moves per step, evaluated by a pool of 4 workers
+    def FIT(individual):
+        return sum(x**2 for x in individual)
+    
+    BOUNDS={'x'+str(i):['float', -100, 100] for i in range(1,6)}
+    sa=SA(mode='min', bounds=BOUNDS, fit=FIT, chain_size=20, chi=0.5, Tmax=10000, 
+          nspec=4, ncores=1, seed=1)
+    with PoolEvaluator(ncores=4) as evaluator:
+        x_best, y_best, sa_hist=sa.evolute(ngen=50, evaluator=evaluator)
+    assert len(sa_hist['fitness']) == 50 and y_best == FIT(x_best)
+    
+    #speculative moves of parallel chains are evaluated in one batch
+    sa=SA(mode='min', bounds=BOUNDS, fit=FIT, chain_size=20, cooling='equilibrium', 
+          nspec=3, ncores=2, seed=1)
+    x_best, y_best, sa_hist=sa.evolute(ngen=20)
+    
+def test_ptsa():
+    #parallel tempering: 4 chains on a temperature ladder between Tmin and Tmax exchange their states
+    def FIT(individual):
+        return sum(x**2 - 10*np.cos(2*np.pi*x) + 10 for x in individual)
+    
+    BOUNDS={'x'+str(i):['float', -5.12, 5.12] for i in range(1,6)}
+    sa=SA(mode='min', bounds=BOUNDS, fit=FIT, chain_size=50, chi=0.3, Tmax=5, Tmin=0.05, 
+          cooling='tempering', ncores=4, seed=1)
+    x_best, y_best, sa_hist=sa.evolute(ngen=80, verbose=1)
+    assert len(sa_hist['swap']) == 20 and np.allclose(sa.ladder[0], 0.05) and np.allclose(sa.ladder[-1], 5)
+    
 test_sa()
-test_psa()
\ No newline at end of file
+test_psa()
+test_specsa()
+test_ptsa()
\ No newline at end of file
@@ -0,0 +1,47 @@
+import os
+import numpy as np
+from neorl.utils.streamstats import EpochStats, CSVTail, CSVWriter, BackgroundPlotter
+
+def test_streamstats():
+    #streaming statistics match the full-history statistics per epoch
+    data=np.random.RandomState(1).normal(size=1003)
+    N=10
+    stats=EpochStats(N, window=100)
+    for item in data:
+        stats.update(item)
+    ravg, rstd, rmax, rmin=stats.summary()
+    assert len(ravg) == int(np.ceil(len(data)/N))
+    assert np.allclose(ravg, [np.mean(data[i:i+N]) for i in range(0,len(data),N)])
+    assert np.allclose(rstd, [np.std(data[i:i+N]) for i in range(0,len(data),N)])
+    assert np.allclose(rmax, [np.max(data[i:i+N]) for i in range(0,len(data),N)])
+    assert np.allclose(rmin, [np.min(data[i:i+N]) for i in range(0,len(data),N)])
+    assert np.isclose(stats.window_mean(), np.mean(data[-100:]))
+    
+    #append-only csv: the tail reader only returns the new complete rows
+    csvname='streamstats_out.csv'
+    writer=CSVWriter(csvname, ['caseid', 'reward'])
+    tail=CSVTail(csvname)
+    writer.write([1, 0.5])
+    writer.write([2, 1.5])
+    assert tail.read() == [['1', '0.5'], ['2', '1.5']] and tail.columns == ['caseid', 'reward']
+    assert tail.read() == []
+    writer.file.write('3,2.5\n4,')   #partially written row
+    writer.file.flush()
+    assert tail.read() == [['3', '2.5']]
+    writer.file.write('0.5\ncase1,1.0\n')   #non-numeric caseid is kept as a string
+    writer.file.flush()
+    rows=tail.read()
+    assert rows == [['4', '0.5'], ['case1', '1.0']]
+    assert [float(row[tail.columns.index('reward')]) for row in rows] == [0.5, 1.0]
+    writer.close()
+    os.remove(csvname)
+    
+    #background plotting keeps the latest request
+    out=[]
+    plotter=BackgroundPlotter()
+    for i in range(5):
+        plotter.submit(out.append, i)
+    plotter.close()
+    assert out[-1] == 4
+
+test_streamstats()
@@ -1,4 +1,5 @@
 from neorl import TS
+import numpy as np
 
 def test_ts():
     #Define the fitness function
@@ -25,4 +26,32 @@ def test_ts():
           penalization_weight = 0.8, swap_mode = "perturb", ncores=1, seed=1)
     x_best, y_best, ts_hist=ts.evolute(ngen = 700, x0=x0, verbose=0)
 
-test_ts
\ No newline at end of file
+def test_tsp_ts():
+    #random traveling salesman problem with 40 cities
+    n=40
+    rng=np.random.default_rng(1)
+    cities=rng.random((n,2))
+    dist=np.sqrt(((cities[:,None,:]-cities[None,:,:])**2).sum(axis=2))
+    def tour(x):
+        x=np.asarray(x)-1
+        return dist[x, np.roll(x,-1)].sum()
+    
+    def delta_tour(x, move):
+        #change of the tour length when the cities at indices i and j are swapped
+        i, j=move
+        y=list(x)
+        y[i], y[j]=y[j], y[i]
+        edges=lambda z: sum(dist[z[k-1]-1, z[k]-1] + dist[z[k]-1, z[(k+1) % n]-1] for k in {i, j})
+        return edges(y) - edges(x)  #only the edges around i and j change
+    
+    BOUNDS={'x'+str(i):['int', 1, n] for i in range(n)}
+    ts=TS(mode="min", bounds=BOUNDS, fit=tour, tabu_tenure=6, swap_mode="swap", ncores=2, seed=1)
+    x_par, y_par, hist_par=ts.evolute(ngen=10)
+    ts=TS(mode="min", bounds=BOUNDS, fit=tour, delta_fit=delta_tour, tabu_tenure=6, swap_mode="swap", seed=1)
+    x_delta, y_delta, hist_delta=ts.evolute(ngen=10)
+    #the parallel, delta and serial searches follow the same moves
+    assert np.allclose(hist_par['global_fitness'], hist_delta['global_fitness'])
+    assert np.isclose(tour(x_delta), y_delta) and sorted(x_delta) == list(range(1, n+1))
+
+test_ts
+test_tsp_ts()
\ No newline at end of file
@@ -0,0 +1,22 @@
+from neorl.benchmarks import TSP
+import numpy as np
+
+def test_tsp():
+    #random traveling salesman problem with 40 cities
+    n=40
+    rng=np.random.default_rng(1)
+    cities=(rng.random((n,2))*100).tolist()
+    env=TSP(city_loc_list=cities, episode_length=2, method='dqn')
+
+    #nearest neighbor index matches the distance matrix
+    assert np.allclose(env.nearest_dist[:,0], np.min(env.dist+np.diag(np.full(n, np.inf)), axis=1))
+
+    #the partial tour cost updated by the insertion deltas matches the full recomputation
+    for t in range(n-1):
+        state, reward, done, info=env.step(int(rng.integers(0, n-t)))
+        assert len(env.tour) == t+1
+        assert env.Compute_tour_cost() == env.Compute_tour_cost(tour=env.state)
+        assert reward == env.Compute_tour_cost()*-10**3
+    assert sorted(env.tour) == sorted(int(city)-1 for city in info['x'])
+
+test_tsp()
@@ -0,0 +1,48 @@
+import os
+import time
+import shutil
+import threading
+import itertools
+from neorl.tune.runners.cases import CaseTemplate, setup_case, run_queue
+
+def test_tunecases():
+    
+    #names that contain each other are rendered in one pass
+    template=CaseTemplate('lr={lr} n={n} lr2={lr2}\nlr={lr}', ['{lr}', '{n}', '{lr2}'])
+    assert template.render([0.1, 5, '{n}']) == 'lr=0.1 n=5 lr2={n}\nlr=0.1'
+    
+    root='tunecases_test'
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs('tunecases_ext/sub', exist_ok=True)
+    with open('tunecases_ext/sub/data.txt', 'w') as fout:
+        fout.write('data')
+    casedir=setup_case(template, [0.2, 3, 'x'], 7, extfiles=['tunecases_ext'], root=root)
+    with open(os.path.join(casedir, 'case7.inp')) as fin:
+        assert fin.read() == 'lr=0.2 n=3 lr2=x\nlr=0.2'
+    assert os.path.exists(os.path.join(casedir, 'tunecases_ext', 'sub', 'data.txt'))
+    shutil.rmtree(root); shutil.rmtree('tunecases_ext')
+    
+    #the queue runs up to ncores cases at once, never more, and consumes a lazy product
+    lock=threading.Lock()
+    full=threading.Event()   #set once ncores cases are running together
+    state={'running': 0, 'peak': 0}
+    def worker(item):
+        with lock:
+            state['running']+=1
+            state['peak']=max(state['peak'], state['running'])
+            if state['running'] == 4:
+                full.set()
+        full.wait(timeout=10)   #hold the slot until the queue is full
+        time.sleep(0.01)
+        with lock:
+            state['running']-=1
+        return sum(item)
+    
+    results={}
+    cases=itertools.product(range(100), range(100), range(100), range(100))   #1e8 cases, never materialized
+    run_queue(worker, itertools.islice(cases, 50), ncores=4, callback=lambda item, res: results.update({item: res}))
+    assert len(results) == 50 and results[(0, 0, 0, 49)] == 49
+    assert state['peak'] == 4
+
+test_tunecases()
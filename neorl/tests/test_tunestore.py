@@ -0,0 +1,46 @@
+import os
+from neorl.tune import GRIDTUNE, RANDTUNE
+
+def test_tunestore():
+    
+    calls=[]
+    def tune_fit(x1, x2, x3):
+        calls.append((x1, x2, x3))
+        return x1 + x2 + (0 if x3 == 'a' else 1)
+    
+    dbname='tunestore_test.db'
+    if os.path.exists(dbname):
+        os.remove(dbname)
+    
+    #the first tune fills the store
+    gtune=GRIDTUNE(param_grid={'x1': [1, 2, 3], 'x2': [0.5, 1.5], 'x3': ['a', 'b']}, fit=tune_fit)
+    gridres=gtune.tune(ncores=1, csvname='tunestore_test.csv', store=dbname)
+    assert len(calls) == 12
+    
+    #a restarted tune with a larger grid only evaluates the new cases
+    gtune=GRIDTUNE(param_grid={'x1': [1, 2, 3, 4], 'x2': [0.5, 1.5], 'x3': ['a', 'b']}, fit=tune_fit)
+    gridres2=gtune.tune(ncores=1, csvname='tunestore_test.csv', store=dbname, verbose=False)
+    assert len(calls) == 16   #only the 4 new cases are evaluated
+    assert list(gridres2['score'][:12]) == list(gridres['score'])
+    assert len(gridres2) == 16 and gridres2['score'].notnull().all()
+    
+    #duplicated random samples are evaluated once
+    calls.clear()
+    rtune=RANDTUNE(param_grid={'x1': ['int', 1, 2], 'x2': ['grid', (0.5, 1.5)], 'x3': ['grid', ('a', 'b')]}, 
+                   fit=tune_fit, ncases=30, seed=1)
+    randres=rtune.tune(ncores=1, csvname='tunestore_test.csv', verbose=False)
+    assert len(calls) == len(set(calls)) == len(set(rtune.hyperparameter_cases))
+    assert len(randres) == 30
+    #every case has its row in the csv logger, duplicates included
+    with open('tunestore_test.csv') as fin:
+        assert len(fin.read().splitlines()) == 31
+    
+    #a parallel restart skips the stored cases as well
+    gtune=GRIDTUNE(param_grid={'x1': [1, 2, 3, 4], 'x2': [0.5, 1.5], 'x3': ['a', 'b']}, fit=tune_fit)
+    gridres3=gtune.tune(ncores=2, store=dbname, verbose=False)
+    assert list(gridres3['score']) == list(gridres2['score'])
+    
+    os.remove(dbname)
+    os.remove('tunestore_test.csv')
+
+test_tunestore()
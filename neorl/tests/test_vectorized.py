@@ -0,0 +1,34 @@
+from neorl import DE, PSO, GWO, PESA
+import numpy as np
+
+def test_vectorized():
+    #Define the vectorized fitness function (one call for the whole population)
+    def FIT(pop):
+            """Sphere test objective function.
+                    F(x) = sum_{i=1}^d xi^2
+                    d=1,2,3,...
+                    Range: [-100,100]
+                    Minima: 0
+            """
+            return np.sum(pop**2, axis=1)
+    
+    #Setup the parameter space (d=5)
+    nx=5
+    BOUNDS={}
+    for i in range(1,nx+1):
+            BOUNDS['x'+str(i)]=['float', -100, 100]
+    
+    de=DE(mode='min', bounds=BOUNDS, fit=FIT, npop=20, vectorized=True, seed=1)
+    x_best, y_best, de_hist=de.evolute(ngen=50, verbose=0)
+    assert abs(y_best - sum(np.array(x_best)**2)) < 1e-8
+    
+    pso=PSO(mode='min', bounds=BOUNDS, fit=FIT, npar=20, vectorized=True, seed=1)
+    x_best, y_best, pso_hist=pso.evolute(ngen=50, verbose=0)
+    
+    gwo=GWO(mode='min', bounds=BOUNDS, fit=FIT, nwolves=10, vectorized=True, seed=1)
+    x_best, y_best, gwo_hist=gwo.evolute(ngen=50, verbose=0)
+    
+    pesa=PESA(mode='min', bounds=BOUNDS, fit=FIT, npop=10, vectorized=True, seed=1)
+    x_best, y_best, pesa_hist=pesa.evolute(ngen=10, warmup=20, verbose=0)
+
+test_vectorized()
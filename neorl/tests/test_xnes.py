@@ -23,4 +23,13 @@ def test_xnes():
               eta_sigma=0.25, adapt_sampling=True, ncores=1, seed=1)
     x_best, y_best, xnes_hist=xnes.evolute(ngen=100, x0=[25,25,25,25,25], verbose=1)
     
+    #separable and low-rank modes for high-dimensional problems (d=500)
+    nx=500
+    BOUNDS={'x'+str(i):['float', -100, 100] for i in range(1,nx+1)}
+    for covariance in ['separable', 'lowrank']:
+        xnes=XNES(mode='min', bounds=BOUNDS, fit=FIT, covariance=covariance, rank=3, 
+                  adapt_sampling=True, ncores=1, seed=1)
+        x_best, y_best, xnes_hist=xnes.evolute(ngen=200, x0=[25]*nx)
+        assert len(xnes_hist['sigma']) == 200 and y_best < 25**2*nx
+    
 test_xnes()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from neorl.tune.gridtune import GRIDTUNE
 from neorl.tune.bayestune import BAYESTUNE
 from neorl.tune.estune import ESTUNE
-from neorl.tune.randtune import RANDTUNE
\ No newline at end of file
+from neorl.tune.randtune import RANDTUNE
+from neorl.tune.hbtune import HBTUNE
\ No newline at end of file
@@ -25,12 +25,18 @@ import numpy as np
 import pandas as pd
 import joblib
 import matplotlib.pyplot as plt
+from concurrent.futures import wait, FIRST_COMPLETED
+from joblib.externals.loky import ProcessPoolExecutor
 
 # Scikit-optimise
-from skopt import gp_minimize
+from skopt import gp_minimize, Optimizer
 from skopt.space import Integer, Real, Categorical
 from skopt.utils import use_named_args
 
+def _run_case(fit, names, x, sign):
+    #evaluate one hyperparameter case in a worker of the shared search
+    return sign*fit(**dict(zip(names, x)))
+
 class BAYESTUNE:
     """
     A module for Bayesian search for hyperparameter tuning
@@ -117,6 +123,52 @@ class BAYESTUNE:
         
         return search_result.x_iters, list(search_result.func_vals)
     
+    def propose(self, opt, pending):
+        #propose the next case while the cases in ``pending`` are still running (constant liar):
+        #a copy of the model is told a fake score for every pending case so the new case is different
+        #no lie before the first result is told (e.g. ncores > n_initial_points), the initial cases are random anyway
+        if not pending or not opt.yi or len(opt.yi) + len(pending) < self.n_initial_points:
+            return opt.ask()
+        if self.liar == 'cl_min':
+            lie=np.min(opt.yi)
+        elif self.liar == 'cl_mean':
+            lie=np.mean(opt.yi)
+        else:
+            lie=np.max(opt.yi)
+        believer=opt.copy(random_state=opt.rng)
+        believer.tell(pending, [lie]*len(pending))
+        return believer.ask()
+    
+    def shared_search(self):
+        #asynchronous parallel search with one Gaussian process shared by all cores:
+        #a new case is proposed as soon as any core is free, using all the results so far
+        opt=Optimizer(dimensions=self.dimensions, base_estimator='GP', acq_func='EI', 
+                      n_initial_points=self.n_initial_points, random_state=self.seed)
+        ntotal=self.ncores*self.ncases
+        sign=1 if self.mode=='min' else -1
+        x_iters, func_vals=[], []
+        pending={}
+        with ProcessPoolExecutor(max_workers=self.ncores) as executor:
+            while len(x_iters) < ntotal:
+                while len(pending) < self.ncores and len(x_iters) + len(pending) < ntotal:
+                    x=self.propose(opt, list(pending.values()))
+                    pending[executor.submit(_run_case, self.fit, self.param_names, x, sign)]=x
+                done, _=wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    x=pending.pop(future)
+                    y=future.result()
+                    opt.tell(x, y)
+                    x_iters.append(x)
+                    func_vals.append(y)
+                    if self.csvlogger:
+                        row=pd.DataFrame([list(x)+[sign*y]], columns=self.func_args+['score'], index=[len(x_iters)])
+                        row.index.name='id'
+                        row.to_csv(self.csvlogger, mode='w' if len(x_iters) == 1 else 'a', header=len(x_iters) == 1)
+                    if self.verbose:
+                        print('--- Case {}/{} is completed with score {}'.format(len(x_iters), ntotal, sign*y))
+        
+        return x_iters, func_vals
+    
     def plot_results(self, pngname='bayes_tune'):
         if self.mode=='max':
             plt.plot(pd.DataFrame.cummax(self.bayesres['score']), '-og')
@@ -131,28 +183,44 @@ class BAYESTUNE:
             plt.savefig(str(pngname)+'.png', dpi=200, format='png')
         plt.close()
         
-    def tune(self, ncores=1, csvname=None, verbose=True):
+    def tune(self, ncores=1, csvname=None, verbose=True, parallel='independent', liar='cl_min'):
         """
         This function starts the tuning process with specified number of processors
     
-        :param nthreads: (int) number of parallel threads (see the **Notes** section below for an important note about parallel execution)
+        :param ncores: (int) number of parallel processors (see the **Notes** section below for an important note about parallel execution)
         :param csvname: (str) the name of the csv file name to save the tuning results (useful for expensive cases as the csv file is updated directly after the case is done)
         :param verbose: (bool) whether to print updates to the screen or not
+        :param parallel: (str) parallel mode for ``ncores > 1``: ``independent`` runs ``ncores`` independent Bayesian searches, ``shared`` runs one asynchronous search where a single Gaussian process proposes a new case as soon as a processor is free
+        :param liar: (str) for ``parallel='shared'``, the fake score given to the running cases when proposing a new one (constant liar): ``cl_min``, ``cl_mean``, or ``cl_max``
         """
         self.ncores=ncores
         self.csvlogger=csvname
         self.verbose=verbose
+        self.parallel=parallel
+        self.liar=liar
+        self.n_initial_points=10   #same random initial cases as gp_minimize
+        assert self.parallel in ['independent', 'shared'], '--error: parallel must be either `independent` or `shared`, not `{}`'.format(self.parallel)
+        assert self.liar in ['cl_min', 'cl_mean', 'cl_max'], '--error: liar must be one of `cl_min`, `cl_mean`, or `cl_max`, not `{}`'.format(self.liar)
 
         if self.verbose:
             print('***************************************************************')
             print('****************Bayesian Search is Running*********************')
             print('***************************************************************')
             
-            if self.ncores > 1:
+            if self.ncores > 1 and self.parallel == 'shared':
+                print('--- Running one shared asynchronous search on {} processors'.format(self.ncores))
+                print('--- Total number of executed cases is {}*{}={} cases'.format(self.ncores,self.ncases,self.ncores*self.ncases))
+            elif self.ncores > 1:
                 print('--- Running in parallel with {} threads and {} cases per threads'.format(self.ncores, self.ncases))
                 print('--- Total number of executed cases is {}*{}={} cases'.format(self.ncores,self.ncases,self.ncores*self.ncases))
    
-        if self.ncores > 1:
+        if self.ncores > 1 and self.parallel == 'shared':
+            
+            x_vals, func_vals=self.shared_search()
+            self.bayesres=pd.DataFrame(x_vals, columns = self.func_args)
+            self.bayesres['score'] = np.array(func_vals) if self.mode=='min' else -np.array(func_vals)
+        
+        elif self.ncores > 1:
             
             with joblib.Parallel(n_jobs=self.ncores) as parallel:
                 x_vals, func_vals=zip(*parallel(joblib.delayed(self.worker)(core+1) for core in range(self.ncores)))
@@ -24,9 +24,7 @@ import logging
 import numpy as np
 import pandas as pd
 import itertools
-from multiprocessing import Pool
-import joblib
-import csv
+from neorl.tune.store import CaseStore, run_cases
 
 class GRIDTUNE:
     """
@@ -71,11 +69,6 @@ class GRIDTUNE:
                 print(case_dict)
                 print('-------------------------------------------------------------------------------------------')
             
-            if self.csvlogger:
-                with open (self.csvlogger, 'a') as csvfile:
-                    csvwriter = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator = '\n')
-                    csvwriter.writerow([case_dict[item] for item in case_dict])
-            
             return obj
         
         except Exception as e:
@@ -87,17 +80,19 @@ class GRIDTUNE:
             return 'case{}:failed'.format(caseid)
         
         
-    def tune(self, ncores=1, csvname=None, verbose=True):
+    def tune(self, ncores=1, csvname=None, verbose=True, store=None):
         """
         This function starts the tuning process with specified number of processors
     
         :param ncores: (int) number of parallel processors (see the **Notes** section below for an important note about parallel execution)
         :param csvname: (str) the name of the csv file name to save the tuning results (useful for expensive cases as the csv file is updated directly after the case is done)
         :param verbose: (bool) whether to print updates to the screen or not
+        :param store: (str) name of a SQLite file storing the finished cases, if the file exists, the cases already finished in it are not evaluated again (useful to restart an interrupted tuning)
         """
         self.ncores=ncores
         self.csvlogger=csvname
         self.verbose=verbose
+        self.store=store
 
         if self.verbose:
             print('***************************************************************')
@@ -107,29 +102,10 @@ class GRIDTUNE:
             if self.ncores > 1:
                 print('--- Running in parallel with {} cores'.format(self.ncores))
                 
-        if self.csvlogger:
-            headers=['id']  + self.param_names + ['score']
-            with open (self.csvlogger, 'w') as csvfile:
-                csvwriter = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator = '\n')
-                csvwriter.writerow(headers)
-                
-        core_lst=[]
-        for i in range (len(self.hyperparameter_cases)):
-            core_lst.append([i+1, self.hyperparameter_cases[i]])
-        
-        if self.ncores > 1:
-            #p=Pool(self.ncores)
-            #results = p.map(self.worker, core_lst)
-            #p.close()
-            #p.join()
-            
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                results=parallel(joblib.delayed(self.worker)(item) for item in core_lst)
-                
-        else:
-            results=[]
-            for item in core_lst:
-                results.append(self.worker(item))
+        #finished cases are kept in the store (written by this process only) and skipped on restart,
+        #duplicated cases are evaluated once
+        results=run_cases(tuner=self, cases=self.hyperparameter_cases, 
+                          store=CaseStore(path=self.store, param_names=self.param_names), csvlogger=self.csvlogger)
 
         gridres = pd.DataFrame(self.hyperparameter_cases, columns=self.param_names)
         gridres.index += 1
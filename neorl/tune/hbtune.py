@@ -0,0 +1,188 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+
+import logging
+import numpy as np
+import pandas as pd
+import joblib
+from neorl.tune.randtune import random_case
+from neorl.utils.seeding import set_neorl_seed
+
+class HBTUNE:
+    """
+    A module for Hyperband/successive-halving search for hyperparameter tuning.
+    Random cases are first evaluated with a small budget (e.g. few generations), then only the best
+    ``1/eta`` fraction of the cases is promoted to the next rung with ``eta`` times more budget,
+    until ``max_budget`` is reached.
+
+    :param param_grid: (dict) the type and range of each hyperparameter in a dictionary form (types are ``int/discrete`` or ``float/continuous`` or ``grid/categorical``). Example: {'x1': ['grid', [40, 50, 60, 100]], 'x2': ['float', 0.2, 0.8], 'x3': ['grid', ['blend', 'cx2point']], 'x4': ['int', 20, 80]}
+    :param fit: (function) the self-defined fitness function that includes the hyperparameters as input and algorithm score as output. The budget of the case is passed as the keyword argument ``budget``, e.g. ``fit(x1, x2, x3, x4, budget)``, where ``budget`` is typically used as ``ngen``
+    :param max_budget: (int or float) largest budget given to a case (e.g. the full ``ngen``)
+    :param min_budget: (int or float) smallest budget given to a case
+    :param eta: (int) reduction factor, only the best ``1/eta`` cases are promoted to the next rung, which has ``eta`` times more budget
+    :param mode: (str) problem type, either "min" for minimization problem or "max" for maximization
+    :param ncases: (int) number of random cases of a single successive-halving bracket, if ``None``, the full Hyperband schedule is used with brackets of different initial budgets
+    :param seed: (int) random seed for sampling reproducibility
+    """
+    def __init__(self, param_grid, fit, max_budget, min_budget=1, eta=3, mode='min', ncases=None, seed=None):
+        self.mode=mode
+        assert self.mode in ['min', 'max'], '--error: The mode entered by user is invalid, use either `min` or `max`'
+        assert eta >= 2, '--error: eta ({}) must be more than or equal 2'.format(eta)
+        assert 0 < min_budget <= max_budget, '--error: min_budget ({}) must be positive and less than or equal max_budget ({})'.format(min_budget, max_budget)
+        self.param_grid=param_grid
+        self.fit=fit
+        self.max_budget=max_budget
+        self.min_budget=min_budget
+        self.eta=eta
+        self.ncases=ncases
+        self.seed=seed
+        self.int_budget=isinstance(max_budget, (int, np.integer)) and isinstance(min_budget, (int, np.integer))
+        self.full_grid()
+
+    def full_grid(self):
+        #This function parses the param_grid and builds the brackets of the schedule
+        set_neorl_seed(self.seed)
+        self.param_types=[self.param_grid[item][0] for item in self.param_grid]
+        self.param_lst=[]
+        for i, item in enumerate(self.param_grid):
+            if self.param_types[i] in ['grid', 'categorical']:
+                self.param_lst.append(self.param_grid[item][1])
+            else:
+                self.param_lst.append(self.param_grid[item][1:])
+        self.param_names=[item for item in self.param_grid]
+
+        #number of promotions from min_budget to max_budget
+        self.s_max=int(np.floor(np.log(self.max_budget/self.min_budget)/np.log(self.eta) + 1e-9))
+        if self.ncases is not None:
+            #one successive-halving bracket starting from min_budget
+            self.brackets=[(self.s_max, self.ncases)]
+        else:
+            #Hyperband: every bracket trades the number of cases against their initial budget
+            self.brackets=[(s, int(np.ceil((self.s_max+1)/(s+1)*self.eta**s))) for s in range(self.s_max, -1, -1)]
+
+        self.hyperparameter_cases=[]
+        for s, n in self.brackets:
+            self.hyperparameter_cases.append([random_case(self.param_types, self.param_lst) for _ in range(n)])
+
+    def budget(self, s, rung):
+        #budget of the cases of a rung in a bracket with s promotions, the last rung uses max_budget
+        r=self.max_budget*self.eta**(rung-s)
+        return int(round(r)) if self.int_budget else r
+
+    def worker(self, x):
+        #This function setup a case object to pass to the Parallel pool
+
+        caseid=x[0]
+        param_vals=x[1]
+        budget=x[2]
+
+        #form the dictionary for this case
+        case_dict={}
+        case_dict['id']=caseid
+        for name, val in zip(self.param_names, param_vals):
+            case_dict[name]=val
+        case_dict['budget']=budget
+
+        try:
+            obj=self.fit(*param_vals, budget=budget)
+            case_dict['score']=obj
+            if self.verbose:
+                print('-------------------------------------------------------------------------------------------')
+                print('TUNE Case {} is completed with budget {}'.format(caseid, budget))
+                print(case_dict)
+                print('-------------------------------------------------------------------------------------------')
+
+            return obj
+
+        except Exception as e:
+            print(e)
+            logging.exception("message")
+            print('--error: case {} failed during execution'.format(caseid))
+            print('--error: {} failed'.format(case_dict))
+
+            return 'case{}:failed'.format(caseid)
+
+    def rank_key(self, score):
+        #sorting key of a score, failed cases are ranked last
+        try:
+            score=float(score)
+        except (TypeError, ValueError):
+            return np.inf
+        if np.isnan(score):
+            return np.inf
+        return score if self.mode == 'min' else -score
+
+    def tune(self, ncores=1, csvname=None, verbose=True):
+        """
+        This function starts the tuning process with specified number of processors
+
+        :param ncores: (int) number of parallel processors, the cases of a rung are evaluated in parallel
+        :param csvname: (str) the name of the csv file name to save the tuning results (the csv file is updated after every rung)
+        :param verbose: (bool) whether to print updates to the screen or not
+
+        :return: (pandas dataframe) all evaluations with their bracket, rung, budget, and score, the cases evaluated with ``max_budget`` have the final scores
+        """
+        self.ncores=ncores
+        self.csvlogger=csvname
+        self.verbose=verbose
+
+        if self.verbose:
+            print('***************************************************************')
+            print('****************Hyperband Search is Running********************')
+            print('***************************************************************')
+            if self.ncores > 1:
+                print('--- Running in parallel with {} cores'.format(self.ncores))
+
+        rows=[]
+        caseid=0
+        with joblib.Parallel(n_jobs=self.ncores) as parallel:
+            for bracket, ((s, n), cases) in enumerate(zip(self.brackets, self.hyperparameter_cases)):
+                #case ids are given once per bracket so a promoted case keeps its id
+                ids=list(range(caseid+1, caseid+n+1))
+                caseid+=n
+                active=list(range(n))
+                for rung in range(s+1):
+                    budget=self.budget(s, rung)
+                    if self.verbose:
+                        print('--- Bracket {}, rung {}: {} cases with budget {}'.format(bracket+1, rung+1, len(active), budget))
+                    core_lst=[[ids[i], cases[i], budget] for i in active]
+                    if self.ncores > 1:
+                        results=parallel(joblib.delayed(self.worker)(item) for item in core_lst)
+                    else:
+                        results=[self.worker(item) for item in core_lst]
+
+                    for i, score in zip(active, results):
+                        rows.append([ids[i]] + list(cases[i]) + [bracket+1, rung+1, budget, score])
+                    if self.csvlogger:
+                        self.write_csv(rows)
+
+                    #promote the best 1/eta cases to the next rung
+                    nkeep=max(1, int(n*self.eta**-(rung+1)))
+                    order=sorted(range(len(active)), key=lambda k: self.rank_key(results[k]))
+                    active=[active[k] for k in order[:nkeep]]
+
+        self.hbres=self.to_frame(rows)
+        return self.hbres
+
+    def to_frame(self, rows):
+        #This function builds the dataframe of the evaluations
+        res=pd.DataFrame(rows, columns=['id'] + self.param_names + ['bracket', 'rung', 'budget', 'score'])
+        res.index=pd.RangeIndex(1, len(res)+1)
+        return res
+
+    def write_csv(self, rows):
+        #This function rewrites the csv logger with all evaluations so far
+        self.to_frame(rows).to_csv(self.csvlogger, index=False)
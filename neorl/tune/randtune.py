@@ -24,11 +24,29 @@ import logging
 import random
 import numpy as np
 import pandas as pd
-from multiprocessing import Pool
-import joblib
-import csv
+from neorl.tune.store import CaseStore, run_cases
 from neorl.utils.seeding import set_neorl_seed
 
+def random_case(param_types, param_lst):
+    #This function samples one random hyperparameter case
+    sample=[]
+    for types, vals in zip(param_types, param_lst):
+        if types in ['int', 'discrete']:
+            lb=vals[0]
+            ub=vals[1]
+            sample.append(random.randint(lb, ub))
+        elif types in ['float', 'continuous']:
+            lb=vals[0]
+            ub=vals[1]
+            sample.append(random.uniform(lb, ub))
+        elif types in ['grid', 'categorical']: 
+            real_grid=vals
+            sample.append(random.sample(real_grid,1)[0])
+        else:
+            raise Exception('--error: the param types must be one of int/discrete or float/continuous or grid/categorical, this type is not avaiable: `{}`'.format(types))
+    
+    return tuple(sample)
+
 class RANDTUNE:
     """
     A module for random search for hyperparameter tuning
@@ -65,23 +83,7 @@ class RANDTUNE:
         self.hyperparameter_cases=[]
         
         for _ in range(self.ncases):
-            sample=[]
-            for types, vals in zip(self.param_types, self.param_lst):
-                if types in ['int', 'discrete']:
-                    lb=vals[0]
-                    ub=vals[1]
-                    sample.append(random.randint(lb, ub))
-                elif types in ['float', 'continuous']:
-                    lb=vals[0]
-                    ub=vals[1]
-                    sample.append(random.uniform(lb, ub))
-                elif types in ['grid', 'categorical']: 
-                    real_grid=vals
-                    sample.append(random.sample(real_grid,1)[0])
-                else:
-                    raise Exception('--error: the param types must be one of int/discrete or float/continuous or grid/categorical, this type is not avaiable: `{}`'.format(types))
-                
-            self.hyperparameter_cases.append(tuple(sample))
+            self.hyperparameter_cases.append(random_case(self.param_types, self.param_lst))
                          
     def worker(self,x):
         #This function setup a case object to pass to the Parallel pool
@@ -105,11 +107,6 @@ class RANDTUNE:
                 print(case_dict)
                 print('-------------------------------------------------------------------------------------------')
             
-            if self.csvlogger:
-                with open (self.csvlogger, 'a') as csvfile:
-                    csvwriter = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator = '\n')
-                    csvwriter.writerow([case_dict[item] for item in case_dict])
-            
             return obj
         
         except Exception as e:
@@ -121,17 +118,19 @@ class RANDTUNE:
             return 'case{}:failed'.format(caseid)
         
         
-    def tune(self, ncores=1, csvname=None, verbose=True):
+    def tune(self, ncores=1, csvname=None, verbose=True, store=None):
         """
         This function starts the tuning process with specified number of processors
     
         :param ncores: (int) number of parallel processors (see the **Notes** section below for an important note about parallel execution)
         :param csvname: (str) the name of the csv file name to save the tuning results (useful for expensive cases as the csv file is updated directly after the case is done)
         :param verbose: (bool) whether to print updates to the screen or not
+        :param store: (str) name of a SQLite file storing the finished cases, if the file exists, the cases already finished in it are not evaluated again (useful to restart an interrupted tuning)
         """
         self.ncores=ncores
         self.csvlogger=csvname
         self.verbose=verbose
+        self.store=store
 
         if self.verbose:
             print('***************************************************************')
@@ -141,29 +140,10 @@ class RANDTUNE:
             if self.ncores > 1:
                 print('--- Running in parallel with {} cores'.format(self.ncores))
                 
-        if self.csvlogger:
-            headers=['id']  + self.param_names + ['score']
-            with open (self.csvlogger, 'w') as csvfile:
-                csvwriter = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator = '\n')
-                csvwriter.writerow(headers)
-                
-        core_lst=[]
-        for i in range (len(self.hyperparameter_cases)):
-            core_lst.append([i+1, self.hyperparameter_cases[i]])
-        
-        if self.ncores > 1:
-            #p=Pool(self.ncores)
-            #results = p.map(self.worker, core_lst)
-            #p.close()
-            #p.join()
-            
-            with joblib.Parallel(n_jobs=self.ncores) as parallel:
-                results=parallel(joblib.delayed(self.worker)(item) for item in core_lst)
-                
-        else:
-            results=[]
-            for item in core_lst:
-                results.append(self.worker(item))
+        #finished cases are kept in the store (written by this process only) and skipped on restart,
+        #duplicated cases are evaluated once
+        results=run_cases(tuner=self, cases=self.hyperparameter_cases, 
+                          store=CaseStore(path=self.store, param_names=self.param_names), csvlogger=self.csvlogger)
 
         gridres = pd.DataFrame(self.hyperparameter_cases, columns=self.param_names)
         gridres.index += 1
@@ -33,10 +33,11 @@ import pandas as pd
 import os
 import random
 import itertools
-import sys, copy, shutil
+import sys, shutil
 import time
 import pickle
 import subprocess
+from neorl.tune.runners.cases import CaseTemplate, setup_case
 from multiprocessing import Pool
 from skopt import Optimizer
 
@@ -221,6 +222,10 @@ class BAYESTUNE:
         
         self.tune_count()
         self.param_names=list(self.param_dict.keys())
+        self.case_template=CaseTemplate(self.template, self.param_names)
+        self.extfiles=self.tuneblock['extfiles'] if 'extfiles' in self.tuneblock.keys() else None
+        if self.extfiles:
+            print('--debug: external files are identified, copying them into each case directory')
         # Find neorl path
         #self.here=os.path.dirname(os.path.abspath(__file__))
         #self.neorl_path=self.here.replace('src/tune','neorl.py') #try to infer neorl.py internally to call neorl inside or neorl
@@ -257,24 +262,9 @@ class BAYESTUNE:
             # Prepares directories and files for one case
             self.param_names=list(self.param_dict.keys())
             i = self.caseindex
-            os.makedirs('./tunecases/case{}'.format(i+1), exist_ok=True)
-            self.new_template=copy.deepcopy(self.template)
-            for j in range (len(self.param_names)):
-                self.new_template=self.new_template.replace(str(self.param_names[j]), str(CASEPARAMS[j]))
-            
-            filename='./tunecases/case{}/case{}.inp'.format(i+1, i+1)
-            with open (filename, 'w') as fout:
-                fout.writelines(self.new_template)
-             
-            # copy external files into the new directory, if extfiles card exists
-            if 'extfiles' in self.tuneblock:
-                if self.tuneblock['extfiles']:
-                    print('--debug: external files are identified, copying them into each case directory')
-                    for item in self.tuneblock['extfiles']:
-                        os.system('cp -r {} ./tunecases/case{}/'.format(item, i+1))
-            
-            
             casenum = i+1
+            setup_case(self.case_template, CASEPARAMS, casenum, extfiles=self.extfiles)
+            
             print('--------------------------------------------------')
             print('Running TUNE Case {}/{}: {}'.format(i+1, self.ncases, CASEPARAMS))
             subprocess.call([self.python_path, self.neorl_path, '-i', 'case{}.inp'.format(casenum)], cwd='./tunecases/case{}/'.format(casenum))  # this exceutes neorl for this case.inp
@@ -0,0 +1,100 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+#"""
+#Shared tools of the input-file TUNE runners: template rendering, case directory setup
+#and a bounded queue of running cases
+#"""
+
+import os
+import re
+import glob
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class CaseTemplate:
+    """
+    A neorl input template compiled once for a list of TUNE parameter names (e.g. ``{lr}``),
+    every case is rendered by joining the fixed text pieces with the case values, instead of
+    copying the template and replacing each parameter name one by one.
+
+    inputs:
+    template (str): the input template without the TUNE block
+    names (list): the TUNE parameter names in the order of the case values
+    """
+    def __init__(self, template, names):
+        self.names=[str(name) for name in names]
+        #longest names first, so a name that contains another one is matched as a whole
+        pattern=re.compile('|'.join(re.escape(name) for name in sorted(set(self.names), key=len, reverse=True)))
+        index={name: i for i, name in enumerate(self.names)}
+        self.pieces=[]; self.slots=[]
+        start=0
+        for match in pattern.finditer(template):
+            self.pieces.append(template[start:match.start()])
+            self.slots.append(index[match.group()])
+            start=match.end()
+        self.pieces.append(template[start:])
+
+    def render(self, values):
+        """
+        This function returns the input file text of one case
+        """
+        text=[self.pieces[0]]
+        for slot, piece in zip(self.slots, self.pieces[1:]):
+            text.append(str(values[slot]))
+            text.append(piece)
+        return ''.join(text)
+
+def setup_case(template, values, caseid, extfiles=None, root='./tunecases'):
+    #"""
+    #Prepares the directory of one case: writes caseN.inp rendered from the template
+    #and copies the external files (files, directories, or glob patterns) into it
+    #"""
+    casedir=os.path.join(root, 'case{}'.format(caseid))
+    os.makedirs(casedir, exist_ok=True)
+    with open (os.path.join(casedir, 'case{}.inp'.format(caseid)), 'w') as fout:
+        fout.write(template.render(values))
+
+    for item in extfiles or []:
+        for path in glob.glob(item) or [item]:
+            target=os.path.join(casedir, os.path.basename(os.path.normpath(path)))
+            if os.path.isdir(path):
+                shutil.copytree(path, target, dirs_exist_ok=True)
+            else:
+                shutil.copy2(path, target)
+    return casedir
+
+def run_queue(worker, items, ncores, callback=None):
+    #"""
+    #Runs ``worker(item)`` for the items of an iterable (e.g. a generator) with at most
+    #``ncores`` cases running at once. A new item is taken from the iterable only when a slot
+    #frees up, so the cases are never materialized in memory, and ``callback(item, result)``
+    #is called in this (main) thread as soon as a case is done
+    #"""
+    items=iter(items)
+    with ThreadPoolExecutor(max_workers=ncores) as executor:
+        running={}
+        while True:
+            for item in items:
+                running[executor.submit(worker, item)]=item
+                if len(running) >= ncores:
+                    break
+            if not running:
+                break
+            done, _=wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                item=running.pop(future)
+                if callback is not None:
+                    callback(item, future.result())
@@ -21,6 +21,7 @@ from itertools import repeat
 import itertools
 import sys, copy, shutil
 import subprocess
+from neorl.tune.runners.cases import CaseTemplate, setup_case
 from multiprocessing.dummy import Pool
 from collections import defaultdict
 import copy
@@ -202,6 +203,10 @@ class ESTUNE:
         """
         self.tune_count()
         self.param_names=list(self.param_dict.keys())
+        self.case_template=CaseTemplate(self.template, self.param_names)
+        self.extfiles=self.tuneblock['extfiles'] if 'extfiles' in self.tuneblock.keys() else None
+        if self.extfiles:
+            print('--debug: external files are identified, copying them into each case directory')
         #-----------------------        
         # Infer neorl.py path
         #-----------------------
@@ -300,23 +305,9 @@ class ESTUNE:
             self.param_names=list(self.param_dict.keys())
             i = caseid[3:]
 
-            os.makedirs('./tunecases/case{}'.format(i), exist_ok=True)
-            self.new_template=copy.deepcopy(self.template)
-            for j in range (len(self.param_names)):
-                self.new_template=self.new_template.replace(str(self.param_names[j]), str(ind[j]))
-            
-            filename='./tunecases/case{}/case{}.inp'.format(i, i)
-            with open (filename, 'w') as fout:
-                fout.writelines(self.new_template)
-                
-            # copy external files into the new directory, if extfiles card exists
-            if 'extfiles' in self.tuneblock.keys():
-                if self.tuneblock['extfiles']:
-                    print('--debug: external files are identified, copying them into each case directory')
-                    for item in self.tuneblock['extfiles']:
-                        os.system('cp -r {} ./tunecases/case{}/'.format(item, i))
-
             casenum = caseid[3:]
+            setup_case(self.case_template, ind, i, extfiles=self.extfiles)
+
             print('--------------------------------------------------')
             print('Running TUNE Case {}/{}: {}'.format(casenum, self.ncases, ind))
             subprocess.call([self.python_path, self.neorl_path, '-i', 'case{}.inp'.format(casenum)], cwd='./tunecases/case{}/'.format(casenum))  # this exceutes neorl for this case.inp
@@ -24,9 +24,9 @@ import numpy as np
 import pandas as pd
 import os
 import itertools
-import sys, copy, shutil
+import sys, shutil
 import subprocess
-from multiprocessing import Pool
+from neorl.tune.runners.cases import CaseTemplate, setup_case, run_queue
 
 class GRIDTUNE:
     """
@@ -103,19 +103,18 @@ class GRIDTUNE:
                 if item not in self.template:
                     raise ValueError('parameter {} in TUNE block cannot be found in any other block, e.g. DQN, GA, PPO, etc.'.format(item)) 
                 
-        #count all possible combinations      
-        self.all_combine = list(itertools.product(*self.param_lst)) # * here helps passing list of lists to product function without need to know the size of parameters beforehand
-        if len(self.all_combine) > 1e6:
-            print ('Number of possible combinations for this tunning problem is huge ({})!!!'.format(int(len(self.all_combine))))
-            answer=input ("Do you want to proceed? Enter yes or no: ")
-            
-            if answer == 'no':
-                print('user asked to terminate the run')
-                sys.exit()
-            elif answer == 'yes':
-                print('user decided to generate all cases')
-            else:
-                raise Exception ('please enter yes or no')
+        #count all possible combinations, the cases are generated lazily from the product
+        self.ncases=int(np.prod([len(item) for item in self.param_lst]))
+        if self.ncases > 1e6:
+            print ('--warning: Number of possible combinations for this tunning problem is huge ({}), the cases are generated and launched one by one'.format(self.ncases))
+
+    def iter_cases(self):
+        
+        """
+        This function returns a generator over all hyperparameter combinations without storing them
+        """
+        
+        return itertools.product(*self.param_lst) # * here helps passing list of lists to product function without need to know the size of parameters beforehand
                 
     def gen_cases(self):
         
@@ -125,24 +124,15 @@ class GRIDTUNE:
         """
         
         self.tune_count()
+        self.case_template=CaseTemplate(self.template, self.param_names)
+        self.extfiles=self.tuneblock['extfiles'] if 'extfiles' in self.tuneblock.keys() else None
+        if self.extfiles:
+            print('--debug: external files are identified, copying them into each case directory')
         
-        
-        for i in range (len(self.all_combine)):
-            os.makedirs('./tunecases/case{}'.format(i+1), exist_ok=True)
-            self.new_template=copy.deepcopy(self.template)
-            for j in range (len(self.param_names)):
-                self.new_template=self.new_template.replace(str(self.param_names[j]), str(self.all_combine[i][j]))
-            
-            filename='./tunecases/case{}/case{}.inp'.format(i+1, i+1)
-            with open (filename, 'w') as fout:
-                fout.writelines(self.new_template)
-             
-            # copy external files into the new directory, if extfiles card exists
-            if 'extfiles' in self.tuneblock.keys():
-                if self.tuneblock['extfiles']:
-                    print('--debug: external files are identified, copying them into each case directory')
-                    for item in self.tuneblock['extfiles']:
-                        os.system('cp -r {} ./tunecases/case{}/'.format(item, i+1))
+        # in run mode, every case directory is prepared by its worker right before the case is launched,
+        # in test mode, all directories are prepared here in parallel for inspection
+        if 'mode' in self.tuneblock.keys() and self.tuneblock['mode'] == 'test':
+            run_queue(self.setup_case, enumerate(self.iter_cases(), start=1), self.ncores)
                 
         # Find neorl path
         #self.here=os.path.dirname(os.path.abspath(__file__))
@@ -153,15 +143,26 @@ class GRIDTUNE:
         print('--debug: NEORLPATH=', self.neorl_path)
         print('--debug: PYTHONPATH=', self.python_path)
          
-    def case_object(self,x):
+    def setup_case(self, case):
+        
+        """
+        This function prepares the directory and input file of one case
+        """
+        
+        x, values=case
+        setup_case(self.case_template, values, x, extfiles=self.extfiles)
+        
+    def case_object(self,case):
         
         """
-        This function setup a case object to pass to the multiproc Pool
+        This function setup a case object to pass to the queue of running cases
         """
         
+        x, values=case
         try:
+            self.setup_case(case)
             print('--------------------------------------------------')
-            print('Running TUNE Case {}/{}: {}'.format(x, len(self.all_combine), self.all_combine[x-1]))
+            print('Running TUNE Case {}/{}: {}'.format(x, self.ncases, values))
             subprocess.call([self.python_path, self.neorl_path, '-i', 'case{}.inp'.format(x)], cwd='./tunecases/case{}/'.format(x))
             print('--------------------------------------------------')
             
@@ -174,35 +175,44 @@ class GRIDTUNE:
             reward_lst=pd.read_csv('./tunecases/case{}/case{}_log/{}'.format(x, x, csvfile[0]), usecols=['reward']).values
             mean_reward=np.mean(reward_lst[-self.n_last_episodes:])
             max_reward=np.max(reward_lst)
-            with open (self.csvlogger, 'a') as fout:
-                fout.write(str(x) +',')
-                [fout.write(str(item) + ',') for item in self.all_combine[x-1]]
-                fout.write(str(mean_reward) + ',' + str(max_reward) + '\n')
             
-            return mean_reward
+            return mean_reward, max_reward
         
         except:
             print('--error: case{}.inp failed during execution'.format(x))
             
             return 'case{}.inp:failed'.format(x)
         
+    def log_case(self, case, result):
+        
+        """
+        This function appends a finished case to the csv logger, it is called by the main process only
+        """
+        
+        x, values=case
+        self.results[x-1]=result[0] if isinstance(result, tuple) else result
+        if isinstance(result, tuple):
+            self.fout.write(str(x) +',')
+            [self.fout.write(str(item) + ',') for item in values]
+            self.fout.write(str(result[0]) + ',' + str(result[1]) + '\n')
+            self.fout.flush()
         
     def run_cases(self):
         
         """
-        This function calls multiproc Pool to run all cases, and collect their stats
+        This function runs all cases over a bounded queue of ncores workers, and collect their stats
         """
         
-        with open (self.csvlogger, 'w') as fout:
-            fout.write('caseid, ')
-            [fout.write(item + ',') for item in self.param_names]
-            fout.write('mean_reward,max_reward\n')
-
-        
-        p=Pool(self.ncores)
-        results = p.map(self.case_object, range(1,len(self.all_combine)+1))
-        p.close()
-        p.join()
+        self.results=[None]*self.ncases
+        with open (self.csvlogger, 'w') as self.fout:
+            self.fout.write('caseid, ')
+            [self.fout.write(item + ',') for item in self.param_names]
+            self.fout.write('mean_reward,max_reward\n')
+            self.fout.flush()
+            
+            # at most ncores cases are running, the next case is generated and launched when a slot frees up
+            run_queue(self.case_object, enumerate(self.iter_cases(), start=1), self.ncores, callback=self.log_case)
+        results=self.results
         
         csvdata=pd.read_csv('tune.csv')
         asc_data=csvdata.sort_values(by=['caseid'],ascending=True)
@@ -230,7 +240,7 @@ class GRIDTUNE:
             fout.write('*****************************************************\n')
             fout.write('Summary for the TUNE case \n')
             fout.write('*****************************************************\n')
-            fout.write('Number of cases evaluated: {} \n'.format(len(self.all_combine)))
+            fout.write('Number of cases evaluated: {} \n'.format(self.ncases))
             fout.write('Number of failed cases: {} \n'.format(failed_cases))
             fout.write('Parameter names: {} \n'.format(self.param_names))
             fout.write('Parameter values: {} \n '.format(self.param_lst))
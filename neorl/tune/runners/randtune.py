@@ -25,9 +25,9 @@ import pandas as pd
 import os
 import random
 import itertools
-import sys, copy, shutil
+import sys, shutil
 import subprocess
-from multiprocessing import Pool
+from neorl.tune.runners.cases import CaseTemplate, setup_case, run_queue
 
 class RANDTUNE:
     """
@@ -79,7 +79,7 @@ class RANDTUNE:
         
         """
         1- This function uses self.tuneblock, parse it, infer all parameters to be tuned and thier distribution
-        2- This function generates "ncases" based on all distributions, and saved in self.all_combine
+        2- The "ncases" samples are drawn lazily from all distributions by self.iter_cases
         """
         
         self.param_dict={}
@@ -155,26 +155,33 @@ class RANDTUNE:
 
                 self.param_dict[item]=item_lst # Save the final parsed list for parameter {XXX}                    
         
-        #-----------------------------------------------------
-        # Generate all combinations (samples)
-        #-----------------------------------------------------
-        self.all_combine=[]
-        for i in range (self.ncases):
-            sample=[]
-            for key in self.param_dict:
-                if 'u' in self.param_dict[key] or 'float' in self.param_dict[key]:
-                    sample.append(random.uniform(self.param_dict[key][0], self.param_dict[key][1]))
-                if 'n' in self.param_dict[key]:
-                    sample.append(random.gauss(self.param_dict[key][0], self.param_dict[key][1]))
-                if 'randint' in self.param_dict[key] or 'int' in self.param_dict[key]:
-                    sample.append(random.randint(self.param_dict[key][0], self.param_dict[key][1]))
-                if 'grid' in self.param_dict[key]:
-                    real_grid=list(self.param_dict[key])
-                    real_grid.remove('grid') # get rid of the 'grid' to avoid sampling it 
-                    sample.append(random.sample(real_grid,1)[0]) 
-                    
-            self.all_combine.append(sample)
-        #---------------------------------------------------------------------------------------------------------------
+    def sample_case(self):
+        
+        """
+        This function samples one hyperparameter combination from the parsed distributions
+        """
+        
+        sample=[]
+        for key in self.param_dict:
+            if 'u' in self.param_dict[key] or 'float' in self.param_dict[key]:
+                sample.append(random.uniform(self.param_dict[key][0], self.param_dict[key][1]))
+            if 'n' in self.param_dict[key]:
+                sample.append(random.gauss(self.param_dict[key][0], self.param_dict[key][1]))
+            if 'randint' in self.param_dict[key] or 'int' in self.param_dict[key]:
+                sample.append(random.randint(self.param_dict[key][0], self.param_dict[key][1]))
+            if 'grid' in self.param_dict[key]:
+                real_grid=list(self.param_dict[key])
+                real_grid.remove('grid') # get rid of the 'grid' to avoid sampling it 
+                sample.append(random.sample(real_grid,1)[0]) 
+        return sample
+    
+    def iter_cases(self):
+        
+        """
+        This function returns a generator over "ncases" samples, each sample is drawn when its case is launched
+        """
+        
+        return (self.sample_case() for i in range (self.ncases))
         
     def gen_cases(self):
         """
@@ -183,22 +190,15 @@ class RANDTUNE:
         """
         self.tune_count()
         self.param_names=list(self.param_dict.keys())
-        for i in range (len(self.all_combine)):
-            os.makedirs('./tunecases/case{}'.format(i+1), exist_ok=True)
-            self.new_template=copy.deepcopy(self.template)
-            for j in range (len(self.param_names)):
-                self.new_template=self.new_template.replace(str(self.param_names[j]), str(self.all_combine[i][j]))
-            
-            filename='./tunecases/case{}/case{}.inp'.format(i+1, i+1)
-            with open (filename, 'w') as fout:
-                fout.writelines(self.new_template)
-             
-            # copy external files into the new directory, if extfiles card exists
-            if 'extfiles' in self.tuneblock.keys():
-                if self.tuneblock['extfiles']:
-                    print('--debug: external files are identified, copying them into each case directory')
-                    for item in self.tuneblock['extfiles']:
-                        os.system('cp -r {} ./tunecases/case{}/'.format(item, i+1))
+        self.case_template=CaseTemplate(self.template, self.param_names)
+        self.extfiles=self.tuneblock['extfiles'] if 'extfiles' in self.tuneblock.keys() else None
+        if self.extfiles:
+            print('--debug: external files are identified, copying them into each case directory')
+        
+        # in run mode, every case directory is prepared by its worker right before the case is launched,
+        # in test mode, all directories are prepared here in parallel for inspection
+        if 'mode' in self.tuneblock.keys() and self.tuneblock['mode'] == 'test':
+            run_queue(self.setup_case, enumerate(self.iter_cases(), start=1), self.ncores)
                 
         #-----------------------        
         # Infer neorl.py path
@@ -212,57 +212,76 @@ class RANDTUNE:
         print('--debug: NEORLPATH=', self.neorl_path)
         print('--debug: PYTHONPATH=', self.python_path)
                 
-    def case_object(self,x):
+    def setup_case(self, case):
+        
+        """
+        This function prepares the directory and input file of one case
+        """
+        
+        x, values=case
+        setup_case(self.case_template, values, x, extfiles=self.extfiles)
+        
+    def case_object(self,case):
         
         """
-        This function setup a case object to pass to the multiproc Pool
+        This function setup a case object to pass to the queue of running cases
         """
+        
+        x, values=case
         try:
+            self.setup_case(case)
             print('--------------------------------------------------')
-            print('Running TUNE Case {}/{}: {}'.format(x, len(self.all_combine), self.all_combine[x-1]))
-            subprocess.call([self.python_path, self.neorl_path, '-i', 'case{}.inp'.format(x)], cwd='./tunecases/case{}/'.format(x))  # this exceutes neorl for this case.inp
+            print('Running TUNE Case {}/{}: {}'.format(x, self.ncases, values))
+            subprocess.call([self.python_path, self.neorl_path, '-i', 'case{}.inp'.format(x)], cwd='./tunecases/case{}/'.format(x))
             print('--------------------------------------------------')
             
             #--------------------------------------------------------------------------------------------------------------
             # Try to infer the _out.csv file in the directory since only one method is allowed
-            csvfile=[f for f in os.listdir('./tunecases/case{}/case{}_log/'.format(x,x)) if f.endswith('_out.csv')]
+            csvfile=[f for f in os.listdir('./tunecases/case{}/case{}_log/'.format(x, x)) if f.endswith('_out.csv')]
             if len(csvfile) > 1:
                 raise Exception ('multiple *_out.csv files can be found in the logger of TUNE, only one is allowed')
             #--------------------------------------------------------------------------------------------------------------
-            
-            reward_lst=pd.read_csv('./tunecases/case{}/case{}_log/{}'.format(x,x,csvfile[0]), usecols=['reward']).values
+            reward_lst=pd.read_csv('./tunecases/case{}/case{}_log/{}'.format(x, x, csvfile[0]), usecols=['reward']).values
             mean_reward=np.mean(reward_lst[-self.n_last_episodes:])
             max_reward=np.max(reward_lst)
             
-            with open (self.csvlogger, 'a') as fout:
-                fout.write(str(x) +',')
-                [fout.write(str(item) + ',') for item in self.all_combine[x-1]]
-                fout.write(str(mean_reward) + ',' + str(max_reward) + '\n')
-                
-            return mean_reward
+            return mean_reward, max_reward
         
         except:
             print('--error: case{}.inp failed during execution'.format(x))
             
             return 'case{}.inp:failed'.format(x)
         
+    def log_case(self, case, result):
+        
+        """
+        This function appends a finished case to the csv logger, it is called by the main process only
+        """
+        
+        x, values=case
+        self.results[x-1]=result[0] if isinstance(result, tuple) else result
+        if isinstance(result, tuple):
+            self.fout.write(str(x) +',')
+            [self.fout.write(str(item) + ',') for item in values]
+            self.fout.write(str(result[0]) + ',' + str(result[1]) + '\n')
+            self.fout.flush()
         
     def run_cases(self):
         
         """
-        This function calls multiproc Pool to run all cases, and collect their stats
+        This function runs all cases over a bounded queue of ncores workers, and collect their stats
         """
         
-        with open (self.csvlogger, 'w') as fout:
-            fout.write('caseid, ')
-            [fout.write(item + ',') for item in self.param_names]
-            fout.write('mean_reward,max_reward\n')
-
-        
-        p=Pool(self.ncores)
-        results = p.map(self.case_object, range(1,len(self.all_combine)+1))
-        p.close()
-        p.join()
+        self.results=[None]*self.ncases
+        with open (self.csvlogger, 'w') as self.fout:
+            self.fout.write('caseid, ')
+            [self.fout.write(item + ',') for item in self.param_names]
+            self.fout.write('mean_reward,max_reward\n')
+            self.fout.flush()
+            
+            # at most ncores cases are running, the next case is generated and launched when a slot frees up
+            run_queue(self.case_object, enumerate(self.iter_cases(), start=1), self.ncores, callback=self.log_case)
+        results=self.results
         
         csvdata=pd.read_csv('tune.csv')
         asc_data=csvdata.sort_values(by=['caseid'],ascending=True)
@@ -290,7 +309,7 @@ class RANDTUNE:
             fout.write('*****************************************************\n')
             fout.write('Summary for the TUNE case \n')
             fout.write('*****************************************************\n')
-            fout.write('Number of cases evaluated: {} \n'.format(len(self.all_combine)))
+            fout.write('Number of cases evaluated: {} \n'.format(self.ncases))
             fout.write('Number of failed cases: {} \n'.format(failed_cases))
             fout.write('Parameter names: {} \n'.format(self.param_names))
             fout.write('Parameter values: {} \n '.format(self.param_dict))
@@ -0,0 +1,171 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+import time
+import sqlite3
+import hashlib
+from concurrent.futures import as_completed
+from joblib.externals.loky import ProcessPoolExecutor
+
+def _plain(value):
+    #convert numpy scalars to python values so equal cases have equal keys
+    return value.item() if hasattr(value, 'item') else value
+
+class CaseStore:
+    """
+    Store of the finished hyperparameter cases, keyed by a hash of the hyperparameter values.
+    The results are kept in memory and, if ``path`` is given, in a SQLite file written by the
+    main process only, so an interrupted tuning can be restarted and skip the finished cases.
+
+    :param path: (str) path of the SQLite file, if ``None``, the results are only kept in memory
+    :param param_names: (list) names of the hyperparameters
+    :param batch_size: (int) number of results buffered before they are committed to the file
+    :param flush_time: (float) maximum time in seconds a result stays buffered before it is committed
+    """
+    def __init__(self, path=None, param_names=None, batch_size=10, flush_time=30):
+        self.path=path
+        self.param_names=param_names
+        self.batch_size=batch_size
+        self.flush_time=flush_time
+        self.results={}
+        self.buffer=[]
+        self.last_flush=time.time()
+        self.db=None
+        if self.path:
+            self.db=sqlite3.connect(self.path)
+            self.db.execute('CREATE TABLE IF NOT EXISTS cases (key TEXT PRIMARY KEY, id INTEGER, params TEXT, score TEXT)')
+            self.db.commit()
+            for key, score in self.db.execute('SELECT key, score FROM cases'):
+                self.results[key]=json.loads(score)
+
+    def key(self, case):
+        """
+        This function returns the hash key of a hyperparameter case.
+
+        :param case: (tuple) hyperparameter values
+        :return: (str) key of the case
+        """
+        text=json.dumps([self.param_names, [_plain(item) for item in case]], default=str)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+    def add(self, key, caseid, case, score):
+        """
+        This function records the score of a finished case.
+
+        :param key: (str) key of the case
+        :param caseid: (int) case number in the current tuning
+        :param case: (tuple) hyperparameter values
+        :param score: (float) score of the case
+        """
+        score=_plain(score)
+        self.results[key]=score
+        if self.db is not None:
+            self.buffer.append((key, caseid, json.dumps([_plain(item) for item in case], default=str), json.dumps(score)))
+            if len(self.buffer) >= self.batch_size or time.time()-self.last_flush > self.flush_time:
+                self.flush()
+
+    def flush(self):
+        """
+        This function commits the buffered results to the file.
+        """
+        if self.db is not None and self.buffer:
+            self.db.executemany('INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?)', self.buffer)
+            self.db.commit()
+            self.buffer=[]
+        self.last_flush=time.time()
+
+    def close(self):
+        """
+        This function commits the buffered results and closes the file.
+        """
+        self.flush()
+        if self.db is not None:
+            self.db.close()
+            self.db=None
+
+def run_cases(tuner, cases, store, csvlogger=None):
+    #"""
+    #Evaluates the hyperparameter cases with ``tuner.worker`` and returns the list of scores.
+    #Finished cases found in the store are skipped, duplicated cases are evaluated once, and
+    #the store and csv logger are written by this (main) process as soon as a case is done.
+    #"""
+    results=[None]*len(cases)
+    keys=[store.key(case) for case in cases]
+    first={}
+    dups={}
+    todo=[]
+    for i, key in enumerate(keys):
+        if key in store:
+            results[i]=store[key]
+        elif key not in first:
+            first[key]=i
+            dups[key]=[]
+            todo.append([i+1, cases[i]])
+        else:
+            dups[key].append(i)
+
+    if tuner.verbose and len(todo) < len(cases):
+        print('--- {} cases are found in the store or duplicated, {} cases are evaluated'.format(len(cases)-len(todo), len(todo)))
+
+    csvfile=open(csvlogger, 'w') if csvlogger else None
+    try:
+        if csvfile:
+            csvwriter=csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator = '\n')
+            csvwriter.writerow(['id'] + tuner.param_names + ['score'])
+            for i, score in enumerate(results):
+                if score is not None:
+                    csvwriter.writerow([i+1] + list(cases[i]) + [score])
+            csvfile.flush()
+
+        def record(item, obj):
+            caseid, case=item
+            results[caseid-1]=obj
+            if isinstance(obj, str) and obj.endswith(':failed'):
+                return   #failed cases are not stored, they run again on restart
+            store.add(keys[caseid-1], caseid, case, obj)
+            if csvfile:
+                #duplicated cases share this score and get their own row, as if they were evaluated
+                for i in [caseid-1] + dups[keys[caseid-1]]:
+                    csvwriter.writerow([i+1] + list(cases[i]) + [obj])
+                csvfile.flush()
+
+        if tuner.ncores > 1:
+            with ProcessPoolExecutor(max_workers=tuner.ncores) as executor:
+                futures={executor.submit(tuner.worker, item): item for item in todo}
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+        else:
+            for item in todo:
+                record(item, tuner.worker(item))
+    finally:
+        store.close()
+        if csvfile:
+            csvfile.close()
+
+    #duplicated cases share the score of their first occurrence
+    for i, key in enumerate(keys):
+        if results[i] is None:
+            results[i]=results[first[key]]
+
+    return results
@@ -0,0 +1,123 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import cloudpickle
+from joblib.externals.loky import ProcessPoolExecutor
+
+#the function evaluated by a pool worker, it is unpickled once when the worker starts
+_worker_func=None
+
+def _init_worker(payload):
+    #initializer of each worker process: receive the fitness function once
+    global _worker_func
+    _worker_func=cloudpickle.loads(payload)
+
+def _eval_chunk(chunk):
+    #evaluate a chunk of individuals with the function shipped at startup
+    return [_worker_func(item) for item in chunk]
+
+def eval_batch(fit, pop, lb, ub):
+    """
+    This function evaluates a whole population with one call of a vectorized fitness function.
+
+    :param fit: (function) fitness function taking a 2-D array of shape ``(npop, dim)`` and returning ``npop`` values
+    :param pop: (list of lists or 2-D array) individuals to evaluate, clipped to ``[lb, ub]`` before the call
+    :param lb: (list) lower bounds of the parameters
+    :param ub: (list) upper bounds of the parameters
+
+    :return: (list) fitness of each individual
+    """
+    x=np.clip(np.array(pop, dtype=float), lb, ub)
+    fitness=np.asarray(fit(x), dtype=float).reshape(-1)
+    assert fitness.shape[0] == x.shape[0], '--error: the vectorized fitness returned {} values for {} individuals'.format(fitness.shape[0], x.shape[0])
+    return list(fitness)
+
+class PoolEvaluator:
+    """
+    Persistent parallel evaluator shared across generations. The worker processes
+    are started once and the fitness function is shipped to them once, so every generation
+    only exchanges the individuals and their fitness values. The same evaluator can be passed
+    to ``evolute`` of several optimizers or across several ``evolute`` calls.
+
+    :param ncores: (int) number of parallel processors, ``ncores=1`` evaluates in series without workers
+    :param chunksize: (int) number of individuals sent to a worker per message,
+                      if ``None``, the population is split evenly over ``ncores``
+    """
+    def __init__(self, ncores=1, chunksize=None):
+        assert ncores >= 1, '--error: ncores ({}) must be more than or equal 1'.format(ncores)
+        self.ncores=ncores
+        self.chunksize=chunksize
+        self._executor=None
+        self._func=None
+
+    def _bind(self, func):
+        #(re)start the workers if the function to evaluate has changed
+        if self._executor is not None and func == self._func:
+            return
+        self.close()
+        self._func=func
+        self._executor=ProcessPoolExecutor(max_workers=self.ncores, initializer=_init_worker,
+                                           initargs=(cloudpickle.dumps(func),))
+
+    def map(self, func, items):
+        """
+        This function evaluates ``func`` for every item and returns the results in order.
+
+        :param func: (function) the function to evaluate, e.g. the ``fit_worker`` of an optimizer
+        :param items: (list) individuals to evaluate
+
+        :return: (list) ``func(item)`` for each item in ``items``
+        """
+        items=list(items)
+        if self.ncores == 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        self._bind(func)
+        if self.chunksize:
+            chunksize=self.chunksize
+        else:
+            chunksize=-(-len(items) // self.ncores)  #ceil division
+        futures=[self._executor.submit(_eval_chunk, items[i:i+chunksize])
+                 for i in range(0, len(items), chunksize)]
+        results=[]
+        for future in futures:
+            results.extend(future.result())
+
+        return results
+
+    def close(self):
+        """
+        This function shuts down the worker processes (they are restarted on the next ``map`` call).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor=None
+        self._func=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        #the optimizer carrying this evaluator is shipped to the workers with ``fit_worker``,
+        #so drop the process handles which cannot be pickled
+        state=self.__dict__.copy()
+        state['_executor']=None
+        state['_func']=None
+        return state
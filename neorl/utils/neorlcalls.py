@@ -21,9 +21,10 @@
 #"""
 
 import numpy as np
-import pandas as pd
 from neorl.rl.baselines.shared.callbacks import BaseCallback
-import matplotlib.pyplot as plt
+from neorl.utils.streamstats import EpochStats, CSVTail, CSVWriter, BackgroundPlotter
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.lines import Line2D
 import os
 import copy
@@ -32,6 +33,8 @@ class SavePlotCallback(BaseCallback):
     """
     Callback for saving a model (the check is done every ``check_freq`` steps)
     based on the training reward (in practice, we recommend using ``EvalCallback``).
+    Only the rows appended to ``_out.csv`` since the last check are read, the statistics
+    are kept in memory and the figures are drawn in a background thread.
     """
     def __init__(self, check_freq, avg_step, log_dir, total_timesteps, basecall, plot_mode='subplot'):
         self.base=basecall
@@ -47,20 +50,34 @@ class SavePlotCallback(BaseCallback):
         self.best_save_path = self.log_dir + '_bestmodel.pkl'
         self.save_path = self.log_dir + '_lastmodel.pkl'
         self.best_mean_reward = -np.inf
+        self.tail=CSVTail(self.log_dir+'_out.csv')
+        self.stats=None
+        self.plotter=BackgroundPlotter()
 
         #avoid activating 'Agg' in the header so not to affect other classes/algs
         import matplotlib
         matplotlib.use('Agg')
 
+    def read_new(self):
+        #update the statistics of every plotted column with the rows appended to the csv logger
+        rows=self.tail.read()
+        if self.stats is None:
+            if self.tail.columns is None:
+                raise Exception('the csv logger {} is empty'.format(self.log_dir+'_out.csv'))
+            self.stats={label: EpochStats(self.avg_step) for label in self.tail.columns if label != 'caseid'}   #caseid is not parsed (may be non-numeric)
+        for row in rows:
+            for label, value in zip(self.tail.columns, row):
+                if label in self.stats:
+                    self.stats[label].update(float(value))
+    
     def runcall(self):
         
         print('num_timesteps={}/{}'.format (self.num_timesteps, self.total_timesteps))
             
         # Retrieve training reward
-        y= pd.read_csv(self.log_dir+'_out.csv')
-        y=y["reward"].values
-        # Mean training reward over the last 100 episodes
-        mean_reward = np.mean(y[-self.avg_step:])
+        self.read_new()
+        # Mean training reward over the last avg_step episodes
+        mean_reward = self.stats['reward'].window_mean()
                
         # New best model, you could save the agent here
         print('--debug: current mean reward={}, previous best mean reward = {}'.format(np.round(mean_reward), np.round(self.best_mean_reward)))
@@ -74,7 +91,6 @@ class SavePlotCallback(BaseCallback):
         print('--debug: current model model is saved to {}'.format(self.save_path))
         self.model.save(self.save_path)   #latest model
               
-        self.out_data=pd.read_csv(self.log_dir+'_out.csv')
         #-------------------
         # Progress Plot
         #-------------------
@@ -90,6 +106,7 @@ class SavePlotCallback(BaseCallback):
         
         if self.num_timesteps == self.total_timesteps:
             print('system exit')
+            self.plotter.close()
             os._exit(1)
             
             
@@ -98,97 +115,89 @@ class SavePlotCallback(BaseCallback):
     def _on_training_end(self) -> None:
         self.runcall()
         print('Training is finished')
+        self.plotter.close()
         os._exit(1)
         #pass
 
-    def calc_cumavg(self, data, N):
-    
-        cum_aves=[np.mean(data[i:i+N]) for i in range(0,len(data),N)]
-        cum_std=[np.std(data[i:i+N]) for i in range(0,len(data),N)]
-        cum_max=[np.max(data[i:i+N]) for i in range(0,len(data),N)]
-        cum_min=[np.min(data[i:i+N]) for i in range(0,len(data),N)]
-    
-        return cum_aves, cum_std, cum_max, cum_min
-    
-    
     def plot_progress(self, method_xlabel='Epoch'):
-
-        self.out_data=pd.read_csv(self.log_dir+'_out.csv')
+        #snapshot the statistics and draw them in the background
+        labels=list(self.stats)  #caseid is excluded from plotting (meaningless)
+        data={label: self.stats[label].summary() for label in labels}
+        self.plotter.submit(self.draw_progress, labels, data, method_xlabel)
+    
+    def draw_progress(self, labels, data, method_xlabel='Epoch'):
+        #the figures are drawn with the object API (Figure + Agg canvas), not the pyplot state machine,
+        #since this runs in the plotter thread while the training thread may use pyplot
         color_list=['b', 'g', 'r', 'c', 'm', 'y', 'darkorange', 'purple', 'tab:brown', 'lime']
-        plot_data=self.out_data.drop(['caseid'], axis=1)  #exclude caseid, which is the first column from plotting (meaningless)
-        
-        labels=list(plot_data.columns.values)
-            
-        ny=plot_data.shape[1] 
-        
-        assert ny == len(labels), 'number of columns ({}) to plot in the csv file {} is not equal to the number of labels provided by the user ({})'.format(ny, self.log_dir+'_out.csv', len(labels))
+        ny=len(labels)
         
         # classic mode
         if self.plot_mode=='classic' or ny == 1:
             color_index=0
             for i in range (ny): #exclude caseid from plot, which is the first column 
-                plt.figure()
-                ravg, rstd, rmax, rmin=self.calc_cumavg(plot_data.iloc[:,i],self.avg_step)
+                fig=Figure()
+                FigureCanvasAgg(fig)
+                ax=fig.add_subplot(1,1,1)
+                ravg, rstd, rmax, rmin=data[labels[i]]
                 epochs=np.array(range(1,len(ravg)+1),dtype=int)
-                plt.plot(epochs, ravg,'-o', c=color_list[color_index], label='Average per {}'.format(method_xlabel))
+                ax.plot(epochs, ravg,'-o', c=color_list[color_index], label='Average per {}'.format(method_xlabel))
                 
-                plt.fill_between(epochs,[a_i - b_i for a_i, b_i in zip(ravg, rstd)], [a_i + b_i for a_i, b_i in zip(ravg, rstd)],
+                ax.fill_between(epochs,[a_i - b_i for a_i, b_i in zip(ravg, rstd)], [a_i + b_i for a_i, b_i in zip(ravg, rstd)],
                 alpha=0.2, edgecolor=color_list[color_index], facecolor=color_list[color_index], label=r'$1-\sigma$ per {}'.format(method_xlabel))
                 
-                plt.plot(epochs, rmax,'s', c='k', label='Max per {}'.format(method_xlabel), markersize=4)
-                plt.plot(epochs,rmin,'d', c='k', label='Min per {}'.format(method_xlabel), markersize=4)
-                plt.legend()
-                plt.xlabel(method_xlabel)
-                plt.ylabel(labels[i])
+                ax.plot(epochs, rmax,'s', c='k', label='Max per {}'.format(method_xlabel), markersize=4)
+                ax.plot(epochs,rmin,'d', c='k', label='Min per {}'.format(method_xlabel), markersize=4)
+                ax.legend()
+                ax.set_xlabel(method_xlabel)
+                ax.set_ylabel(labels[i])
                 
                 if color_index==9:
                     color_index=0
                 else:
                     color_index+=1
                     
-                plt.tight_layout()
-                plt.savefig(self.log_dir+'_'+labels[i]+'.png', format='png', dpi=150)
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(self.log_dir+'_'+labels[i]+'.png', format='png', dpi=150)
         
         # subplot mode           
         elif self.plot_mode=='subplot':
             # determine subplot size
             if ny == 2:
                 xx= [(1,2,1),(1,2,2)]
-                plt.figure(figsize=(12, 4.0))
+                fig=Figure(figsize=(12, 4.0))
             elif ny==3:
                 xx= [(1,3,1), (1,3,2), (1,3,3)]
-                plt.figure(figsize=(12, 4.0))
+                fig=Figure(figsize=(12, 4.0))
             elif ny==4:
                 xx= [(2,2,1), (2,2,2), (2,2,3), (2,2,4)]
-                plt.figure(figsize=(12, 8))
+                fig=Figure(figsize=(12, 8))
             elif ny > 4 and ny <= 21:
                 nrows=int(np.ceil(ny/3))
                 xx= [(nrows,3,item) for item in range(1,ny+1)]
                 adj_fac=(nrows - 2.0)*0.25 + 1
-                plt.figure(figsize=(12, adj_fac*8))
+                fig=Figure(figsize=(12, adj_fac*8))
             elif ny > 21 and ny <= 99:
                 nrows=int(np.ceil(ny/4))
                 xx= [(nrows,4,item) for item in range(1,ny+1)]
                 adj_fac=(nrows - 2.0)*0.25 + 1
-                plt.figure(figsize=(15, adj_fac*8))
-                
+                fig=Figure(figsize=(15, adj_fac*8))
+            FigureCanvasAgg(fig)
                 
             color_index=0
             for i in range (ny): #exclude caseid from plot, which is the first column 
-                plt.subplot(xx[i][0], xx[i][1], xx[i][2])
-                ravg, rstd, rmax, rmin=self.calc_cumavg(plot_data.iloc[:,i],self.avg_step)
+                ax=fig.add_subplot(xx[i][0], xx[i][1], xx[i][2])
+                ravg, rstd, rmax, rmin=data[labels[i]]
                 epochs=np.array(range(1,len(ravg)+1),dtype=int)
-                plt.plot(epochs,ravg,'-o', c=color_list[color_index])
+                ax.plot(epochs,ravg,'-o', c=color_list[color_index])
                 
-                plt.fill_between(epochs,[a_i - b_i for a_i, b_i in zip(ravg, rstd)], [a_i + b_i for a_i, b_i in zip(ravg, rstd)],
+                ax.fill_between(epochs,[a_i - b_i for a_i, b_i in zip(ravg, rstd)], [a_i + b_i for a_i, b_i in zip(ravg, rstd)],
                 alpha=0.2, edgecolor=color_list[color_index], facecolor=color_list[color_index])
                 
-                plt.plot(epochs,rmax,'s', c='k', markersize=4)
+                ax.plot(epochs,rmax,'s', c='k', markersize=4)
                 
-                plt.plot(epochs,rmin,'d', c='k', markersize=4)
-                plt.xlabel(method_xlabel)
-                plt.ylabel(labels[i])
+                ax.plot(epochs,rmin,'d', c='k', markersize=4)
+                ax.set_xlabel(method_xlabel)
+                ax.set_ylabel(labels[i])
                 if color_index==9:
                     color_index=0
                 else:
@@ -198,10 +207,9 @@ class SavePlotCallback(BaseCallback):
             legend_elements = [Line2D([0], [0], color='k', marker='o', label='Mean ' + r'$\pm$ ' +r'$1\sigma$' + ' per {} (color changes)'.format(method_xlabel)),
                   Line2D([0], [0], color='k', marker='s', label='Max per {} (color changes)'.format(method_xlabel)),
                   Line2D([0], [0], linestyle='-.', color='k', marker='d', label='Min per {} (color changes)'.format(method_xlabel))]
-            plt.figlegend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, 1.02), ncol=3)
-            plt.tight_layout()
-            plt.savefig(self.log_dir+'_res.png', format='png', dpi=200, bbox_inches="tight")
-            plt.close()
+            fig.legend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, 1.02), ncol=3)
+            fig.tight_layout()
+            fig.savefig(self.log_dir+'_res.png', format='png', dpi=200, bbox_inches="tight")
             
         else:
             raise Exception ('the plot mode defined by the user does not exist')
@@ -218,10 +226,11 @@ class RLLogger(BaseCallback):
     :param model_name: (str) name of the model to be saved  if ``save_model=True``
     :param save_best_only: (bool) if ``save_model = True``, then this flag only saves the model if the fitness value improves. 
     :param verbose: (bool) print updates to the screen
+    :param csvname: (str) name of a csv file where the step, fitness, and ``x`` of every logged step are appended (if ``None``, no csv file is written)
     """
     def __init__(self, check_freq=1, plot_freq=None, n_avg_steps=10, pngname='history', 
                  save_model=False, model_name='bestmodel.pkl', save_best_only=True, 
-                 verbose=False):
+                 verbose=False, csvname=None):
         super(RLLogger, self).__init__(verbose)
         self.check_freq = check_freq
         self.plot_freq=plot_freq
@@ -235,8 +244,12 @@ class RLLogger(BaseCallback):
         self.rbest_maxonly = -np.inf
         self.r_hist=[]
         self.x_hist=[]
+        self.stats=EpochStats(self.n_avg_steps)
+        self.csvname=csvname
+        self.csv=None
         
         if self.plot_freq:
+            self.plotter=BackgroundPlotter()
             #avoid activating 'Agg' in the header so not to affect other classes/algs
             import matplotlib
             matplotlib.use('Agg')
@@ -308,6 +321,12 @@ class RLLogger(BaseCallback):
                 self.r_hist.append(-rwd)
             
             self.x_hist.append(list(x))
+            self.stats.update(self.r_hist[-1])
+            
+            if self.csvname:
+                if self.csv is None:
+                    self.csv=CSVWriter(self.csvname, ['step', 'fitness']+['x{}'.format(i+1) for i in range(len(self.x_hist[-1]))])
+                self.csv.write([self.n_calls, self.r_hist[-1]]+self.x_hist[-1])
             
             if self.plot_freq:
                 if self.n_calls % self.plot_freq == 0:
@@ -318,30 +337,33 @@ class RLLogger(BaseCallback):
                 print('----------------------------------------------------------------------------------')
         return True
     
+    def _on_training_end(self) -> None:
+        #draw the last requested plot, stop the plotter thread, and close the csv logger before returning to the user
+        if self.plot_freq:
+            self.plotter.close()
+        if self.csv is not None:
+            self.csv.close()
+    
     def plot_progress(self): 
+        #snapshot the statistics and draw them in the background
+        self.plotter.submit(self.draw_progress, self.stats.summary())
     
-        plt.figure()
+    def draw_progress(self, stats):
+        #object API (Figure + Agg canvas) since this runs in the plotter thread
+        fig=Figure()
+        FigureCanvasAgg(fig)
+        ax=fig.add_subplot(1,1,1)
         
-        ravg, rstd, rmax, rmin=self.calc_cumavg(self.r_hist,self.n_avg_steps)
+        ravg, rstd, rmax, rmin=stats
         epochs=np.array(range(1,len(ravg)+1),dtype=int)
-        plt.plot(epochs, ravg,'-o', c='g', label='Average per epoch')
+        ax.plot(epochs, ravg,'-o', c='g', label='Average per epoch')
         
-        plt.fill_between(epochs,[a_i - b_i for a_i, b_i in zip(ravg, rstd)], [a_i + b_i for a_i, b_i in zip(ravg, rstd)],
+        ax.fill_between(epochs,[a_i - b_i for a_i, b_i in zip(ravg, rstd)], [a_i + b_i for a_i, b_i in zip(ravg, rstd)],
         alpha=0.2, edgecolor='g', facecolor='g', label=r'$1-\sigma$ per epoch')
         
-        plt.plot(epochs, rmax,'s', c='k', label='Max per epoch', markersize=4)
-        plt.plot(epochs,rmin,'d', c='k', label='Min per epoch', markersize=4)
-        plt.legend()
-        plt.xlabel('Epoch')
-        plt.ylabel('Fitness')
-        plt.savefig(self.pngname+'.png',format='png' ,dpi=300, bbox_inches="tight")
-        plt.close()
-
-    def calc_cumavg(self, data, N):
-    
-        cum_aves=[np.mean(data[i:i+N]) for i in range(0,len(data),N)]
-        cum_std=[np.std(data[i:i+N]) for i in range(0,len(data),N)]
-        cum_max=[np.max(data[i:i+N]) for i in range(0,len(data),N)]
-        cum_min=[np.min(data[i:i+N]) for i in range(0,len(data),N)]
-    
-        return cum_aves, cum_std, cum_max, cum_min
\ No newline at end of file
+        ax.plot(epochs, rmax,'s', c='k', label='Max per epoch', markersize=4)
+        ax.plot(epochs,rmin,'d', c='k', label='Min per epoch', markersize=4)
+        ax.legend()
+        ax.set_xlabel('Epoch')
+        ax.set_ylabel('Fitness')
+        fig.savefig(self.pngname+'.png',format='png' ,dpi=300, bbox_inches="tight")
@@ -0,0 +1,217 @@
+#    This file is part of NEORL.
+
+#    Copyright (c) 2021 Exelon Corporation and MIT Nuclear Science and Engineering
+#    NEORL is free software: you can redistribute it and/or modify
+#    it under the terms of the MIT LICENSE
+
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#    SOFTWARE.
+
+# -*- coding: utf-8 -*-
+
+import os
+import csv
+import threading
+import traceback
+import numpy as np
+
+class EpochStats:
+    """
+    Streaming statistics of a scalar series. The values are grouped in epochs of
+    ``n_avg_steps`` consecutive steps and the mean, std, max and min of every epoch are
+    kept in arrays, the last ``window`` values are kept in a ring buffer.
+    Each update costs O(1) regardless of the length of the history.
+
+    :param n_avg_steps: (int) number of steps grouped in one epoch
+    :param window: (int) length of the ring buffer used by ``window_mean``, if ``None``, ``window=n_avg_steps``
+    """
+    def __init__(self, n_avg_steps, window=None):
+        assert n_avg_steps >= 1, '--error: n_avg_steps ({}) must be more than or equal 1'.format(n_avg_steps)
+        self.n_avg_steps=n_avg_steps
+        self.window=window if window is not None else n_avg_steps
+        self.n=0
+        self.ring=np.zeros(self.window)
+        #statistics of completed epochs, columns: mean, std, max, min
+        self.epochs=np.zeros((16, 4))
+        self.n_epochs=0
+        self._reset_epoch()
+
+    def _reset_epoch(self):
+        #running (Welford) moments of the current epoch
+        self.count=0
+        self.mean=0.0
+        self.m2=0.0
+        self.max=-np.inf
+        self.min=np.inf
+
+    def _current(self):
+        return [self.mean, np.sqrt(self.m2/self.count), self.max, self.min]
+
+    def update(self, value):
+        """
+        This function adds one value to the statistics.
+
+        :param value: (float) the new value
+        """
+        value=float(value)
+        self.ring[self.n % self.window]=value
+        self.n+=1
+        self.count+=1
+        delta=value-self.mean
+        self.mean+=delta/self.count
+        self.m2+=delta*(value-self.mean)
+        self.max=max(self.max, value)
+        self.min=min(self.min, value)
+        if self.count == self.n_avg_steps:
+            if self.n_epochs == len(self.epochs):
+                self.epochs=np.concatenate((self.epochs, np.zeros_like(self.epochs)))
+            self.epochs[self.n_epochs]=self._current()
+            self.n_epochs+=1
+            self._reset_epoch()
+
+    def window_mean(self):
+        """
+        This function returns the mean of the last ``window`` values.
+
+        :return: (float) windowed mean
+        """
+        return float(np.mean(self.ring[:min(self.n, self.window)]))
+
+    def summary(self):
+        """
+        This function returns the statistics of every epoch, the last incomplete epoch is included.
+
+        :return: (tuple) arrays of the mean, std, max and min per epoch
+        """
+        stats=self.epochs[:self.n_epochs].copy()
+        if self.count:
+            stats=np.row_stack((stats, self._current()))
+        return stats[:,0], stats[:,1], stats[:,2], stats[:,3]
+
+class CSVTail:
+    """
+    Incremental reader of a csv file that is appended by another writer.
+    Every ``read`` returns only the complete rows added since the previous call,
+    the cells are returned as strings so non-numeric columns (e.g. ``caseid``) can be kept.
+
+    :param path: (str) path of the csv file
+    """
+    def __init__(self, path):
+        self.path=path
+        self.offset=0
+        self.columns=None
+
+    def read(self):
+        """
+        This function reads the rows appended since the last call.
+
+        :return: (list) list of rows, each row is a list of str
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data=f.read()
+        #keep a partially written last line for the next call
+        end=data.rfind(b'\n')+1
+        self.offset+=end
+        lines=data[:end].decode().splitlines()
+        if self.columns is None and lines:
+            self.columns=next(csv.reader([lines[0]]))
+            lines=lines[1:]
+        return [row for row in csv.reader(lines) if row]
+
+class CSVWriter:
+    """
+    Append-only csv writer, the file is kept open and flushed at every write.
+
+    :param path: (str) path of the csv file, an existing file is overwritten
+    :param columns: (list) names of the columns
+    """
+    def __init__(self, path, columns):
+        self.file=open(path, 'w', newline='')
+        self.writer=csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.file.flush()
+
+    def write(self, row):
+        """
+        This function appends one row to the file.
+
+        :param row: (list) values of the row
+        """
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        """
+        This function closes the file.
+        """
+        if not self.file.closed:
+            self.file.close()
+
+class BackgroundPlotter:
+    """
+    Runs a plotting function in a background thread so the caller is not blocked
+    while the figures are rendered. If several plots are requested while one is
+    being drawn, only the most recent request is kept.
+    """
+    def __init__(self):
+        self._cond=threading.Condition()
+        self._pending=None
+        self._busy=False
+        self._closed=False
+        self._thread=threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                func, args=self._pending
+                self._pending=None
+                self._busy=True
+            try:
+                func(*args)
+            except Exception:
+                print('--warning: the background plot failed with the traceback below\n{}'.format(traceback.format_exc()))
+            with self._cond:
+                self._busy=False
+                self._cond.notify_all()
+
+    def submit(self, func, *args):
+        """
+        This function requests ``func(*args)`` in the background, the arguments must be snapshots
+        that the caller does not modify afterwards.
+
+        :param func: (function) plotting function
+        :param args: arguments of ``func``
+        """
+        with self._cond:
+            self._pending=(func, args)
+            self._cond.notify_all()
+
+    def wait(self):
+        """
+        This function blocks until the pending plots are drawn.
+        """
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        """
+        This function draws the pending plot and stops the thread.
+        """
+        with self._cond:
+            self._closed=True
+            self._cond.notify_all()
+        self._thread.join()
@@ -20,7 +20,6 @@
 #@author: majdi
 #"""
 
-import pandas as pd
 import numpy as np
 from neorl.evolu.discrete import decode_discrete_to_grid
 
@@ -65,6 +64,7 @@ def check_mixed_individual(x, bounds):
    
 def get_population(pop, fits=None, grid_flag=False, bounds=None, bounds_map=None):
     
+    import pandas as pd   #imported here to keep ``import neorl`` light
     if isinstance(pop, dict):
         #either ES or PSO
         d=len(pop[0][0])
@@ -119,6 +119,7 @@ def get_population_nsga(pop,mode):#Paul
     :param mode: (str) type of optimization
     :Returns df_pop: (DataFrame) position and value of each objective for each individual in the population
     """
+    import pandas as pd
     d=len(pop[0][0])
     p= len(pop[0][2])
     npop=len(pop)